@@ -0,0 +1,20 @@
+"""
+Бенчмарки производительности доски объявлений.
+
+Скрипты запускаются как модули из корня проекта, например:
+    python -m benchmarks.pagination --rows 200000
+
+Данные для бенчмарков создаёт benchmarks.datagen, JSON-отчёты и их
+сравнение - benchmarks.report.
+"""
+import os
+
+
+def setup_django():
+    """
+    Инициализирует Django для запуска бенчмарка вне manage.py.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    import django
+    django.setup()
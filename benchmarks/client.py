@@ -0,0 +1,87 @@
+"""
+Минимальный асинхронный HTTP/1.1-клиент для нагрузочных бенчмарков.
+
+Держит одно keep-alive соединение и переподключается, если сервер его
+закрыл. Поддерживает тела с Content-Length и chunked - этого достаточно
+для ответов API; внешние зависимости не нужны.
+"""
+import asyncio
+import json
+
+
+class HttpClient:
+    """
+    Клиент одного виртуального пользователя.
+
+    Параметры:
+        host (str): Адрес сервера.
+        port (int): Порт сервера.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+        self.headers = {}
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, data=None):
+        """
+        Выполняет запрос и возвращает статус и разобранное JSON-тело (или None).
+        """
+        body = json.dumps(data).encode() if data is not None else b''
+        headers = {'Host': self.host, 'Content-Length': str(len(body)), **self.headers}
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        head = f'{method} {path} HTTP/1.1\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+        message = head.encode() + b'\r\n' + body
+
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(message)
+                await self.writer.drain()
+                return await self.read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Сервер закрыл keep-alive соединение: повторяем на новом.
+                await self.close()
+                if attempt:
+                    raise
+
+    async def read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            content = b''.join(chunks)
+        else:
+            content = await self.reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        if content and headers.get('content-type', '').startswith('application/json'):
+            return status, json.loads(content)
+        return status, None
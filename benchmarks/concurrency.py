@@ -0,0 +1,139 @@
+"""
+Сравнение серверных режимов asgi и wsgi под конкурентной нагрузкой.
+
+Для каждого режима запускается gunicorn с config/gunicorn.py и одним
+воркером, после чего --concurrency клиентов одновременно запрашивают
+--path, всего --requests запросов. Кеш ответов по умолчанию отключается
+(RESPONSE_CACHE_TIMEOUT=0), чтобы измерялась работа представлений и базы.
+Настройки базы берутся из окружения и .env, как у приложения.
+
+    python -m benchmarks.concurrency --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+
+async def fetch(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def load(host, port, path, requests, concurrency):
+    timings = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status_code = await fetch(host, port, path)
+            except OSError:
+                status_code = None
+            timings.append((time.perf_counter() - started) * 1000)
+            if status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p99': timings[min(int(len(timings) * 0.99), len(timings) - 1)],
+        'rps': requests / elapsed,
+        'errors': errors,
+    }
+
+
+def wait_for_server(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(asyncio.wait_for(asyncio.open_connection(host, port), 1))
+            return
+        except (OSError, asyncio.TimeoutError):
+            time.sleep(0.2)
+    raise RuntimeError('Сервер не запустился')
+
+
+@contextmanager
+def run_server(mode, host, port, workers=1, threads=4, **env):
+    """
+    Запускает gunicorn с config/gunicorn.py и останавливает его на выходе.
+
+    Параметры:
+        mode (str): Режим сервера, asgi или wsgi.
+        host (str), port (int): Адрес сервера.
+        workers (int): Число воркеров.
+        threads (int): Число потоков на воркер в режиме wsgi.
+        **env: Дополнительные переменные окружения сервера.
+    """
+    env = dict(
+        os.environ,
+        SERVER_MODE=mode,
+        SERVER_BIND=f'{host}:{port}',
+        SERVER_WORKERS=str(workers),
+        SERVER_THREADS=str(threads),
+        **env,
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'config/gunicorn.py', '--access-logfile', '/dev/null'],
+        env=env,
+    )
+    try:
+        wait_for_server(host, port)
+        yield server
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def run_mode(mode, args):
+    # Нагрузка идёт с одного адреса: ограничение частоты исказило бы замер.
+    env = {'THROTTLE_ADS_LIST': ''}
+    if not args.with_cache:
+        env['RESPONSE_CACHE_TIMEOUT'] = '0'
+    with run_server(mode, args.host, args.port, args.workers, args.threads, **env):
+        # Прогрев: импорт модулей и соединения с базой не входят в замер.
+        asyncio.run(load(args.host, args.port, args.path, args.concurrency, args.concurrency))
+        return asyncio.run(load(args.host, args.port, args.path, args.requests, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--path', default='/api/ads/')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=4, help='Потоков на воркер в режиме wsgi')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--with-cache', action='store_true', help='Не отключать кеш ответов')
+    args = parser.parse_args()
+
+    print(f'path={args.path} requests={args.requests} concurrency={args.concurrency} '
+          f'workers={args.workers} threads={args.threads}')
+    print(f'{"mode":>6} {"p50, ms":>10} {"p99, ms":>10} {"req/s":>10} {"errors":>8}')
+    for mode in ('wsgi', 'asgi'):
+        result = run_mode(mode, args)
+        print(f'{mode:>6} {result["p50"]:>10.2f} {result["p99"]:>10.2f} '
+              f'{result["rps"]:>10.0f} {result["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Генератор данных для бенчмарков: пользователи, объявления и отзывы.
+
+Записи создаются пакетами через bulk_create, пароль хешируется один раз
+для всех пользователей, счётчики отзывов объявлений заполняются сразу,
+без пересчёта. Пользователи получают адреса вида user<N>@bench.example.com
+и пароль benchmark - под ними входит сценарный бенчмарк. Данные
+воспроизводимы: содержимое определяется параметром --seed.
+
+    python -m benchmarks.datagen --users 1000 --ads 100000 --comments 5
+    python -m benchmarks.datagen --clear
+"""
+import argparse
+import random
+import time
+
+from benchmarks import setup_django
+
+DOMAIN = 'bench.example.com'
+PASSWORD = 'benchmark'
+
+WORDS = (
+    'велосипед', 'диван', 'ноутбук', 'телефон', 'куртка', 'коляска', 'гитара', 'стол', 'шкаф',
+    'холодильник', 'палатка', 'самокат', 'книга', 'кресло', 'лыжи', 'монитор', 'часы', 'сумка',
+)
+
+
+def bench_email(number):
+    return f'user{number}@{DOMAIN}'
+
+
+def generate(users=100, ads=1000, comments=5, batch_size=5000, seed=0):
+    """
+    Создаёт пользователей, объявления и отзывы.
+
+    Параметры:
+        users (int): Число пользователей.
+        ads (int): Число объявлений.
+        comments (int): Среднее число отзывов на объявление.
+        batch_size (int): Размер пакета bulk_create.
+        seed (int): Начальное значение генератора случайных чисел.
+
+    Возврат:
+        dict: Идентификаторы созданных пользователей и объявлений (user_pks, ad_pks)
+            и число отзывов (comments).
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from notice_board.cache import invalidate_ads
+    from notice_board.models import Ad, Comment
+    from users.models import User
+
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    now = timezone.now()
+    first = User.objects.filter(email__endswith=f'@{DOMAIN}').count()
+
+    user_pks = []
+    for start in range(0, users, batch_size):
+        created = User.objects.bulk_create(
+            User(email=bench_email(first + number), password=password,
+                 first_name=f'Имя{first + number}', last_name=f'Фамилия{first + number}')
+            for number in range(start, min(start + batch_size, users))
+        )
+        user_pks += [user.pk for user in created]
+
+    ad_pks = []
+    total_comments = 0
+    for start in range(0, ads, batch_size):
+        batch = []
+        for number in range(start, min(start + batch_size, ads)):
+            words = rng.sample(WORDS, 3)
+            count = rng.randint(0, 2 * comments) if comments else 0
+            batch.append(Ad(
+                title=f'{words[0].capitalize()} {words[1]} {number}',
+                price=rng.choice((None, rng.randint(100, 100000))),
+                description=' '.join(rng.choices(WORDS, k=30)),
+                author_id=rng.choice(user_pks),
+                comments_count=count,
+                last_commented_at=now if count else None,
+            ))
+        created = Ad.objects.bulk_create(batch)
+        ad_pks += [ad.pk for ad in created]
+
+        thread = [
+            Comment(text=f'Отзыв {index} к объявлению {ad.pk}', ad_id=ad.pk, author_id=rng.choice(user_pks))
+            for ad in created for index in range(ad.comments_count)
+        ]
+        for offset in range(0, len(thread), batch_size):
+            Comment.objects.bulk_create(thread[offset:offset + batch_size])
+        total_comments += len(thread)
+
+    # bulk_create не отправляет сигналы, поэтому кеш ответов сбрасывается явно.
+    invalidate_ads()
+    return {'user_pks': user_pks, 'ad_pks': ad_pks, 'comments': total_comments}
+
+
+def clear():
+    """
+    Удаляет пользователей генератора вместе с их объявлениями и отзывами.
+    """
+    from users.models import User
+
+    return User.objects.filter(email__endswith=f'@{DOMAIN}').delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--ads', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=5, help='Среднее число отзывов на объявление')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--clear', action='store_true', help='Удалить ранее созданные данные')
+    args = parser.parse_args()
+
+    setup_django()
+    if args.clear:
+        deleted, _ = clear()
+        print(f'Удалено записей: {deleted}')
+        return
+
+    started = time.perf_counter()
+    result = generate(args.users, args.ads, args.comments, args.batch_size, args.seed)
+    print(f'users={len(result["user_pks"])} ads={len(result["ad_pks"])} comments={result["comments"]} '
+          f'за {time.perf_counter() - started:.1f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Задержка запросов с новым соединением на каждый запрос и с настроенными соединениями.
+
+Каждый поток имитирует обработку HTTP-запросов: сигналы request_started и
+request_finished закрывают соединение так же, как это делает Django,
+а между ними выполняется выборка страницы ленты. Режим per-request
+соответствует CONN_MAX_AGE=0, режим configured - текущим настройкам
+(постоянные соединения или пул, см. config/db.py).
+
+    python -m benchmarks.db_connections --requests 500 --concurrency 8
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from benchmarks import setup_django
+
+
+def percentile(timings, share):
+    """
+    Возвращает перцентиль share (0..1) отсортированного списка.
+    """
+    index = min(int(len(timings) * share), len(timings) - 1)
+    return timings[index]
+
+
+def simulate(requests, timings):
+    from django.core import signals
+    from django.db import connection
+
+    from notice_board.models import Ad
+
+    for _ in range(requests):
+        started = time.perf_counter()
+        signals.request_started.send(sender=None)
+        list(Ad.objects.order_by('-created_at', '-pk').values_list('pk', 'title')[:20])
+        signals.request_finished.send(sender=None)
+        timings.append((time.perf_counter() - started) * 1000)
+    connection.close()
+
+
+def run_mode(requests, concurrency):
+    timings = []
+    threads = [
+        threading.Thread(target=simulate, args=(requests // concurrency, timings))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'p50': statistics.median(timings),
+        'p99': percentile(timings, 0.99),
+        'rps': len(timings) / elapsed,
+    }
+
+
+def run(requests, concurrency):
+    from django.db import connections
+
+    from config.db import get_connection_stats
+
+    settings_dict = connections['default'].settings_dict
+    configured = settings_dict['CONN_MAX_AGE']
+    mode = 'pool' if 'pool' in settings_dict['OPTIONS'] else f'CONN_MAX_AGE={configured}'
+    print(f'requests={requests} concurrency={concurrency} configured: {mode}')
+    print(f'{"mode":>12} {"p50, ms":>10} {"p99, ms":>10} {"req/s":>10}')
+
+    # Словарь настроек общий для соединений всех потоков, поэтому режим
+    # меняется до запуска потоков.
+    for name, max_age in (('per-request', 0), ('configured', configured)):
+        if name == 'per-request' and 'pool' in settings_dict['OPTIONS']:
+            continue
+        settings_dict['CONN_MAX_AGE'] = max_age
+        result = run_mode(requests, concurrency)
+        print(f'{name:>12} {result["p50"]:>10.2f} {result["p99"]:>10.2f} {result["rps"]:>10.0f}')
+    settings_dict['CONN_MAX_AGE'] = configured
+
+    print(get_connection_stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
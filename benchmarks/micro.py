@@ -0,0 +1,229 @@
+"""
+Микробенчмарки сериализаторов, фильтра объявлений и классов прав доступа.
+
+Каждый бенчмарк - функция, которая получает подготовленные данные
+и возвращает измеряемый вызов. Как в pytest-benchmark, число вызовов
+в раунде подбирается так, чтобы раунд длился не меньше --min-time,
+а в отчёт попадает время одного вызова по --rounds раундам.
+Данные создаются генератором внутри транзакции, которая откатывается
+в конце.
+
+    python -m benchmarks.micro --ads 2000 --output micro.json
+    python -m benchmarks.micro --baseline micro-1.4.json --output micro.json
+"""
+import argparse
+import json
+import sys
+import time
+
+from benchmarks import setup_django
+from benchmarks.report import compare, print_regressions, print_table, summarize, write_report
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Регистрирует бенчмарк под именем name.
+    """
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def measure(func, rounds, min_time):
+    """
+    Возвращает время одного вызова func в миллисекундах для каждого раунда.
+    """
+    started = time.perf_counter()
+    func()
+    once = time.perf_counter() - started
+    iterations = max(1, int(min_time / once)) if once else 1000
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - started) * 1000 / iterations)
+    return timings
+
+
+class Fixtures:
+    """
+    Данные бенчмарков: страница объявлений и отзывов, запрос и пользователи.
+    """
+
+    def __init__(self, data, page_size=20):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from notice_board.mixins import build_query_plan
+        from notice_board.models import Ad, Comment
+        from notice_board.serializers import AdDetailSerializer, AdSerializer, CommentSerializer
+        from users.models import User, UserRoles
+
+        self.request = Request(APIRequestFactory().get('/api/ads/'))
+        self.context = {'request': self.request}
+        self.page_size = page_size
+        self.ads = Ad.objects.filter(pk__in=data['ad_pks'])
+        ad_page = self.ads.order_by('-pk')[:page_size]
+        commented = self.ads.filter(comments_count__gt=0).order_by('-pk').first()
+        comment_page = Comment.objects.filter(ad=commented).order_by('created_at', 'pk')[:page_size]
+
+        self.pages = {
+            AdSerializer: ad_page,
+            AdDetailSerializer: ad_page,
+            CommentSerializer: comment_page,
+        }
+        # Экземпляры и строки values() загружаются заранее: измеряется только сериализация.
+        self.instances = {
+            serializer_class: list(build_query_plan(serializer_class, page.model).apply(page))
+            for serializer_class, page in self.pages.items()
+        }
+        self.author = User.objects.get(pk=data['user_pks'][0])
+        self.admin = User(email='admin@example.com', role=UserRoles.ADMIN)
+        self.ad = self.ads.select_related('author').first()
+
+    def rows(self, serializer_class):
+        from notice_board.fast_serializers import FastSerializer
+
+        serializer = FastSerializer(serializer_class, self.context)
+        return serializer, list(serializer.values(self.pages[serializer_class]))
+
+    def user_request(self, user):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        request = Request(APIRequestFactory().get('/api/ads/'))
+        request.user = user
+        return request
+
+
+def _serializer_benchmarks(name, serializer_path):
+    def drf(fixtures):
+        serializer_class = _import(serializer_path)
+        instances = fixtures.instances[serializer_class]
+        return lambda: serializer_class(instances, many=True, context=fixtures.context).data
+
+    def fast(fixtures):
+        serializer, rows = fixtures.rows(_import(serializer_path))
+        return lambda: serializer.serialize(rows)
+
+    benchmark(f'serializer.{name}.drf')(drf)
+    benchmark(f'serializer.{name}.fast')(fast)
+
+
+def _import(path):
+    from django.utils.module_loading import import_string
+
+    return import_string(path)
+
+
+_serializer_benchmarks('ad_list', 'notice_board.serializers.AdSerializer')
+_serializer_benchmarks('ad_detail', 'notice_board.serializers.AdDetailSerializer')
+_serializer_benchmarks('comments', 'notice_board.serializers.CommentSerializer')
+
+
+@benchmark('renderer.ad_list')
+def renderer_ad_list(fixtures):
+    from notice_board.renderers import FastJSONRenderer
+    from notice_board.serializers import AdSerializer
+
+    serializer, rows = fixtures.rows(AdSerializer)
+    data = serializer.serialize(rows)
+    renderer = FastJSONRenderer()
+    return lambda: renderer.render(data)
+
+
+def _filter_benchmark(name, params):
+    def run(fixtures):
+        from notice_board.filters import AdFilter
+
+        queryset = fixtures.ads.order_by('-created_at', '-pk')
+        return lambda: list(AdFilter(params, queryset=queryset).qs.values_list('pk', flat=True)[:fixtures.page_size])
+
+    benchmark(f'filter.{name}')(run)
+
+
+_filter_benchmark('search', {'q': 'велосипед'})
+_filter_benchmark('comments_count', {'comments_count_min': 3, 'ordering': '-comments_count'})
+_filter_benchmark('last_commented', {'last_commented_after': '2000-01-01T00:00:00Z', 'ordering': '-last_commented_at'})
+_filter_benchmark('price_range', {'price_min': 1000, 'price_max': 50000, 'ordering': 'price'})
+_filter_benchmark('has_image', {'has_image': 'true'})
+
+
+@benchmark('permission.is_author')
+def permission_is_author(fixtures):
+    from notice_board.permissions import IsAuthor
+
+    permission = IsAuthor()
+    request = fixtures.user_request(fixtures.author)
+    return lambda: permission.has_object_permission(request, None, fixtures.ad)
+
+
+@benchmark('permission.is_admin')
+def permission_is_admin(fixtures):
+    from notice_board.permissions import IsAdmin
+
+    permission = IsAdmin()
+    request = fixtures.user_request(fixtures.admin)
+    return lambda: permission.has_permission(request, None)
+
+
+@benchmark('permission.comment_viewset')
+def permission_comment_viewset(fixtures):
+    from notice_board.views import CommentViewSet
+
+    view = CommentViewSet(action='update', kwargs={'ad_pk': fixtures.ad.pk, 'pk': 0})
+    request = fixtures.user_request(fixtures.author)
+    view.request = request
+
+    def check():
+        view.check_permissions(request)
+        view.check_object_permissions(request, fixtures.ad)
+    return check
+
+
+def run(args):
+    from django.db import transaction
+
+    from benchmarks.datagen import generate
+
+    selected = {name: func for name, func in BENCHMARKS.items() if not args.filter or args.filter in name}
+    results = {}
+    with transaction.atomic():
+        fixtures = Fixtures(generate(args.users, args.ads, args.comments))
+        for name, func in selected.items():
+            results[name] = summarize(measure(func(fixtures), args.rounds, args.min_time))
+        transaction.set_rollback(True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--ads', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=5)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--min-time', type=float, default=0.005, help='Минимальная длительность раунда, с')
+    parser.add_argument('--filter', help='Запускать только бенчмарки, в имени которых есть подстрока')
+    parser.add_argument('--output', help='Путь к JSON-отчёту')
+    parser.add_argument('--baseline', help='Отчёт для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args)
+    print_table(results)
+    if args.output:
+        write_report(args.output, 'micro', vars(args), results)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(json.load(file), {'results': results}, args.tolerance)
+        print_regressions(regressions, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Сравнение времени выборки страницы ленты на малой и большой глубине.
+
+Курсорная пагинация (AdPaginator) сравнивается с OFFSET-выборкой той же
+страницы. Данные создаются внутри транзакции, которая откатывается в конце,
+поэтому запуск не оставляет следов в базе.
+
+    python -m benchmarks.pagination --rows 110000 --depths 10 100000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import setup_django
+
+
+def measure(func, repeat):
+    """
+    Выполняет func repeat раз и возвращает медиану времени в миллисекундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def populate(rows, batch_size=5000):
+    """
+    Дополняет таблицу объявлений до rows записей.
+    """
+    from notice_board.models import Ad
+
+    missing = rows - Ad.objects.count()
+    for start in range(0, max(missing, 0), batch_size):
+        size = min(batch_size, missing - start)
+        Ad.objects.bulk_create(Ad(title=f'Benchmark ad {start + i}') for i in range(size))
+
+
+def run(rows, depths, page_size, repeat):
+    from django.db import transaction
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from notice_board.models import Ad
+    from notice_board.paginator import AdPaginator
+
+    factory = APIRequestFactory()
+    queryset = Ad.objects.order_by('-created_at', '-pk')
+
+    with transaction.atomic():
+        populate(rows)
+        print(f'rows={Ad.objects.count()} page_size={page_size} repeat={repeat}')
+        print(f'{"depth":>10} {"keyset, ms":>12} {"offset, ms":>12}')
+
+        for depth in depths:
+            # Позиция курсора берётся из строки, предшествующей странице на нужной глубине.
+            anchor = queryset[depth - 1] if depth else None
+            paginator = AdPaginator()
+            paginator.ordering = paginator.get_ordering(None, queryset, None)
+            paginator.base_url = 'http://testserver/api/ads/'
+            url = paginator.base_url
+            if anchor is not None:
+                url = paginator._build_link(anchor, reverse=False)
+            request = Request(factory.get(url, {'page_size': page_size}))
+
+            keyset_ms = measure(lambda: AdPaginator().paginate_queryset(queryset, request), repeat)
+            offset_ms = measure(lambda: list(queryset[depth:depth + page_size]), repeat)
+            print(f'{depth:>10} {keyset_ms:>12.2f} {offset_ms:>12.2f}')
+
+        transaction.set_rollback(True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=110000)
+    parser.add_argument('--depths', type=int, nargs='+', default=[10, 100000])
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.rows, args.depths, args.page_size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
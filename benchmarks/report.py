@@ -0,0 +1,153 @@
+"""
+JSON-отчёты бенчмарков и сравнение с базовым отчётом.
+
+Отчёт содержит параметры запуска, окружение (коммит, версии Python
+и Django, СУБД) и для каждого замера - число измерений, среднее, p50,
+p90, p99 и максимум в миллисекундах. Сравнение находит замеры, у которых
+p50 или p99 выросли больше допуска:
+
+    python -m benchmarks.report baseline.json current.json --tolerance 0.2
+
+Код выхода 1 означает найденную регрессию.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.db_connections import percentile
+
+COMPARED_METRICS = ('p50', 'p99')
+
+
+def summarize(timings, elapsed=None):
+    """
+    Возвращает статистику замеров.
+
+    Параметры:
+        timings (list): Время измерений в миллисекундах.
+        elapsed (float): Общая длительность в секундах для расчёта числа
+            запросов в секунду, если нужно.
+
+    Возврат:
+        dict: count, mean, p50, p90, p99, max (и rps при заданном elapsed).
+    """
+    timings = sorted(timings)
+    if not timings:
+        return {'count': 0}
+    summary = {
+        'count': len(timings),
+        'mean': statistics.fmean(timings),
+        'p50': statistics.median(timings),
+        'p90': percentile(timings, 0.90),
+        'p99': percentile(timings, 0.99),
+        'max': timings[-1],
+    }
+    if elapsed:
+        summary['rps'] = len(timings) / elapsed
+    return summary
+
+
+def get_environment():
+    from django.conf import settings
+    import django
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        'platform': platform.platform(),
+    }
+
+
+def write_report(path, kind, params, results):
+    """
+    Сохраняет отчёт в JSON.
+
+    Параметры:
+        path (str): Путь к файлу отчёта.
+        kind (str): Вид бенчмарка, например 'micro' или 'scenarios'.
+        params (dict): Параметры запуска.
+        results (dict): Статистика замеров по именам.
+    """
+    report = {
+        'kind': kind,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': get_environment(),
+        'params': params,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def compare(baseline, current, tolerance=0.2, metrics=COMPARED_METRICS):
+    """
+    Сравнивает результаты двух отчётов.
+
+    Параметры:
+        baseline (dict): Базовый отчёт.
+        current (dict): Текущий отчёт.
+        tolerance (float): Допустимый относительный рост, 0.2 - на 20%.
+        metrics (tuple): Сравниваемые показатели.
+
+    Возврат:
+        list: Регрессии (имя, показатель, было, стало).
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        for metric in metrics:
+            if metric in base and metric in result and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+
+def print_regressions(regressions, tolerance):
+    if not regressions:
+        print(f'Регрессий больше {tolerance:.0%} нет')
+        return
+    print(f'Регрессии больше {tolerance:.0%}:')
+    for name, metric, before, after in regressions:
+        print(f'  {name} {metric}: {before:.3f} -> {after:.3f} мс ({after / before - 1:+.0%})')
+
+
+def print_table(results):
+    print(f'{"name":>36} {"count":>7} {"p50, ms":>10} {"p99, ms":>10} {"mean, ms":>10} {"errors":>7}')
+    for name, result in results.items():
+        if not result.get('count'):
+            print(f'{name:>36} {0:>7}')
+            continue
+        print(f'{name:>36} {result["count"]:>7} {result["p50"]:>10.3f} {result["p99"]:>10.3f} '
+              f'{result["mean"]:>10.3f} {result.get("errors", 0):>7}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(args.current, encoding='utf-8') as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.tolerance)
+    print_regressions(regressions, args.tolerance)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Сценарный нагрузочный тест публичного API.
+
+Как в locust, --users виртуальных пользователей входят через /api/token/
+и в течение --duration секунд выполняют задачи, выбирая их по весам:
+лента, поиск, карточка объявления, отзывы, создание, изменение
+и удаление отзыва, повторный вход. Время каждого запроса записывается
+под именем задачи, в отчёт попадают p50/p90/p99, число ошибок и запросов
+в секунду.
+
+По умолчанию запускается локальный gunicorn (как в benchmarks.concurrency)
+с отключённым ограничением частоты; --no-server направляет нагрузку на уже
+запущенный сервер - тогда ограничение нужно отключить в его окружении
+(THROTTLE_*=''). Пользователи и объявления берутся из benchmarks.datagen,
+недостающие создаются перед запуском.
+
+    python -m benchmarks.scenarios --users 20 --duration 30 --output scenarios.json
+    python -m benchmarks.scenarios --baseline scenarios-1.4.json --output scenarios.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlencode
+
+from benchmarks import setup_django
+from benchmarks.client import HttpClient
+from benchmarks.concurrency import run_server
+from benchmarks.datagen import DOMAIN, PASSWORD, WORDS, generate
+from benchmarks.report import compare, print_regressions, print_table, summarize, write_report
+
+TASKS = []
+
+# Ограничения частоты, отключаемые у запущенного сервера.
+THROTTLE_SCOPES = ('LOGIN', 'REGISTRATION', 'PASSWORD_RESET', 'AD_CREATE', 'COMMENT_CREATE', 'ADS_LIST')
+
+
+def task(weight):
+    """
+    Регистрирует задачу виртуального пользователя с весом weight.
+    """
+    def decorator(func):
+        TASKS.append((func, weight))
+        return func
+    return decorator
+
+
+class VirtualUser:
+    """
+    Виртуальный пользователь: своё соединение, токен и генератор случайных чисел.
+    """
+
+    def __init__(self, host, port, email, ad_pks, stats, seed):
+        self.client = HttpClient(host, port)
+        self.email = email
+        self.ad_pks = ad_pks
+        self.stats = stats
+        self.random = random.Random(seed)
+
+    async def call(self, name, method, path, data=None, expected=200):
+        """
+        Выполняет запрос, записывает его время под именем name и возвращает тело ответа.
+        """
+        started = time.perf_counter()
+        try:
+            status, body = await self.client.request(method, path, data)
+        except OSError:
+            status, body = None, None
+        timings, errors = self.stats.setdefault(name, ([], [0]))
+        timings.append((time.perf_counter() - started) * 1000)
+        if status != expected:
+            errors[0] += 1
+            return None
+        return body if body is not None else {}
+
+    async def login(self):
+        self.client.headers.pop('Authorization', None)
+        body = await self.call('token', 'POST', '/api/token/', {'email': self.email, 'password': PASSWORD})
+        if body:
+            self.client.headers['Authorization'] = f'Bearer {body["access"]}'
+        return body
+
+    def ad_pk(self):
+        return self.random.choice(self.ad_pks)
+
+
+@task(10)
+async def ads_list(user):
+    await user.call('ads_list', 'GET', '/api/ads/')
+
+
+@task(2)
+async def ads_search(user):
+    await user.call('ads_search', 'GET', '/api/ads/?' + urlencode({'q': user.random.choice(WORDS)}))
+
+
+@task(5)
+async def ad_detail(user):
+    await user.call('ad_detail', 'GET', f'/api/ads/{user.ad_pk()}/')
+
+
+@task(3)
+async def comments_list(user):
+    await user.call('comments_list', 'GET', f'/api/ads/{user.ad_pk()}/comments/')
+
+
+@task(1)
+async def comment_crud(user):
+    url = f'/api/ads/{user.ad_pk()}/comments/'
+    comment = await user.call('comment_create', 'POST', url, {'text': 'Отзыв из бенчмарка'}, expected=201)
+    if not comment:
+        return
+    await user.call('comment_update', 'PATCH', f'{url}{comment["pk"]}/', {'text': 'Изменённый отзыв'})
+    await user.call('comment_delete', 'DELETE', f'{url}{comment["pk"]}/', expected=204)
+
+
+@task(1)
+async def token(user):
+    await user.login()
+
+
+async def run_user(user, deadline, think):
+    tasks, weights = zip(*TASKS)
+    try:
+        await user.login()
+        while time.monotonic() < deadline:
+            await user.random.choices(tasks, weights)[0](user)
+            if think:
+                await asyncio.sleep(think / 1000)
+    finally:
+        await user.client.close()
+
+
+async def load(host, port, emails, ad_pks, duration, think, seed):
+    stats = {}
+    users = [VirtualUser(host, port, email, ad_pks, stats, seed + number) for number, email in enumerate(emails)]
+    started = time.perf_counter()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(run_user(user, deadline, think) for user in users))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name, (timings, errors) in sorted(stats.items()):
+        results[name] = {**summarize(timings, elapsed), 'errors': errors[0]}
+    all_timings = [timing for timings, _ in stats.values() for timing in timings]
+    results['total'] = {**summarize(all_timings, elapsed), 'errors': sum(errors[0] for _, errors in stats.values())}
+    return results
+
+
+def prepare_data(users, ads, comments):
+    """
+    Возвращает адреса пользователей и идентификаторы объявлений генератора,
+    создавая недостающих пользователей.
+    """
+    from notice_board.models import Ad
+    from users.models import User
+
+    bench_users = User.objects.filter(email__endswith=f'@{DOMAIN}')
+    missing = users - bench_users.count()
+    if missing > 0 or not Ad.objects.filter(author__in=bench_users).exists():
+        generate(max(missing, 0) or users, ads, comments)
+    emails = list(bench_users.order_by('pk').values_list('email', flat=True)[:users])
+    ad_pks = list(Ad.objects.filter(author__in=bench_users).order_by('-pk').values_list('pk', flat=True)[:1000])
+    return emails, ad_pks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help='Число виртуальных пользователей')
+    parser.add_argument('--duration', type=float, default=30, help='Длительность нагрузки, с')
+    parser.add_argument('--think', type=float, default=0, help='Пауза между задачами, мс')
+    parser.add_argument('--ads', type=int, default=10000, help='Объявлений для генератора, если данных нет')
+    parser.add_argument('--comments', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', default='asgi', choices=('asgi', 'wsgi'))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--no-server', action='store_true', help='Не запускать сервер, использовать запущенный')
+    parser.add_argument('--output', help='Путь к JSON-отчёту')
+    parser.add_argument('--baseline', help='Отчёт для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    setup_django()
+    emails, ad_pks = prepare_data(args.users, args.ads, args.comments)
+
+    def run():
+        return asyncio.run(load(args.host, args.port, emails, ad_pks, args.duration, args.think, args.seed))
+
+    if args.no_server:
+        results = run()
+    else:
+        env = {f'THROTTLE_{scope}': '' for scope in THROTTLE_SCOPES}
+        with run_server(args.mode, args.host, args.port, args.workers, args.threads, **env):
+            results = run()
+
+    print(f'users={len(emails)} duration={args.duration}s mode={args.mode} '
+          f'req/s={results["total"].get("rps", 0):.0f}')
+    print_table(results)
+    if args.output:
+        write_report(args.output, 'scenarios', vars(args), results)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(json.load(file), {'results': results}, args.tolerance)
+        print_regressions(regressions, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Сравнение ModelSerializer и FastSerializer на списке записей.
+
+Для каждого сериализатора измеряется полный путь ответа: выборка
+--rows записей, сериализация и рендеринг в JSON. Обычный путь - запрос
+с select_related и JSONRenderer, быстрый - values(), FastSerializer
+и FastJSONRenderer. Отдельно проверяется, что ответы совпадают байт в байт.
+Данные создаются внутри транзакции, которая откатывается в конце.
+
+    python -m benchmarks.serializers --rows 10000
+"""
+import argparse
+
+from benchmarks import setup_django
+from benchmarks.pagination import measure
+
+
+def populate(rows, batch_size=5000):
+    """
+    Создаёт автора, rows объявлений и по отзыву на каждое.
+    """
+    from notice_board.models import Ad, Comment
+    from users.models import User
+
+    author = User.objects.create_user(email='benchmark-serializers@example.com', password='benchmark',
+                                      first_name='Автор', last_name='Бенчмарка')
+    for start in range(0, rows, batch_size):
+        size = min(batch_size, rows - start)
+        ads = Ad.objects.bulk_create(
+            Ad(title=f'Объявление {start + i}', price=start + i, description='Описание ' * 10, author=author)
+            for i in range(size)
+        )
+        Comment.objects.bulk_create(Comment(text=f'Отзыв {ad.pk}', author=author, ad=ad) for ad in ads)
+
+
+def run(rows, repeat):
+    from django.db import transaction
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from notice_board.fast_serializers import FastSerializer
+    from notice_board.mixins import build_query_plan
+    from notice_board.models import Ad, Comment
+    from notice_board.renderers import FastJSONRenderer, orjson
+    from notice_board.serializers import AdDetailSerializer, AdSerializer, CommentSerializer
+
+    context = {'request': Request(APIRequestFactory().get('/api/ads/'))}
+    cases = [
+        (AdSerializer, Ad),
+        (AdDetailSerializer, Ad),
+        (CommentSerializer, Comment),
+    ]
+
+    with transaction.atomic():
+        populate(rows)
+        print(f'rows={rows} repeat={repeat} orjson={"yes" if orjson else "no"}')
+        print(f'{"serializer":>20} {"drf, ms":>10} {"fast, ms":>10} {"speedup":>8} {"equal":>6}')
+
+        for serializer_class, model in cases:
+            queryset = model.objects.order_by('-pk')[:rows]
+            plan = build_query_plan(serializer_class, model)
+
+            def drf():
+                data = serializer_class(plan.apply(queryset), many=True, context=context).data
+                return JSONRenderer().render(data)
+
+            def fast():
+                serializer = FastSerializer(serializer_class, context)
+                return FastJSONRenderer().render(serializer.serialize(serializer.values(queryset)))
+
+            equal = drf() == fast()
+            drf_ms = measure(drf, repeat)
+            fast_ms = measure(fast, repeat)
+            print(f'{serializer_class.__name__:>20} {drf_ms:>10.1f} {fast_ms:>10.1f} '
+                  f'{drf_ms / fast_ms:>7.1f}x {str(equal):>6}')
+
+        transaction.set_rollback(True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Под ASGI-сервером (uvicorn, gunicorn с UvicornWorker) включаются асинхронные представления.
+os.environ.setdefault('SERVER_MODE', 'asgi')
 
 application = get_asgi_application()
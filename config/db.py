@@ -0,0 +1,168 @@
+"""
+Настройки соединений с PostgreSQL и метрики их использования.
+
+Соединения могут быть постоянными: процесс держит соединение
+DB_CONN_MAX_AGE секунд и перед повторным использованием проверяет,
+что оно живо. При DB_POOL=true и наличии Django 5.1+ с psycopg 3
+вместо этого используется пул соединений psycopg_pool.
+
+Под ASGI синхронный код каждого запроса выполняется в отдельном потоке,
+и постоянные соединения между запросами не переиспользуются, поэтому
+в режиме SERVER_MODE=asgi по умолчанию CONN_MAX_AGE=0, а для
+переиспользования соединений следует включать пул. В режиме wsgi
+соединения по умолчанию постоянные.
+
+Реплики для чтения задаются в DB_REPLICAS и получают те же настройки
+соединений, что и основная база; маршрутизация запросов - в config/replicas.py.
+"""
+import importlib.util
+import logging
+import os
+
+import django
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+def pool_supported():
+    """
+    Проверяет, поддерживает ли окружение OPTIONS['pool'].
+
+    Пул соединений появился в Django 5.1 и работает только с psycopg 3
+    и пакетом psycopg_pool.
+    """
+    return (
+        django.VERSION >= (5, 1)
+        and importlib.util.find_spec('psycopg') is not None
+        and importlib.util.find_spec('psycopg_pool') is not None
+    )
+
+
+def build_database_settings():
+    """
+    Собирает настройки базы данных default из переменных окружения.
+
+    Переменные:
+        DB_CONN_MAX_AGE: Время жизни постоянного соединения в секундах,
+            0 - новое соединение на каждый запрос, по умолчанию 60
+            (0 в режиме asgi).
+        DB_CONN_HEALTH_CHECKS: Проверять соединение перед повторным
+            использованием, по умолчанию true.
+        DB_CONNECT_TIMEOUT: Таймаут установки соединения в секундах.
+        DB_POOL: Использовать пул psycopg 3, по умолчанию false. Если пул
+            недоступен, в лог пишется предупреждение и используются обычные соединения.
+        DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE: Размер пула на процесс.
+        DB_POOL_TIMEOUT: Сколько секунд ждать свободное соединение.
+        DB_POOL_MAX_IDLE: Через сколько секунд закрывать простаивающие соединения.
+
+    Возврат:
+        dict: Значение DATABASES['default'].
+    """
+    default_max_age = 0 if os.getenv('SERVER_MODE', 'wsgi') == 'asgi' else 60
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB'),
+        'USER': os.getenv('POSTGRES_USER'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
+        'HOST': os.getenv('POSTGRES_HOST'),
+        'PORT': os.getenv('POSTGRES_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default_max_age)),
+        'CONN_HEALTH_CHECKS': _env_bool('DB_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+
+    use_pool = _env_bool('DB_POOL', False)
+    if use_pool and not pool_supported():
+        logger.warning('DB_POOL включён, но пул недоступен: нужны Django 5.1+, psycopg 3 и psycopg_pool. '
+                       'Используются постоянные соединения (CONN_MAX_AGE=%s).', database['CONN_MAX_AGE'])
+    elif use_pool:
+        database['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+        }
+        # Django не позволяет совмещать пул с постоянными соединениями.
+        database['CONN_MAX_AGE'] = 0
+    return database
+
+
+def build_replica_settings(default):
+    """
+    Собирает настройки реплик для чтения из переменной DB_REPLICAS.
+
+    Переменные:
+        DB_REPLICAS: Адреса реплик через запятую в виде host или host:port.
+            Имя базы, пользователь и настройки соединений берутся из default.
+
+    Параметры:
+        default (dict): Настройки основной базы.
+
+    Возврат:
+        dict: Настройки реплик с псевдонимами replica1, replica2, ...
+    """
+    replicas = {}
+    hosts = [host.strip() for host in os.getenv('DB_REPLICAS', '').split(',') if host.strip()]
+    for number, address in enumerate(hosts, start=1):
+        host, _, port = address.partition(':')
+        replicas[f'replica{number}'] = {
+            **default,
+            'HOST': host,
+            'PORT': port or default['PORT'],
+            'OPTIONS': dict(default['OPTIONS']),
+            # В тестах реплика - та же база, что и основная.
+            'TEST': {'MIRROR': 'default'},
+        }
+    return replicas
+
+
+def get_connection_stats(alias='default'):
+    """
+    Возвращает метрики соединений с базой данных.
+
+    Для пула - статистика psycopg_pool текущего процесса (размер пула,
+    свободные соединения, ожидающие клиенты). Для PostgreSQL дополнительно -
+    число соединений сервера по состояниям и max_connections, по которым
+    видно насыщение с учётом всех процессов.
+
+    Параметры:
+        alias (str): Псевдоним базы данных.
+
+    Возврат:
+        dict: Метрики соединений.
+    """
+    from django.db import connections
+
+    connection = connections[alias]
+    stats = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'pool': None,
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['pool'] = pool.get_stats()
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT state, count(*) FROM pg_stat_activity '
+                'WHERE datname = current_database() GROUP BY state'
+            )
+            stats['server_connections'] = {state or 'unknown': count for state, count in cursor.fetchall()}
+            cursor.execute('SHOW max_connections')
+            stats['max_connections'] = int(cursor.fetchone()[0])
+    return stats
@@ -0,0 +1,35 @@
+"""
+Конфигурация gunicorn для продакшн-запуска:
+
+    gunicorn -c config/gunicorn.py
+
+В режиме SERVER_MODE=asgi (по умолчанию) gunicorn управляет процессами
+uvicorn, и асинхронные представления обслуживают медленных клиентов
+и ожидание базы без занятия потоков. В режиме wsgi используются
+потоковые воркеры gthread.
+"""
+import multiprocessing
+import os
+
+# Воркеры наследуют окружение мастера: настройки Django (ASYNC_READ_VIEWS,
+# CONN_MAX_AGE) видят тот же режим.
+SERVER_MODE = os.environ.setdefault('SERVER_MODE', 'asgi')
+
+bind = os.getenv('SERVER_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('SERVER_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('SERVER_THREADS', 4))
+
+timeout = int(os.getenv('SERVER_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('SERVER_KEEPALIVE', 5))
+# Периодический перезапуск воркеров ограничивает рост памяти.
+max_requests = int(os.getenv('SERVER_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 1000))
+accesslog = '-'
@@ -0,0 +1,276 @@
+"""
+Замеры производительности запросов.
+
+PerformanceMiddleware для каждого запроса измеряет общее время, число
+запросов к базе и их суммарное время, время сериализации ответа
+(рендеринга в байты) и размер ответа. Замеры:
+
+- добавляются в заголовок Server-Timing ответа;
+- накапливаются по имени представления в памяти процесса и отдаются
+  в формате Prometheus эндпоинтом /api/metrics/;
+- для запросов дольше SLOW_REQUEST_MS пишутся в лог вместе с самыми
+  медленными SQL-запросами.
+
+Запросы к базе считаются обёрткой execute_wrappers, которая ставится на
+каждое соединение при его создании. Текущий запрос хранится в contextvar,
+поэтому учитываются и запросы из потоков sync_to_async асинхронных
+представлений, и запросы к репликам.
+"""
+import heapq
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограммы времени ответа в секундах.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Замеры одного запроса.
+    """
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        # Куча (время, SQL) самых медленных запросов.
+        self.statements = []
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        item = (duration, sql)
+        if len(self.statements) < settings.SLOW_REQUEST_STATEMENTS:
+            heapq.heappush(self.statements, item)
+        elif self.statements and duration > self.statements[0][0]:
+            heapq.heapreplace(self.statements, item)
+
+    def slowest(self):
+        return sorted(self.statements, reverse=True)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, perf_counter() - start)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextmanager
+def measure_serialization():
+    """
+    Добавляет время блока ко времени сериализации текущего запроса.
+    """
+    metrics = _current.get()
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.serialize_time += perf_counter() - start
+
+
+class ViewStats:
+    __slots__ = ('requests', 'buckets', 'duration', 'queries', 'db_time', 'serialize_time', 'response_bytes')
+
+    def __init__(self):
+        self.requests = {}
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+
+
+def _labels(**labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class MetricsRegistry:
+    """
+    Накопленные замеры запросов по представлениям и методам.
+
+    Значения хранятся в памяти процесса: при нескольких воркерах каждый
+    отдаёт свои счётчики, Prometheus различает их по адресу цели или
+    метке instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, method, status, duration, metrics, response_bytes):
+        with self._lock:
+            stats = self._views.get((view, method))
+            if stats is None:
+                stats = self._views[(view, method)] = ViewStats()
+            stats.requests[status] = stats.requests.get(status, 0) + 1
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.duration += duration
+            stats.queries += metrics.queries
+            stats.db_time += metrics.db_time
+            stats.serialize_time += metrics.serialize_time
+            stats.response_bytes += response_bytes
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """
+        Возвращает замеры в текстовом формате Prometheus.
+        """
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                '# HELP http_requests_total Число обработанных запросов.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (view, method), stats in views:
+                for status, count in sorted(stats.requests.items()):
+                    lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Время обработки запроса.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (view, method), stats in views:
+                total = sum(stats.requests.values())
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    labels = _labels(view=view, method=method, le=bound)
+                    lines.append(f'http_request_duration_seconds_bucket{labels} {count}')
+                labels = _labels(view=view, method=method, le='+Inf')
+                lines.append(f'http_request_duration_seconds_bucket{labels} {total}')
+                labels = _labels(view=view, method=method)
+                lines.append(f'http_request_duration_seconds_sum{labels} {stats.duration}')
+                lines.append(f'http_request_duration_seconds_count{labels} {total}')
+
+            counters = (
+                ('http_request_db_queries_total', 'Число запросов к базе данных.', 'queries'),
+                ('http_request_db_seconds_total', 'Время запросов к базе данных.', 'db_time'),
+                ('http_request_serialize_seconds_total', 'Время сериализации ответов.', 'serialize_time'),
+                ('http_response_bytes_total', 'Размер ответов в байтах.', 'response_bytes'),
+            )
+            for name, help_text, attr in counters:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (view, method), stats in views:
+                    lines.append(f'{name}{_labels(view=view, method=method)} {getattr(stats, attr)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет запросы, добавляет Server-Timing и пишет медленные запросы в лог.
+
+    Должен стоять первым в MIDDLEWARE, чтобы учитывать время остальных
+    middleware. Время сериализации - построение данных ответа сериализаторами
+    (блоки measure_serialization в представлениях) и рендеринг ответов DRF и шаблонов.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Соединения, открытые до подключения сигнала.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def start(self):
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics), perf_counter()
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is not None and not response.is_rendered:
+            start = perf_counter()
+
+            def rendered(response):
+                metrics.serialize_time += perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics, start):
+        duration = perf_counter() - start
+        response_bytes = 0 if response.streaming else len(response.content)
+        view = get_view_name(request)
+
+        if settings.PERFORMANCE_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.1f}, '
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+                f'serialize;dur={metrics.serialize_time * 1000:.1f}'
+            )
+        registry.observe(view, request.method, response.status_code, duration, metrics, response_bytes)
+
+        if duration * 1000 >= settings.SLOW_REQUEST_MS:
+            statements = ''.join(
+                f'\n  {statement_time * 1000:.1f} мс: {sql[:1000]}' for statement_time, sql in metrics.slowest()
+            )
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.1f мс, запросов к базе %d за %.1f мс, сериализация %.1f мс%s',
+                request.method, request.path, view, duration * 1000, metrics.queries,
+                metrics.db_time * 1000, metrics.serialize_time * 1000, statements,
+            )
+        return response
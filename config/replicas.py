@@ -0,0 +1,217 @@
+"""
+Чтение из реплик PostgreSQL.
+
+Запись всегда идёт в основную базу. Чтения моделей REPLICA_MODELS
+направляются в реплики только внутри безопасных запросов представлений
+с ReplicaReadMixin (ленты, карточки, отзывы) - остальной код, в том числе
+проверки перед записью, читает из основной базы.
+
+Чтобы пользователь видел свои изменения, после успешного изменяющего
+запроса он на REPLICA_PIN_SECONDS секунд закрепляется за основной базой
+(ReplicaPinningMiddleware). Реплика, отстающая больше чем на
+REPLICA_MAX_LAG секунд или недоступная, выводится из ротации до
+следующей проверки; если здоровых реплик нет, чтения идут в основную базу.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PIN_KEY = 'replicas:pin:{pk}'
+
+# Отставание реплики в секундах; на основной базе pg_is_in_recovery() ложно.
+LAG_SQL = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 '
+    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# Результаты проверок реплик в процессе: псевдоним -> (время проверки, исправна, отставание).
+_health = {}
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Разрешает или запрещает чтение из реплик внутри блока.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary_reads():
+    """
+    Направляет чтения блока в основную базу.
+    """
+    return replica_reads(False)
+
+
+def replica_reads_enabled():
+    return _replica_reads.get() and bool(settings.DATABASE_REPLICAS)
+
+
+def get_replica_lag(alias):
+    """
+    Возвращает отставание реплики в секундах или None, если она недоступна.
+    """
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0] or 0)
+    except DatabaseError:
+        return None
+
+
+def is_healthy(alias):
+    """
+    Проверяет, можно ли читать из реплики.
+
+    Отставание проверяется не чаще раза в REPLICA_CHECK_INTERVAL секунд,
+    между проверками используется последний результат.
+    """
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked is None or now - checked[0] >= settings.REPLICA_CHECK_INTERVAL:
+        lag = get_replica_lag(alias)
+        healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG
+        if checked is not None and checked[1] != healthy:
+            logger.warning('Реплика %s %s, отставание %s', alias,
+                           'возвращена в ротацию' if healthy else 'выведена из ротации', lag)
+        checked = _health[alias] = (now, healthy, lag)
+    return checked[1]
+
+
+def get_replica():
+    """
+    Возвращает псевдоним случайной исправной реплики или None.
+    """
+    healthy = [alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def get_replica_stats():
+    """
+    Возвращает состояние реплик: исправность и отставание по последней проверке.
+    """
+    stats = {}
+    for alias in settings.DATABASE_REPLICAS:
+        is_healthy(alias)
+        _, healthy, lag = _health[alias]
+        stats[alias] = {'healthy': healthy, 'lag': lag}
+    return stats
+
+
+def pin_user(user):
+    """
+    Закрепляет пользователя за основной базой на REPLICA_PIN_SECONDS секунд.
+    """
+    if user is not None and user.is_authenticated:
+        cache.set(PIN_KEY.format(pk=user.pk), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and bool(cache.get(PIN_KEY.format(pk=user.pk)))
+
+
+def replica_reads_allowed(request):
+    """
+    Проверяет, можно ли читать данные запроса из реплик: запрос безопасный,
+    а пользователь не менял данные последние REPLICA_PIN_SECONDS секунд.
+    """
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and request.method in SAFE_METHODS
+        and not is_pinned(getattr(request, 'user', None))
+    )
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор: запись в основную базу, чтение моделей REPLICA_MODELS
+    в разрешённых блоках - из исправной реплики.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or model._meta.label not in settings.REPLICA_MODELS:
+            return None
+        return get_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе объект, прочитанный из реплики, сохранялся бы в неё.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Миксин представления DRF, читающий данные безопасных запросов из реплик.
+
+    Решение принимается после аутентификации: пользователь, недавно
+    изменявший данные, читает из основной базы.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with primary_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if replica_reads_allowed(request):
+            # Значение сбрасывается при выходе из блока в dispatch.
+            _replica_reads.set(True)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Закрепляет за основной базой пользователя, успешно выполнившего
+    изменяющий запрос. Пользователь берётся из request.user, который
+    DRF заполняет после аутентификации по токену.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            pin_user(getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            # Ленивый пользователь сессии может обратиться к базе.
+            await sync_to_async(pin_user)(getattr(request, 'user', None))
+        return response
+
+    @staticmethod
+    def is_write(request, response):
+        return bool(settings.DATABASE_REPLICAS) and request.method not in SAFE_METHODS and response.status_code < 400
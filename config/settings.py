@@ -15,6 +15,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from config.db import build_database_settings, build_replica_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -53,9 +56,11 @@ INSTALLED_APPS = [
 
     'notice_board',
     'users',
+    'tasks',
 ]
 
 MIDDLEWARE = [
+    'config.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +69,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'config.replicas.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -71,7 +77,8 @@ ROOT_URLCONF = 'config.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        # Общие шаблоны проекта, например курсорный список объектов админки.
+        'DIRS': [BASE_DIR / 'config' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -86,20 +93,115 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Режим сервера: asgi - воркеры uvicorn, wsgi - потоковые воркеры gunicorn
+# или runserver. По умолчанию wsgi: config/gunicorn.py и config/asgi.py
+# сами выставляют asgi, если переменная не задана.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+# Асинхронные представления ленты, карточки объявления и списка отзывов.
+# По умолчанию включены только в режиме asgi: под WSGI каждое асинхронное
+# представление выполнялось бы через async_to_sync и было бы медленнее синхронного.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', str(SERVER_MODE == 'asgi')).lower() in ('1', 'true', 'yes', 'on')
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Постоянные соединения или пул psycopg 3, см. config/db.py.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': os.getenv('POSTGRES_DB'),
-        'USER': os.getenv('POSTGRES_USER'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
-        'HOST': os.getenv('POSTGRES_HOST'),
-        'PORT': os.getenv('POSTGRES_PORT')
-    }
+    'default': build_database_settings(),
 }
+DATABASES.update(build_replica_settings(DATABASES['default']))
+
+# Чтения лент, карточек и отзывов направляются в реплики, запись - в основную
+# базу, см. config/replicas.py.
+DATABASE_ROUTERS = ['config.replicas.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Модели, чтения которых можно направлять в реплики.
+REPLICA_MODELS = ('notice_board.Ad', 'notice_board.Comment', 'users.User')
+# Сколько секунд после записи пользователь и изменённые области кеша читают
+# из основной базы, пока реплики догоняют её.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+# Реплика с отставанием больше REPLICA_MAX_LAG секунд выводится из ротации,
+# отставание проверяется не чаще раза в REPLICA_CHECK_INTERVAL секунд.
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Время жизни закешированных ответов API, в секундах. Актуальность ответов
+# обеспечивают счётчики поколений, срок жизни лишь ограничивает объём кеша.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Быстрая сериализация эндпоинтов чтения через values() вместо ModelSerializer.
+FAST_SERIALIZERS = os.getenv('FAST_SERIALIZERS', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+# Замеры запросов (config/performance.py): заголовок Server-Timing, метрики
+# Prometheus на /api/metrics/ и лог запросов дольше SLOW_REQUEST_MS вместе
+# с SLOW_REQUEST_STATEMENTS самыми медленными SQL-запросами. Метрики доступны
+# администраторам и по заголовку Authorization: Bearer <METRICS_TOKEN>.
+PERFORMANCE_SERVER_TIMING = os.getenv('PERFORMANCE_SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes', 'on')
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 1000))
+SLOW_REQUEST_STATEMENTS = int(os.getenv('SLOW_REQUEST_STATEMENTS', 3))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Начиная с этой оценки числа записей список объектов в админке не считает
+# записи точно, см. config/admin.py.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+
+
+# Фоновые задачи
+# С Redis задачи выполняют процессы manage.py run_tasks, без него -
+# потоки веб-процесса.
+
+TASK_BACKEND = os.getenv(
+    'TASK_BACKEND',
+    'tasks.backends.RedisBackend' if REDIS_URL else 'tasks.backends.ThreadBackend',
+)
+TASK_BROKER_URL = os.getenv('TASK_BROKER_URL', REDIS_URL)
+TASK_QUEUE_NAME = os.getenv('TASK_QUEUE_NAME', 'tasks')
+# Число потоков ThreadBackend.
+TASK_THREAD_WORKERS = int(os.getenv('TASK_THREAD_WORKERS', 2))
+# Повторы после ошибки: задержка растёт вдвое от TASK_RETRY_BACKOFF секунд
+# до TASK_RETRY_BACKOFF_MAX, после TASK_MAX_RETRIES повторов задача
+# сохраняется в DeadLetterTask.
+TASK_MAX_RETRIES = int(os.getenv('TASK_MAX_RETRIES', 3))
+TASK_RETRY_BACKOFF = float(os.getenv('TASK_RETRY_BACKOFF', 2))
+TASK_RETRY_BACKOFF_MAX = float(os.getenv('TASK_RETRY_BACKOFF_MAX', 300))
+
+
+# События в реальном времени (Server-Sent Events)
+# LocalBroker рассылает события только внутри процесса, при нескольких
+# воркерах или серверах нужен RedisBroker.
+
+EVENTS_BROKER = os.getenv(
+    'EVENTS_BROKER',
+    'notice_board.events.RedisBroker' if REDIS_URL else 'notice_board.events.LocalBroker',
+)
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', REDIS_URL)
+EVENTS_CHANNEL_PREFIX = os.getenv('EVENTS_CHANNEL_PREFIX', 'events')
+# Интервал пингов открытого потока, в секундах.
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))
+# Сколько событий хранится для медленного клиента, дальше события теряются.
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
 
 
 # Password validation
@@ -170,6 +272,18 @@ DJOSER = {
         'user': 'djoser.serializers.UserSerializer',
     },
     'LOGIN_FIELD': 'email',
+    # Аутентификация по JWT: моделей токенов djoser (authtoken) нет,
+    # иначе удаление пользователя падает при попытке удалить его токены.
+    'TOKEN_MODEL': None,
+    # Письма отправляются через очередь задач, а не в потоке запроса.
+    'EMAIL': {
+        'activation': 'users.email.ActivationEmail',
+        'confirmation': 'users.email.ConfirmationEmail',
+        'password_reset': 'users.email.PasswordResetEmail',
+        'password_changed_confirmation': 'users.email.PasswordChangedConfirmationEmail',
+        'username_changed_confirmation': 'users.email.UsernameChangedConfirmationEmail',
+        'username_reset': 'users.email.UsernameResetEmail',
+    },
     'PERMISSIONS': {
         'activation': ['rest_framework.permissions.AllowAny'],
         'password_reset': ['rest_framework.permissions.AllowAny'],
@@ -189,11 +303,31 @@ DJOSER = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # Ограничивает только представления с throttle_scope, см. THROTTLE_RATES.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'config.throttling.SlidingWindowThrottle',
+    ],
+    # Число доверенных прокси перед приложением. При 0 IP клиента для
+    # ограничения частоты берётся из REMOTE_ADDR, и X-Forwarded-For не подделать.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+}
+
+# Ограничение частоты запросов по областям: лимиты через запятую, первый
+# обычно ограничивает всплески, второй - устойчивую нагрузку. Пустое
+# значение отключает ограничение области. Счётчики хранятся в кеше THROTTLE_CACHE.
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', 'default')
+THROTTLE_RATES = {
+    'login': os.getenv('THROTTLE_LOGIN', '5/m,30/h'),
+    'registration': os.getenv('THROTTLE_REGISTRATION', '3/m,20/d'),
+    'password_reset': os.getenv('THROTTLE_PASSWORD_RESET', '3/m,10/h'),
+    'ad_create': os.getenv('THROTTLE_AD_CREATE', '10/m,200/d'),
+    'comment_create': os.getenv('THROTTLE_COMMENT_CREATE', '10/m,500/d'),
+    'ads_list': os.getenv('THROTTLE_ADS_LIST', '20/s,600/m'),
 }
 
 SIMPLE_JWT = {
@@ -201,9 +335,71 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Сколько секунд пользователь хранится в кеше JWT-аутентификации.
+# Изменение пользователя удаляет его из кеша сразу.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Поисковый бэкенд объявлений (dotted path). None - выбор по СУБД:
+# полнотекстовый поиск для PostgreSQL, icontains для остальных.
+AD_SEARCH_BACKEND = os.getenv('AD_SEARCH_BACKEND')
+
+# Мягкое удаление: сколько секунд удалённые объявления, отзывы и пользователи
+# хранятся до окончательного удаления и сколько записей удаляется за одну порцию.
+SOFT_DELETE_RETENTION = int(os.getenv('SOFT_DELETE_RETENTION', 0))
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))
+
+# Границы ценовых диапазонов /api/ads/facets/: [0, 1000), [1000, 5000), ..., [500000, ∞).
+AD_PRICE_BUCKETS = [0, 1000, 5000, 10000, 50000, 100000, 500000]
+
+# Максимальное число операций в одном запросе /api/ads/bulk/.
+AD_BULK_MAX_ITEMS = int(os.getenv('AD_BULK_MAX_ITEMS', 1000))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Хранилище загруженных файлов: filesystem (MEDIA_ROOT) или s3
+# (S3-совместимое объектное хранилище, нужен пакет boto3), см. config/storage.py.
+MEDIA_STORAGE = os.getenv('MEDIA_STORAGE', 'filesystem')
+STORAGES = {
+    'default': {
+        'BACKEND': {
+            'filesystem': 'config.storage.FileSystemStorage',
+            's3': 'config.storage.S3Storage',
+        }[MEDIA_STORAGE],
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+S3_BUCKET = os.getenv('S3_BUCKET', '')
+# Адрес S3-совместимого хранилища, например http://minio:9000. Пусто - AWS S3.
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL', '')
+S3_REGION = os.getenv('S3_REGION', '')
+S3_ACCESS_KEY_ID = os.getenv('S3_ACCESS_KEY_ID', '')
+S3_SECRET_ACCESS_KEY = os.getenv('S3_SECRET_ACCESS_KEY', '')
+# Публичный адрес бакета или CDN для ссылок на файлы. Пусто - подписанные ссылки.
+S3_PUBLIC_URL = os.getenv('S3_PUBLIC_URL', '')
+# Срок действия подписанных ссылок на файлы, секунды.
+S3_URL_EXPIRES = int(os.getenv('S3_URL_EXPIRES', 24 * 60 * 60))
+
+# Прямая загрузка изображений объявлений в хранилище: срок действия ссылки
+# и токена подтверждения (секунды), наибольший размер файла (байты) и допустимые типы.
+DIRECT_UPLOAD_EXPIRES = int(os.getenv('DIRECT_UPLOAD_EXPIRES', 15 * 60))
+DIRECT_UPLOAD_MAX_SIZE = int(os.getenv('DIRECT_UPLOAD_MAX_SIZE', 10 * 1024 * 1024))
+DIRECT_UPLOAD_CONTENT_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+
+# Варианты изображений объявлений и аватаров: имя -> наибольшая сторона в пикселях.
+IMAGE_VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1600,
+}
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', 80))
+
 CORS_ALLOWED_ORIGINS = [
     "https://read-only.example.com",
     "https://read-and-write.example.com",
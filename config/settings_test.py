@@ -0,0 +1,37 @@
+"""
+Django settings for running the test suite.
+
+Tests run against PostgreSQL when POSTGRES_DB is set, otherwise they fall
+back to SQLite so the suite works without a database server. The cache
+is always local-memory so tests never share state through Redis, and
+background tasks run eagerly in the calling thread. Real-time events
+use the in-process broker. A separate SQLite database stands in for a
+read replica; routing to it is off unless a test enables DATABASE_REPLICAS.
+"""
+import os
+
+from config.settings import *  # noqa: F401,F403
+
+if not os.getenv('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',  # noqa: F405
+        }
+    }
+
+DATABASES['replica'] = {  # noqa: F405
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db_replica.sqlite3',  # noqa: F405
+}
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+TASK_BACKEND = 'tasks.backends.EagerBackend'
+
+EVENTS_BROKER = 'notice_board.events.LocalBroker'
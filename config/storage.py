@@ -0,0 +1,203 @@
+"""
+Хранилища загруженных файлов и прямая загрузка в них.
+
+MEDIA_STORAGE выбирает хранилище по умолчанию (settings.STORAGES):
+filesystem - каталог MEDIA_ROOT, s3 - S3-совместимое объектное хранилище
+(AWS S3, MinIO, Ceph), для него нужен пакет boto3. Кроме обычного API
+Storage оба хранилища выдают ссылку для прямой загрузки (presign_upload)
+и метаданные загруженного объекта (get_metadata): клиент отправляет файл
+по ссылке сам, минуя процессы приложения, а затем подтверждает загрузку.
+
+Для S3 ссылка - подписанный POST с ограничениями на размер и тип
+содержимого. У файлового хранилища загрузку принимает DirectUploadAPIView
+по подписанному токену - это замена объектного хранилища для разработки
+и тестов, тело файла в этом случае проходит через приложение.
+"""
+import mimetypes
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage as BaseFileSystemStorage
+from django.core.files.storage import Storage
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+try:
+    import boto3
+    from botocore.config import Config
+except ImportError:
+    boto3 = None
+
+UPLOAD_SALT = 'config.storage.upload'
+
+
+def load_upload(token):
+    """
+    Проверяет токен прямой загрузки в файловое хранилище.
+
+    Параметры:
+        token (str): Токен из ссылки FileSystemStorage.presign_upload.
+
+    Возврат:
+        dict: Имя файла (name), тип содержимого (content_type) и наибольший
+            размер (max_size).
+
+    Исключения:
+        signing.BadSignature: Токен подделан или срок его действия истёк.
+    """
+    upload = signing.loads(token, salt=UPLOAD_SALT)
+    if upload['expires_at'] < time.time():
+        raise signing.SignatureExpired('Срок действия ссылки истёк.')
+    return upload
+
+
+@deconstructible(path='config.storage.FileSystemStorage')
+class FileSystemStorage(BaseFileSystemStorage):
+    """
+    Хранилище в MEDIA_ROOT с прямой загрузкой через DirectUploadAPIView.
+    """
+
+    def presign_upload(self, name, content_type, max_size, expires):
+        """
+        Возвращает описание запроса, которым клиент загружает файл.
+
+        Параметры:
+            name (str): Имя файла в хранилище.
+            content_type (str): Тип содержимого, который должен прислать клиент.
+            max_size (int): Наибольший размер файла в байтах.
+            expires (int): Срок действия ссылки в секундах.
+
+        Возврат:
+            dict: method, url, fields (поля формы) и headers (заголовки запроса).
+        """
+        token = signing.dumps({
+            'name': name,
+            'content_type': content_type,
+            'max_size': max_size,
+            'expires_at': int(time.time()) + expires,
+        }, salt=UPLOAD_SALT)
+        return {
+            'method': 'PUT',
+            'url': reverse('media-upload', args=[token]),
+            'fields': {},
+            'headers': {'Content-Type': content_type},
+        }
+
+    def get_metadata(self, name):
+        """
+        Возвращает размер и тип содержимого файла или None, если файла нет.
+        """
+        if not self.exists(name):
+            return None
+        return {'size': self.size(name), 'content_type': mimetypes.guess_type(name)[0]}
+
+
+@deconstructible(path='config.storage.S3Storage')
+class S3Storage(Storage):
+    """
+    Хранилище в S3-совместимом бакете.
+
+    Параметры берутся из настроек S3_*. Если задан S3_PUBLIC_URL (публичный
+    бакет или CDN), ссылки на файлы строятся от него, иначе выдаются
+    подписанные ссылки на S3_URL_EXPIRES секунд. Ссылки попадают
+    в закешированные ответы API, поэтому срок подписи должен быть
+    заметно больше времени жизни кеша.
+
+    Параметры:
+        client: Готовый клиент S3 вместо создаваемого через boto3.
+    """
+
+    def __init__(self, bucket=None, endpoint_url=None, region=None, access_key=None, secret_key=None,
+                 public_url=None, url_expires=None, client=None):
+        self.bucket = bucket or settings.S3_BUCKET
+        self.endpoint_url = endpoint_url or settings.S3_ENDPOINT_URL
+        self.region = region or settings.S3_REGION
+        self.access_key = access_key or settings.S3_ACCESS_KEY_ID
+        self.secret_key = secret_key or settings.S3_SECRET_ACCESS_KEY
+        self.public_url = public_url if public_url is not None else settings.S3_PUBLIC_URL
+        self.url_expires = url_expires or settings.S3_URL_EXPIRES
+        if client is not None:
+            self.__dict__['client'] = client
+
+    @cached_property
+    def client(self):
+        if boto3 is None:
+            raise ImproperlyConfigured('Для MEDIA_STORAGE=s3 установите пакет boto3.')
+        return boto3.client(
+            's3',
+            endpoint_url=self.endpoint_url or None,
+            region_name=self.region or None,
+            aws_access_key_id=self.access_key or None,
+            aws_secret_access_key=self.secret_key or None,
+            # MinIO и другие совместимые хранилища адресуют бакет в пути.
+            config=Config(signature_version='s3v4',
+                          s3={'addressing_style': 'path' if self.endpoint_url else 'auto'}),
+        )
+
+    def _head(self, name):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=name)
+        except self.client.exceptions.ClientError as error:
+            if error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def _open(self, name, mode='rb'):
+        body = self.client.get_object(Bucket=self.bucket, Key=name)['Body']
+        return ContentFile(body.read(), name=name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        content_type = (getattr(content, 'content_type', None) or mimetypes.guess_type(name)[0]
+                        or 'application/octet-stream')
+        self.client.upload_fileobj(content, self.bucket, name, ExtraArgs={'ContentType': content_type})
+        return name
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def exists(self, name):
+        return self._head(name) is not None
+
+    def size(self, name):
+        head = self._head(name)
+        if head is None:
+            raise FileNotFoundError(name)
+        return head['ContentLength']
+
+    def url(self, name):
+        if self.public_url:
+            return f'{self.public_url.rstrip("/")}/{quote(name)}'
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': name}, ExpiresIn=self.url_expires,
+        )
+
+    def presign_upload(self, name, content_type, max_size, expires):
+        """
+        Возвращает подписанный POST для загрузки файла прямо в бакет.
+
+        Условия подписи не дают загрузить файл другого типа или больше
+        max_size байт. Параметры и возврат - как у FileSystemStorage.presign_upload.
+        """
+        post = self.client.generate_presigned_post(
+            self.bucket, name,
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_size]],
+            ExpiresIn=expires,
+        )
+        return {'method': 'POST', 'url': post['url'], 'fields': post['fields'], 'headers': {}}
+
+    def get_metadata(self, name):
+        """
+        Возвращает размер и тип содержимого объекта или None, если объекта нет.
+        """
+        head = self._head(name)
+        if head is None:
+            return None
+        return {'size': head['ContentLength'], 'content_type': head.get('ContentType')}
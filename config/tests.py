@@ -0,0 +1,237 @@
+import time
+from io import BytesIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from rest_framework.test import APIClient
+
+from config import db, performance, throttling
+from config.storage import S3Storage
+from notice_board.fast_serializers import FastSerializer
+from notice_board.models import Ad
+from notice_board.serializers import AdSerializer
+
+
+def test_database_settings_persistent_connections(monkeypatch):
+    monkeypatch.setenv('DB_CONN_MAX_AGE', '120')
+    monkeypatch.setenv('DB_CONN_HEALTH_CHECKS', 'false')
+    monkeypatch.setenv('DB_POOL', 'true')
+    monkeypatch.setattr(db, 'pool_supported', lambda: False)
+
+    database = db.build_database_settings()
+    assert database['CONN_MAX_AGE'] == 120
+    assert database['CONN_HEALTH_CHECKS'] is False
+    assert 'pool' not in database['OPTIONS']
+
+
+def test_database_settings_pool_unsupported(monkeypatch, caplog):
+    monkeypatch.setenv('DB_POOL', 'true')
+    monkeypatch.setattr(db, 'pool_supported', lambda: False)
+
+    with caplog.at_level('WARNING', logger='config.db'):
+        database = db.build_database_settings()
+    assert 'pool' not in database['OPTIONS']
+    assert 'DB_POOL' in caplog.text
+
+
+def test_database_settings_pool(monkeypatch):
+    monkeypatch.setenv('DB_POOL', 'true')
+    monkeypatch.setenv('DB_POOL_MAX_SIZE', '20')
+    monkeypatch.setattr(db, 'pool_supported', lambda: True)
+
+    database = db.build_database_settings()
+    assert database['CONN_MAX_AGE'] == 0
+    assert database['OPTIONS']['pool']['max_size'] == 20
+
+
+def test_replica_settings(monkeypatch):
+    monkeypatch.setenv('DB_REPLICAS', 'replica-a, replica-b:5433')
+    default = db.build_database_settings()
+    replicas = db.build_replica_settings({**default, 'PORT': '5432'})
+
+    assert list(replicas) == ['replica1', 'replica2']
+    assert (replicas['replica1']['HOST'], replicas['replica1']['PORT']) == ('replica-a', '5432')
+    assert (replicas['replica2']['HOST'], replicas['replica2']['PORT']) == ('replica-b', '5433')
+    assert replicas['replica1']['TEST'] == {'MIRROR': 'default'}
+
+
+@pytest.mark.django_db
+def test_database_stats_for_admins_only():
+    User = get_user_model()
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(email='user@example.com', password='password'))
+    assert client.get('/api/metrics/db/').status_code == 403
+
+    client.force_authenticate(User.objects.create_superuser(email='admin@example.com', password='password'))
+    response = client.get('/api/metrics/db/')
+    assert response.status_code == 200
+    assert response.data['pool'] is None
+
+
+def test_throttle_rates_and_wait():
+    assert throttling.parse_rates('5/m, 30/hour') == [(5, 60), (30, 3600)]
+    assert throttling.parse_rates('') == []
+
+    get_wait = throttling.SlidingWindowThrottle.get_wait
+    # Предыдущее окно заполнено: через четверть текущего из него учитываются 3 запроса из 4.
+    assert get_wait(4, 60, 10, 0, 4) == pytest.approx(5)
+    assert get_wait(4, 60, 15, 0, 4) is None
+    # Текущее окно заполнено: ждём, пока оно не станет предыдущим и не устареет на четверть.
+    assert get_wait(4, 60, 30, 4, 0) == pytest.approx(45)
+
+
+@pytest.mark.django_db
+def test_login_throttled(settings, monkeypatch):
+    settings.THROTTLE_RATES = {**settings.THROTTLE_RATES, 'login': '2/m'}
+    monkeypatch.setattr(throttling.time, 'time', lambda: 600.0)
+    get_user_model().objects.create_user(email='user@example.com', password='password')
+    client = APIClient()
+    credentials = {'email': 'user@example.com', 'password': 'wrong'}
+
+    assert client.post('/api/token/', credentials).status_code == 401
+    assert client.post('/api/token/', credentials).status_code == 401
+    response = client.post('/api/token/', {**credentials, 'password': 'password'})
+    assert response.status_code == 429
+    # Окно заполнено: ждём следующего, пока вес прошлых попыток не упадёт вдвое.
+    assert response['Retry-After'] == '90'
+
+    # С другого адреса лимит свой.
+    assert client.post('/api/token/', credentials, REMOTE_ADDR='10.0.0.2').status_code == 401
+
+    # Через полтора окна в оценку попадает половина прошлых попыток.
+    monkeypatch.setattr(throttling.time, 'time', lambda: 690.0)
+    assert client.post('/api/token/', {**credentials, 'password': 'password'}).status_code == 200
+    assert client.post('/api/token/', credentials).status_code == 429
+
+
+@pytest.mark.django_db
+def test_comment_create_throttled_per_user(settings):
+    from notice_board.models import Ad
+
+    settings.THROTTLE_RATES = {**settings.THROTTLE_RATES, 'comment_create': '1/m'}
+    User = get_user_model()
+    author = User.objects.create_user(email='author@example.com', password='password')
+    other = User.objects.create_user(email='other@example.com', password='password')
+    ad = Ad.objects.create(title='Объявление', price=100, author=author)
+    client = APIClient()
+    url = f'/api/ads/{ad.pk}/comments/'
+
+    client.force_authenticate(author)
+    assert client.post(url, {'text': 'Первый'}).status_code == 201
+    assert client.post(url, {'text': 'Второй'}).status_code == 429
+    # Чтение отзывов не ограничивается областью создания.
+    assert client.get(url).status_code == 200
+
+    client.force_authenticate(other)
+    assert client.post(url, {'text': 'Третий'}).status_code == 201
+
+
+@pytest.mark.django_db
+def test_performance_middleware(settings, caplog):
+    performance.registry.clear()
+    client = APIClient()
+    response = client.get('/api/ads/')
+    assert response.status_code == 200
+    timing = response['Server-Timing']
+    assert timing.startswith('total;dur=') and 'queries"' in timing and 'serialize;dur=' in timing
+
+    # Медленные запросы пишутся в лог вместе с самыми медленными SQL-запросами.
+    settings.SLOW_REQUEST_MS = 0
+    with caplog.at_level('WARNING', logger='config.performance'):
+        client.get('/api/ads/?page_size=1')
+    assert 'Медленный запрос GET /api/ads/ (ads:ads-list)' in caplog.text
+    assert 'SELECT' in caplog.text
+
+    metrics = performance.registry.render()
+    assert 'http_requests_total{view="ads:ads-list",method="GET",status="200"} 2' in metrics
+    assert 'http_request_duration_seconds_count{view="ads:ads-list",method="GET"} 2' in metrics
+    assert 'http_request_db_queries_total{view="ads:ads-list",method="GET"}' in metrics
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fast', [True, False])
+def test_serialization_time_includes_serializers(settings, monkeypatch, fast):
+    settings.FAST_SERIALIZERS = fast
+    Ad.objects.create(title='Объявление')
+    serializer_class = FastSerializer if fast else AdSerializer
+    method = 'serialize' if fast else 'to_representation'
+    original = getattr(serializer_class, method)
+
+    def slow(self, *args, **kwargs):
+        time.sleep(0.05)
+        return original(self, *args, **kwargs)
+    monkeypatch.setattr(serializer_class, method, slow)
+
+    timing = APIClient().get('/api/ads/')['Server-Timing']
+    serialize = float(timing.split('serialize;dur=')[1])
+    assert serialize >= 50
+
+
+@pytest.mark.django_db
+def test_prometheus_metrics_access(settings):
+    settings.METRICS_TOKEN = 'secret'
+    client = APIClient()
+    assert client.get('/api/metrics/').status_code == 401
+    assert client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code == 401
+
+    response = client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    assert b'# TYPE http_requests_total counter' in response.content
+
+    User = get_user_model()
+    client.force_authenticate(User.objects.create_superuser(email='admin@example.com', password='password'))
+    assert client.get('/api/metrics/').status_code == 200
+
+
+class FakeS3Client:
+    """
+    Объектное хранилище в памяти с тем же API, что у клиента S3 из boto3.
+    """
+
+    class exceptions:
+        class ClientError(Exception):
+            def __init__(self, code):
+                super().__init__(code)
+                self.response = {'Error': {'Code': code}}
+
+    def __init__(self):
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.exceptions.ClientError('404')
+        body, content_type = self.objects[Bucket, Key]
+        return {'ContentLength': len(body), 'ContentType': content_type}
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs):
+        self.objects[bucket, key] = (fileobj.read(), ExtraArgs['ContentType'])
+
+    def get_object(self, Bucket, Key):
+        return {'Body': BytesIO(self.objects[Bucket, Key][0])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def generate_presigned_post(self, bucket, key, Fields, Conditions, ExpiresIn):
+        return {'url': f'http://minio:9000/{bucket}', 'fields': {'key': key, **Fields, 'conditions': Conditions}}
+
+
+def test_s3_storage():
+    storage = S3Storage(bucket='media', public_url='https://cdn.example.com/media/', client=FakeS3Client())
+
+    name = storage.save('ads/photo 1.jpg', ContentFile(b'jpeg', name='photo 1.jpg'))
+    assert name == 'ads/photo 1.jpg'
+    assert storage.save(name, ContentFile(b'jpeg')) != name
+    assert storage.open(name).read() == b'jpeg'
+    assert storage.get_metadata(name) == {'size': 4, 'content_type': 'image/jpeg'}
+    assert storage.url(name) == 'https://cdn.example.com/media/ads/photo%201.jpg'
+
+    storage.delete(name)
+    assert not storage.exists(name)
+    assert storage.get_metadata(name) is None
+
+    upload = storage.presign_upload('ads/new.png', 'image/png', 1000, 600)
+    assert (upload['method'], upload['url']) == ('POST', 'http://minio:9000/media')
+    assert ['content-length-range', 1, 1000] in upload['fields']['conditions']
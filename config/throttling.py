@@ -0,0 +1,138 @@
+"""
+Ограничение частоты запросов со скользящим окном.
+
+Для каждого лимита N запросов за окно W хранятся два счётчика
+фиксированных окон - текущего и предыдущего. Число запросов за последние
+W секунд оценивается как предыдущий счётчик, взвешенный долей окна,
+которая ещё попадает в интервал, плюс текущий. Счётчики лежат в кеше
+THROTTLE_CACHE (Redis в продакшне, память процесса без него), поэтому
+проверка стоит одного get_many и одного incr на лимит.
+
+Области и лимиты задаются в THROTTLE_RATES, например
+{'login': '5/m,30/h'}: первый лимит ограничивает всплески, второй -
+устойчивую нагрузку. Представление выбирает область атрибутом
+throttle_scope, вьюсет - словарём throttle_scopes по действиям
+(ActionThrottleMixin). Авторизованные пользователи ограничиваются
+по идентификатору, анонимные - по IP.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rates(value):
+    """
+    Разбирает лимиты области.
+
+    Параметры:
+        value (str | list): Строка вида '5/m,30/h' или список таких строк.
+
+    Возврат:
+        list: Пары (число запросов, длина окна в секундах).
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    rates = []
+    for rate in value:
+        num, period = rate.strip().split('/')
+        rates.append((int(num), PERIODS[period.strip()[0]]))
+    return rates
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов области throttle_scope представления.
+
+    Представления без области или области без лимитов не ограничиваются.
+    Отклонённые запросы не учитываются, время до следующей попытки
+    возвращается в заголовке Retry-After. Параллельные запросы могут
+    ненадолго превысить лимит на единицы: проверка и увеличение
+    счётчика не атомарны вместе.
+    """
+    cache_format = 'throttle:{scope}:{ident}:{window}:{index}'
+
+    def __init__(self):
+        self.wait_time = None
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def get_rates(self, scope):
+        return parse_rates(settings.THROTTLE_RATES.get(scope))
+
+    def get_cache_ident(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rates = self.get_rates(scope) if scope else []
+        if not rates:
+            return True
+
+        now = time.time()
+        ident = self.get_cache_ident(request)
+        windows = []
+        for limit, window in rates:
+            index, elapsed = divmod(now, window)
+            current = self.cache_format.format(scope=scope, ident=ident, window=window, index=int(index))
+            previous = self.cache_format.format(scope=scope, ident=ident, window=window, index=int(index) - 1)
+            windows.append((limit, window, elapsed, current, previous))
+
+        counters = self.cache.get_many([key for *_, current, previous in windows for key in (current, previous)])
+        waits = []
+        for limit, window, elapsed, current, previous in windows:
+            wait = self.get_wait(limit, window, elapsed, counters.get(current, 0), counters.get(previous, 0))
+            if wait is not None:
+                waits.append(wait)
+        if waits:
+            self.wait_time = max(waits)
+            return False
+
+        for limit, window, elapsed, current, previous in windows:
+            # Счётчик живёт два окна: в следующем он станет предыдущим.
+            self.cache.add(current, 0, timeout=2 * window)
+            try:
+                self.cache.incr(current)
+            except ValueError:
+                self.cache.set(current, 1, timeout=2 * window)
+        return True
+
+    @staticmethod
+    def get_wait(limit, window, elapsed, current, previous):
+        """
+        Возвращает, сколько секунд ждать до разрешённого запроса, или None,
+        если запрос укладывается в лимит.
+        """
+        weight = 1 - elapsed / window
+        if previous * weight + current + 1 <= limit:
+            return None
+        if current + 1 > limit:
+            # Ждём следующего окна, в котором текущий счётчик станет предыдущим.
+            if not current:
+                return window - elapsed
+            return window - elapsed + window * (1 - (limit - 1) / current)
+        return max(window * (1 - (limit - current - 1) / previous) - elapsed, 0)
+
+    def wait(self):
+        return self.wait_time
+
+
+class ActionThrottleMixin:
+    """
+    Миксин вьюсета, задающий область ограничения для отдельных действий.
+    """
+    throttle_scopes = {}
+
+    @property
+    def throttle_scope(self):
+        return self.throttle_scopes.get(getattr(self, 'action', None))
@@ -6,6 +6,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from config.views import DatabaseStatsAPIView, DirectUploadAPIView, PrometheusMetricsAPIView
+
 schema_view = get_schema_view(
     openapi.Info(
         title="API Documentation",
@@ -26,6 +28,9 @@ urlpatterns = [
 
     path('api/', include('users.urls', namespace='users')),
     path('api/ads/', include('notice_board.urls', namespace='ads')),
+    path('api/metrics/', PrometheusMetricsAPIView.as_view(), name='metrics'),
+    path('api/metrics/db/', DatabaseStatsAPIView.as_view(), name='metrics-db'),
+    path('api/media/upload/<str:token>/', DirectUploadAPIView.as_view(), name='media-upload'),
 ]
 
 if settings.DEBUG:
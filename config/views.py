@@ -0,0 +1,100 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import PermissionDenied, UnsupportedMediaType, ValidationError
+from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from config.db import get_connection_stats
+from config.performance import registry
+from config.replicas import get_replica_stats
+from config.storage import load_upload
+from notice_board.permissions import IsAdmin
+
+METRICS_AUTH = 'metrics-token'
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Аутентификация сборщика метрик по заголовку Authorization: Bearer <METRICS_TOKEN>.
+
+    Другие токены передаются следующим аутентификаторам.
+    """
+
+    def authenticate(self, request):
+        token = settings.METRICS_TOKEN
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return AnonymousUser(), METRICS_AUTH
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
+
+
+class HasMetricsToken(BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == METRICS_AUTH
+
+
+class DatabaseStatsAPIView(APIView):
+    """
+    Метрики соединений с базой данных и состояние реплик для администраторов.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response({**get_connection_stats(), 'replicas': get_replica_stats()})
+
+
+class PrometheusMetricsAPIView(APIView):
+    """
+    Замеры запросов в формате Prometheus для администраторов и сборщика метрик.
+    """
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [HasMetricsToken | (IsAuthenticated & IsAdmin)]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class DirectUploadAPIView(APIView):
+    """
+    Приём прямой загрузки в файловое хранилище по ссылке FileSystemStorage.presign_upload.
+
+    Заменяет подписанную ссылку объектного хранилища при MEDIA_STORAGE=filesystem:
+    права подтверждает токен в адресе, тело запроса сохраняется как есть.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    parser_classes = []
+
+    def put(self, request, token):
+        try:
+            upload = load_upload(token)
+        except signing.BadSignature:
+            raise PermissionDenied('Ссылка для загрузки недействительна или истекла.')
+        content_type = (request.content_type or '').split(';')[0].strip()
+        if content_type != upload['content_type']:
+            raise UnsupportedMediaType(content_type)
+
+        body = request.stream.read(upload['max_size'] + 1) if request.stream is not None else b''
+        if not body:
+            raise ValidationError('Пустое тело запроса.')
+        if len(body) > upload['max_size']:
+            return Response({'detail': 'Файл больше заявленного размера.'},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        if default_storage.exists(upload['name']):
+            default_storage.delete(upload['name'])
+        default_storage.save(upload['name'], ContentFile(body))
+        return Response(status=status.HTTP_204_NO_CONTENT)
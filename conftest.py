@@ -0,0 +1,130 @@
+import json
+
+import pytest
+from django.core.cache import cache
+
+from notice_board.testing import QueryRecorder, compare_queries
+
+query_baselines_key = pytest.StashKey()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Очищает кеш перед каждым тестом, чтобы ответы и счётчики не переходили между тестами.
+    """
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """
+    Сохраняет загруженные в тестах файлы во временный каталог.
+    """
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    return settings.MEDIA_ROOT
+
+
+class QueryBaselines:
+    """
+    Базовые SQL-запросы API-тестов, хранящиеся в query_baselines.json рядом с модулем тестов.
+
+    Для каждого теста, выполняющего HTTP-запросы тестовым клиентом, записываются
+    нормализованные SQL-запросы каждого HTTP-запроса (notice_board.testing.QueryRecorder).
+    Тест падает, если какой-либо запрос выполняется чаще, чем в базовых значениях.
+    Значения хранятся отдельно для каждой СУБД. С --update-query-baselines
+    проверка не выполняется, а файлы перезаписываются по результатам прогона.
+    """
+
+    filename = 'query_baselines.json'
+
+    def __init__(self, update):
+        self.update = update
+        self.files = {}
+        self.missing = []
+        self.improved = []
+
+    def load(self, path):
+        if path not in self.files:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    self.files[path] = json.load(file)
+            except FileNotFoundError:
+                self.files[path] = {}
+        return self.files[path]
+
+    def check(self, item, requests):
+        from django.db import connection
+
+        path = item.path.with_name(self.filename)
+        tests = self.load(path).setdefault(connection.vendor, {})
+        if self.update:
+            if requests:
+                tests[item.name] = requests
+            else:
+                tests.pop(item.name, None)
+            return
+        if not requests:
+            return
+        if item.name not in tests:
+            self.missing.append(item.nodeid)
+            return
+
+        problems, improved = compare_queries(tests[item.name], requests)
+        if problems:
+            pytest.fail(
+                f'SQL-запросы теста выросли относительно {path.relative_to(item.config.rootpath)}:\n' + '\n'.join(problems)
+                + '\nЕсли изменение ожидаемо, обновите базовые значения: pytest --update-query-baselines',
+                pytrace=False,
+            )
+        if improved:
+            self.improved.append(item.nodeid)
+
+    def save(self):
+        for path, data in self.files.items():
+            data = {vendor: dict(sorted(tests.items())) for vendor, tests in sorted(data.items()) if tests}
+            if not data and not path.exists():
+                continue
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=2)
+                file.write('\n')
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--update-query-baselines', action='store_true',
+        help='Перезаписать базовые SQL-запросы API-тестов (query_baselines.json)',
+    )
+
+
+def pytest_configure(config):
+    config.stash[query_baselines_key] = QueryBaselines(config.getoption('--update-query-baselines'))
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    with QueryRecorder() as recorder:
+        result = yield
+    item.config.stash[query_baselines_key].check(item, recorder.requests)
+    return result
+
+
+def pytest_sessionfinish(session):
+    baselines = session.config.stash[query_baselines_key]
+    if baselines.update:
+        baselines.save()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    baselines = config.stash[query_baselines_key]
+    if baselines.missing:
+        terminalreporter.write_line(
+            f'Нет базовых SQL-запросов для {len(baselines.missing)} тестов, '
+            'запишите их: pytest --update-query-baselines'
+        )
+    if baselines.improved:
+        terminalreporter.write_line(
+            f'SQL-запросов стало меньше в {len(baselines.improved)} тестах, '
+            'обновите базовые значения: pytest --update-query-baselines'
+        )
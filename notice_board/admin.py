@@ -1,22 +1,38 @@
 from django.contrib import admin
 
+from config.admin import LargeTableAdminMixin
 from notice_board.models import Ad, Comment
+from notice_board.search import get_search_backend
 
 
 @admin.register(Ad)
-class AdAdmin(admin.ModelAdmin):
+class AdAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Административный интерфейс для модели Ad.
 
     Этот класс определяет, как объявления будут отображаться в административной панели Django.
     В списке отображаются следующие поля:
     идентификатор (pk), название (title), цена (price), автор (author) и дата создания (created_at).
+    Поиск по названию идёт через поисковый бэкенд ленты (полнотекстовый
+    и триграммный индексы в PostgreSQL), число - ищется как идентификатор.
     """
     list_display = ('pk', 'title', 'price', 'author', 'created_at',)
+    list_select_related = ('author',)
+    changelist_defer = ('description', 'search_vector')
+    search_fields = ('title',)
+    autocomplete_fields = ('author',)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term.isdigit():
+            return queryset.filter(pk=int(search_term)), False
+        return get_search_backend().search(queryset, search_term), False
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """
     Административный интерфейс для модели Comment.
 
@@ -24,5 +40,19 @@ class CommentAdmin(admin.ModelAdmin):
     В списке отображаются следующие поля:
     идентификатор (pk), текст комментария (text), дата создания (created_at),
     связанное объявление (ad) и автор комментария (author).
+    Отзывы ищутся по идентификатору объявления (индекс по ad).
     """
     list_display = ('pk', 'text', 'created_at', 'ad', 'author', )
+    list_select_related = ('ad', 'author')
+    changelist_defer = ('ad__description', 'ad__search_vector')
+    search_fields = ('ad',)
+    search_help_text = 'Идентификатор объявления'
+    autocomplete_fields = ('ad', 'author')
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if not search_term.isdigit():
+            return queryset.none(), False
+        return queryset.filter(ad_id=int(search_term)), False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NoticeBoardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notice_board'
+
+    def ready(self):
+        from notice_board import signals  # noqa: F401
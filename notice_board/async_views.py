@@ -0,0 +1,382 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.utils import translate_validation
+from rest_framework import exceptions
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from config.performance import measure_serialization
+from config.replicas import replica_reads, replica_reads_allowed
+from notice_board.cache import aget_or_compute, build_response_key, get_ad_author_scopes, settled_reads
+from notice_board.events import FEED_CHANNEL, ad_channel, stream_events
+from notice_board.fast_serializers import FastSerializer, get_ordering_paths
+from notice_board.filters import AdFilter
+from notice_board.mixins import (ConditionalResponseMixin, QueryOptimizerMixin, conditional_response,
+                                 set_validator_headers)
+from notice_board.models import Ad, Comment
+from notice_board.paginator import AdPaginator, CommentPaginator
+from notice_board.renderers import FastJSONRenderer
+from notice_board.serializers import AdDetailSerializer, AdSerializer, CommentSerializer
+from notice_board.views import AdListAPIView, AdRetrieveAPIView, CommentViewSet
+
+
+class AsyncAPIView(QueryOptimizerMixin, View):
+    """
+    Базовое асинхронное представление для чтения данных.
+
+    Аутентификация, проверка прав, обработка ошибок и формат ответа
+    такие же, как у APIView, но записи выбираются через async ORM:
+    под ASGI ожидание базы и медленных клиентов не занимает поток воркера.
+    Аутентификаторы DRF синхронные, поэтому выполняются через sync_to_async.
+
+    Запросы с методами, отличными от GET и HEAD, передаются синхронному
+    представлению sync_view_class (с действиями sync_view_actions для вьюсетов).
+    Если get_cache_scopes() возвращает области, ответ кешируется так же,
+    как в CachedResponseMixin. Записи читаются из реплик, как в ReplicaReadMixin.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = None
+    serializer_class = None
+    sync_view_class = None
+    sync_view_actions = None
+    cache_name = None
+    # Обработчиков get/post нет, запросы разбирает dispatch, поэтому
+    # асинхронность представления указывается явно.
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Как и у APIView: аутентификация по токену, CSRF-защита не нужна.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            if self.sync_view_class is None:
+                return self.http_method_not_allowed(request, *args, **kwargs)
+            return await sync_to_async(self.get_sync_view())(request, *args, **kwargs)
+
+        self.request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        try:
+            # Аутентификаторы могут обращаться к базе, поэтому user вычисляется в потоке.
+            await sync_to_async(getattr)(self.request, 'user')
+            self.check_permissions(self.request)
+            # Счётчики ограничения частоты хранятся в кеше с синхронным API.
+            await sync_to_async(self.check_throttles)(self.request)
+            with replica_reads(await sync_to_async(replica_reads_allowed)(self.request)):
+                response = await self.get_response(self.request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        if not isinstance(response, Response):
+            return response
+        return self.finalize_response(response)
+
+    async def get_response(self, request, *args, **kwargs):
+        """
+        Возвращает ответ представления. Может вернуть готовый HttpResponse,
+        например 304 Not Modified.
+        """
+        data, status_code, hit = await self.get_response_data(request, *args, **kwargs)
+        headers = {}
+        if hit is not None:
+            headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return Response(data, status=status_code, headers=headers)
+
+    async def get_response_data(self, request, *args, **kwargs):
+        """
+        Возвращает данные ответа, его статус и признак попадания в кеш
+        (None, если ответ не кешируется).
+        """
+        scopes = self.get_cache_scopes()
+        if scopes is None:
+            return await self.get_data(request, *args, **kwargs), 200, None
+
+        name = self.cache_name or type(self).__name__
+        key = await sync_to_async(build_response_key)(name, request, scopes)
+
+        async def compute():
+            with await sync_to_async(settled_reads)(scopes):
+                return (await self.get_data(request, *args, **kwargs), 200), True
+
+        (data, status_code), hit = await aget_or_compute(name, key, compute)
+        return data, status_code, hit
+
+    async def get_data(self, request, *args, **kwargs):
+        """
+        Возвращает сериализованные данные ответа.
+        """
+        raise NotImplementedError
+
+    def get_cache_scopes(self):
+        """
+        Возвращает области кеша ответа или None, если ответ не кешируется.
+        """
+        return None
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'format': None, 'view': self}
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['context'] = self.get_serializer_context()
+        return self.get_serializer_class()(*args, **kwargs)
+
+    async def get_page_data(self, queryset, paginator):
+        """
+        Возвращает данные страницы с пагинацией. При FAST_SERIALIZERS записи
+        выбираются через values() и сериализуются FastSerializer.
+        """
+        if settings.FAST_SERIALIZERS:
+            serializer = FastSerializer(self.get_serializer_class(), self.get_serializer_context())
+            rows = serializer.values(queryset, get_ordering_paths(queryset, paginator))
+            page = await paginator.apaginate_queryset(rows, self.request, view=self)
+            with measure_serialization():
+                data = serializer.serialize(page)
+        else:
+            page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+            with measure_serialization():
+                data = self.get_serializer(page, many=True).data
+        return paginator.get_paginated_response(data).data
+
+    async def get_object_data(self, queryset, **lookup):
+        """
+        Возвращает данные объекта или выбрасывает Http404.
+        """
+        if settings.FAST_SERIALIZERS:
+            serializer = FastSerializer(self.get_serializer_class(), self.get_serializer_context())
+            row = await aget_object_or_404(serializer.values(queryset), **lookup)
+            with measure_serialization():
+                return serializer.to_representation(row)
+        instance = await aget_object_or_404(queryset, **lookup)
+        with measure_serialization():
+            return self.get_serializer(instance).data
+
+    def get_sync_view(self):
+        cls = type(self)
+        if '_sync_view' not in cls.__dict__:
+            if cls.sync_view_actions:
+                cls._sync_view = cls.sync_view_class.as_view(cls.sync_view_actions)
+            else:
+                cls._sync_view = cls.sync_view_class.as_view()
+        return cls._sync_view
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(
+                    detail=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None),
+                )
+
+    def check_throttles(self, request):
+        waits = [
+            throttle.wait() for throttle in [throttle() for throttle in self.throttle_classes]
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticators = self.request.authenticators
+            auth_header = authenticators[0].authenticate_header(self.request) if authenticators else None
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = 403
+
+        context = {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': self.request}
+        response = exception_handler(exc, context)
+        if response is None:
+            raise exc
+        return response
+
+    def finalize_response(self, response):
+        response.accepted_renderer = FastJSONRenderer()
+        response.accepted_media_type = FastJSONRenderer.media_type
+        response.renderer_context = {
+            'view': self,
+            'args': self.args,
+            'kwargs': self.kwargs,
+            'request': self.request,
+        }
+        response['Vary'] = 'Accept'
+        with measure_serialization():
+            return response.render()
+
+
+class AsyncConditionalResponseMixin(ConditionalResponseMixin):
+    """
+    ConditionalResponseMixin для асинхронных представлений: валидаторы
+    вычисляются через async ORM до получения данных ответа.
+    """
+
+    async def aresolve_validators(self, request):
+        if self.validators_from_generations:
+            # Поколения кеша читаются синхронным API кеша.
+            return await sync_to_async(self.get_generation_validators)(request)
+
+        async def compute():
+            with await sync_to_async(settled_reads)(scopes):
+                stats = await self.get_validator_queryset().aaggregate(**self.get_validator_aggregates())
+            # Поколения кеша читаются синхронным API кеша.
+            return (await sync_to_async(self.get_validators)(request, stats),), True
+
+        scopes = self.get_validator_cache_scopes()
+        if scopes is None:
+            (validators,), _ = await compute()
+            return validators
+        name = self.get_validator_cache_name()
+        key = await sync_to_async(build_response_key)(name, request, scopes)
+        (validators,), _ = await aget_or_compute(name, key, compute)
+        return validators
+
+    async def get_response(self, request, *args, **kwargs):
+        validators = await self.aresolve_validators(request)
+        if validators is None:
+            return await super().get_response(request, *args, **kwargs)
+        not_modified = conditional_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        response = await super().get_response(request, *args, **kwargs)
+        return set_validator_headers(response, *validators)
+
+
+class AsyncAdListView(AsyncConditionalResponseMixin, AsyncAPIView):
+    """
+    Асинхронная версия AdListAPIView: лента объявлений с фильтрацией
+    и курсорной пагинацией.
+    """
+    serializer_class = AdSerializer
+    sync_view_class = AdListAPIView
+    cache_name = 'AdListAPIView'
+    throttle_scope = AdListAPIView.throttle_scope
+    validators_from_generations = AdListAPIView.validators_from_generations
+
+    def get_cache_scopes(self):
+        return ['ads']
+
+    def get_queryset(self):
+        queryset = Ad.objects.all().order_by('-created_at', '-pk')
+        filterset = AdFilter(self.request.query_params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return self.get_query_plan(Ad).apply(filterset.qs)
+
+    async def get_data(self, request):
+        return await self.get_page_data(self.get_queryset(), AdPaginator())
+
+
+class AsyncAdRetrieveView(AsyncConditionalResponseMixin, AsyncAPIView):
+    """
+    Асинхронная версия AdRetrieveAPIView: карточка объявления.
+    """
+    serializer_class = AdDetailSerializer
+    permission_classes = [IsAuthenticated]
+    sync_view_class = AdRetrieveAPIView
+    cache_name = 'AdRetrieveAPIView'
+
+    async def get_response(self, request, *args, **kwargs):
+        # Автор объявления может загружаться из базы, поэтому определяется до ответа.
+        self.author_scopes = await sync_to_async(get_ad_author_scopes)(kwargs['pk'])
+        return await super().get_response(request, *args, **kwargs)
+
+    def get_validator_queryset(self):
+        return Ad.objects.filter(pk=self.kwargs['pk'])
+
+    def get_validator_scopes(self):
+        return self.author_scopes
+
+    def get_cache_scopes(self):
+        return [f'ad:{self.kwargs["pk"]}', *self.author_scopes]
+
+    async def get_data(self, request, pk):
+        queryset = self.get_query_plan(Ad).apply(Ad.objects.all())
+        return await self.get_object_data(queryset, pk=pk)
+
+
+class AsyncCommentListView(AsyncConditionalResponseMixin, AsyncAPIView):
+    """
+    Асинхронный список отзывов объявления. Создание отзыва (POST)
+    выполняет CommentViewSet.
+    """
+    serializer_class = CommentSerializer
+    permission_classes = [IsAuthenticated]
+    sync_view_class = CommentViewSet
+    sync_view_actions = {'get': 'list', 'post': 'create'}
+    # Вызывается из get_validators(), который выполняется в потоке.
+    get_validator_scopes = CommentViewSet.get_validator_scopes
+
+    def get_validator_queryset(self):
+        return Comment.objects.for_ad(self.kwargs['ad_pk'])
+
+    async def get_data(self, request, ad_pk):
+        queryset = self.get_query_plan(Comment).apply(Comment.objects.for_ad(ad_pk))
+        return await self.get_page_data(queryset, CommentPaginator())
+
+
+class AsyncEventStreamView(AsyncAPIView):
+    """
+    Поток событий в формате Server-Sent Events.
+
+    Соединение остаётся открытым, пока его не закроет клиент, поэтому
+    такие представления подключаются только в режиме ASGI.
+    """
+
+    def get_channels(self, **kwargs):
+        """
+        Возвращает каналы брокера событий, на которые подписывается клиент.
+        """
+        raise NotImplementedError
+
+    async def get_response(self, request, *args, **kwargs):
+        await self.check_object(**kwargs)
+        response = StreamingHttpResponse(
+            stream_events(self.get_channels(**kwargs)),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Запрещает nginx буферизовать поток.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def check_object(self, **kwargs):
+        """
+        Проверяет, что объект подписки существует.
+        """
+
+
+class AsyncAdFeedEventsView(AsyncEventStreamView):
+    """
+    События ленты: создание, изменение и удаление объявлений.
+    """
+    permission_classes = [AllowAny]
+
+    def get_channels(self):
+        return [FEED_CHANNEL]
+
+
+class AsyncAdEventsView(AsyncEventStreamView):
+    """
+    События объявления: его изменение и удаление, создание, изменение
+    и удаление отзывов к нему.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_channels(self, pk):
+        return [ad_channel(pk)]
+
+    async def check_object(self, pk):
+        await aget_object_or_404(Ad.objects.all(), pk=pk)
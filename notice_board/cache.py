@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from config.replicas import primary_reads, replica_reads_enabled
+
+KEY_PREFIX = 'notice_board'
+
+# Ожидание ответа, который уже вычисляет другой запрос (защита от stampede).
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _generation_key(scope):
+    return f'{KEY_PREFIX}:gen:{scope}'
+
+
+def _changed_key(scope):
+    return f'{KEY_PREFIX}:changed:{scope}'
+
+
+def _modified_key(scope):
+    return f'{KEY_PREFIX}:modified:{scope}'
+
+
+def get_generations(*scopes):
+    """
+    Возвращает текущие номера поколений для областей кеша.
+
+    Номер поколения входит в ключ закешированного ответа, поэтому увеличение
+    номера делает все ответы области недоступными без их перебора. Новый
+    счётчик начинается с текущего времени в наносекундах: если счётчик был
+    вытеснен из кеша, он не повторит уже использованное значение.
+
+    Параметры:
+        *scopes (str): Области кеша, например 'ads' или 'ad:42'.
+
+    Возврат:
+        list: Номера поколений в порядке областей.
+    """
+    keys = [_generation_key(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def get_modified_at(*scopes):
+    """
+    Возвращает время последнего изменения областей кеша (timestamp).
+
+    Время записывает bump_generations(). Если значение вытеснено из кеша,
+    отсчёт начинается заново с текущего времени: дата изменения может
+    оказаться позже настоящей, но не раньше.
+
+    Параметры:
+        *scopes (str): Области кеша.
+
+    Возврат:
+        float: Наибольшее время изменения по областям.
+    """
+    keys = [_modified_key(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time(), timeout=None)
+            values[key] = cache.get(key)
+    return max(values.values())
+
+
+def bump_generations(*scopes):
+    """
+    Увеличивает номера поколений, инвалидируя ответы областей,
+    и запоминает время изменения для get_modified_at().
+
+    При наличии реплик области на REPLICA_PIN_SECONDS секунд отмечаются
+    как изменённые, см. settled_reads().
+    """
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+    now = time.time()
+    cache.set_many({_modified_key(scope): now for scope in scopes}, timeout=None)
+    if settings.DATABASE_REPLICAS:
+        cache.set_many({_changed_key(scope): 1 for scope in scopes}, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def settled_reads(scopes):
+    """
+    Возвращает контекст вычисления кешируемого ответа областей scopes.
+
+    Если области недавно изменялись, чтения идут в основную базу: реплика
+    могла ещё не получить изменения, а устаревший ответ закешировался бы
+    под новым поколением до следующего изменения.
+    """
+    if scopes and replica_reads_enabled() and cache.get_many([_changed_key(scope) for scope in scopes]):
+        return primary_reads()
+    return nullcontext()
+
+
+def invalidate_ads(ad_pks=()):
+    """
+    Инвалидирует ленту объявлений и карточки объявлений ad_pks.
+
+    Поколения увеличиваются сразу и повторно после фиксации транзакции:
+    иначе параллельный запрос мог бы закешировать ещё не изменённые данные
+    под новым поколением.
+    """
+    scopes = ['ads'] + [f'ad:{ad_pk}' for ad_pk in ad_pks if ad_pk is not None]
+    bump_generations(*scopes)
+    transaction.on_commit(lambda: bump_generations(*scopes))
+
+
+def invalidate_ad(ad_pk):
+    """
+    Инвалидирует ленту объявлений и карточку объявления ad_pk.
+    """
+    invalidate_ads([ad_pk])
+
+
+def invalidate_user(user_pk):
+    """
+    Инвалидирует ответы с данными пользователя user_pk: карточки его
+    объявлений и списки отзывов, в которых он участвует.
+    """
+    scope = f'user:{user_pk}'
+    bump_generations(scope)
+    transaction.on_commit(lambda: bump_generations(scope))
+
+
+def _author_key(ad_pk):
+    return f'{KEY_PREFIX}:author:{ad_pk}'
+
+
+def remember_ad_author(ad_pk, author_pk):
+    """
+    Запоминает автора объявления для get_ad_author_scopes().
+    """
+    cache.set(_author_key(ad_pk), [author_pk], timeout=None)
+
+
+def get_ad_author_scopes(ad_pk):
+    """
+    Возвращает области кеша автора объявления ad_pk.
+
+    Автор объявления не меняется, поэтому его идентификатор кешируется
+    без срока (для новых объявлений - сразу при создании), и карточка
+    из кеша отдаётся без запросов к базе.
+
+    Параметры:
+        ad_pk: Идентификатор объявления.
+
+    Возврат:
+        list: Области кеша, например ['user:7'], или пустой список,
+        если объявления нет или у него нет автора.
+    """
+    from notice_board.models import Ad
+
+    key = _author_key(ad_pk)
+    author_pks = cache.get(key)
+    if author_pks is None:
+        author_pks = list(Ad.objects.filter(pk=ad_pk).values_list('author_id', flat=True))
+        if author_pks:
+            cache.set(key, author_pks, timeout=None)
+    return [f'user:{author_pk}' for author_pk in author_pks if author_pk is not None]
+
+
+def _record(name, outcome):
+    with _stats_lock:
+        _stats[(name, outcome)] += 1
+
+
+def get_cache_stats():
+    """
+    Возвращает счётчики попаданий и промахов кеша ответов в текущем процессе.
+
+    Возврат:
+        dict: {имя представления: {'hit': int, 'miss': int}}.
+    """
+    with _stats_lock:
+        items = list(_stats.items())
+    stats = {}
+    for (name, outcome), count in items:
+        stats.setdefault(name, {'hit': 0, 'miss': 0})[outcome] = count
+    return stats
+
+
+def build_response_key(name, request, scopes):
+    """
+    Строит ключ ответа по пути, параметрам запроса и поколениям областей.
+    """
+    query = sorted(request.GET.lists())
+    raw = f'{request.get_host()}|{request.path}|{query}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    generations = '.'.join(str(generation) for generation in get_generations(*scopes))
+    return f'{KEY_PREFIX}:resp:{name}:{generations}:{digest}'
+
+
+def get_or_compute(name, key, compute, timeout=None):
+    """
+    Возвращает значение из кеша или вычисляет его под блокировкой.
+
+    Вычислять значение при промахе будет только один запрос. Остальные ждут
+    до LOCK_WAIT секунд, пока значение появится в кеше, и только потом
+    вычисляют его сами.
+
+    Параметры:
+        name (str): Имя для счётчиков попаданий и промахов.
+        key (str): Ключ кеша.
+        compute (callable): Возвращает пару (значение, можно ли кешировать).
+        timeout (int): Время жизни значения, по умолчанию RESPONSE_CACHE_TIMEOUT.
+
+    Возврат:
+        tuple: Значение и признак попадания в кеш.
+    """
+    if timeout is None:
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    value = cache.get(key)
+    if value is not None:
+        _record(name, 'hit')
+        return value, True
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                _record(name, 'hit')
+                return value, True
+        lock_key = None
+
+    try:
+        value, cacheable = compute()
+        if cacheable:
+            cache.set(key, value, timeout)
+    finally:
+        if lock_key is not None:
+            cache.delete(lock_key)
+    _record(name, 'miss')
+    return value, False
+
+
+async def aget_or_compute(name, key, compute, timeout=None):
+    """
+    Асинхронный вариант get_or_compute для асинхронных представлений.
+
+    Параметры:
+        name (str): Имя для счётчиков попаданий и промахов.
+        key (str): Ключ кеша.
+        compute (callable): Корутина-функция, возвращающая пару
+            (значение, можно ли кешировать).
+        timeout (int): Время жизни значения, по умолчанию RESPONSE_CACHE_TIMEOUT.
+
+    Возврат:
+        tuple: Значение и признак попадания в кеш.
+    """
+    if timeout is None:
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    value = await cache.aget(key)
+    if value is not None:
+        _record(name, 'hit')
+        return value, True
+
+    lock_key = f'{key}:lock'
+    if not await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            value = await cache.aget(key)
+            if value is not None:
+                _record(name, 'hit')
+                return value, True
+        lock_key = None
+
+    try:
+        value, cacheable = await compute()
+        if cacheable:
+            await cache.aset(key, value, timeout)
+    finally:
+        if lock_key is not None:
+            await cache.adelete(lock_key)
+    _record(name, 'miss')
+    return value, False
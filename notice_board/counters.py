@@ -0,0 +1,91 @@
+from django.db.models import Count, DateTimeField, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from notice_board.models import Ad, Comment
+
+
+def _last_comment_subquery():
+    return Subquery(
+        Comment.objects.filter(ad=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def _comments_count_subquery():
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(ad=OuterRef('pk'))
+            .order_by()
+            .values('ad')
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def comment_added(ad_pk, commented_at):
+    """
+    Учитывает новый отзыв в счётчиках объявления одним UPDATE.
+
+    Параметры:
+        ad_pk (int): Идентификатор объявления.
+        commented_at (datetime): Дата создания отзыва.
+    """
+    commented_at = Value(commented_at, output_field=DateTimeField())
+    Ad.objects.filter(pk=ad_pk).update(
+        comments_count=F('comments_count') + 1,
+        last_commented_at=Greatest(Coalesce('last_commented_at', commented_at), commented_at),
+        updated_at=Now(),
+    )
+
+
+def comment_removed(ad_pk):
+    """
+    Учитывает удаление отзыва в счётчиках объявления одним UPDATE.
+
+    Дата последнего отзыва пересчитывается подзапросом по оставшимся отзывам.
+
+    Параметры:
+        ad_pk (int): Идентификатор объявления.
+    """
+    Ad.objects.filter(pk=ad_pk).update(
+        comments_count=Greatest(F('comments_count') - 1, Value(0)),
+        last_commented_at=_last_comment_subquery(),
+        updated_at=Now(),
+    )
+
+
+def rebuild_comment_counters(start_pk, end_pk):
+    """
+    Пересчитывает счётчики отзывов для объявлений с pk в [start_pk, end_pk).
+
+    Параметры:
+        start_pk (int): Начало диапазона идентификаторов включительно.
+        end_pk (int): Конец диапазона идентификаторов не включительно.
+
+    Возврат:
+        int: Число обновлённых объявлений.
+    """
+    return Ad.objects.filter(pk__gte=start_pk, pk__lt=end_pk).update(
+        comments_count=_comments_count_subquery(),
+        last_commented_at=_last_comment_subquery(),
+        updated_at=Now(),
+    )
+
+
+def refresh_comment_counters(ad_pks):
+    """
+    Пересчитывает счётчики отзывов объявлений ad_pks по оставшимся отзывам.
+
+    Параметры:
+        ad_pks (list): Идентификаторы объявлений.
+
+    Возврат:
+        int: Число обновлённых объявлений.
+    """
+    return Ad.objects.filter(pk__in=ad_pks).update(
+        comments_count=_comments_count_subquery(),
+        last_commented_at=_last_comment_subquery(),
+        updated_at=Now(),
+    )
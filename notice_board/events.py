@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Каналы событий: лента объявлений и отдельное объявление с его отзывами.
+FEED_CHANNEL = 'ads'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def ad_channel(ad_pk):
+    return f'ad:{ad_pk}'
+
+
+class LocalSubscription:
+    """
+    Подписка на события внутри процесса.
+
+    События доставляются в очередь цикла событий подписчика. Если клиент
+    не успевает читать и очередь переполнена, новые события отбрасываются.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Цикл событий подписчика уже закрыт.
+            pass
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout):
+        """
+        Возвращает следующее событие или None, если за timeout секунд его не было.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """
+    Брокер событий в памяти процесса.
+
+    Подходит для одного процесса сервера: подписчики других воркеров
+    событий не получат, для нескольких воркеров нужен RedisBroker.
+    """
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    @asynccontextmanager
+    async def subscribe(self, *channels):
+        subscription = LocalSubscription(asyncio.get_running_loop(), settings.EVENTS_QUEUE_SIZE)
+        with self.lock:
+            for channel in channels:
+                self.subscriptions[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self.lock:
+                for channel in channels:
+                    self.subscriptions[channel].discard(subscription)
+                    if not self.subscriptions[channel]:
+                        del self.subscriptions[channel]
+
+
+class RedisSubscription:
+    """
+    Подписка на каналы Redis pub/sub.
+    """
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+
+class RedisBroker:
+    """
+    Брокер событий через Redis pub/sub: события доходят до подписчиков
+    во всех процессах и на всех серверах.
+    """
+
+    def __init__(self):
+        import redis
+
+        self.url = settings.EVENTS_REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+
+    def _key(self, channel):
+        return f'{settings.EVENTS_CHANNEL_PREFIX}:{channel}'
+
+    def publish(self, channel, event):
+        self.client.publish(self._key(channel), json.dumps(event, cls=JSONEncoder))
+
+    @asynccontextmanager
+    async def subscribe(self, *channels):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*(self._key(channel) for channel in channels))
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+def get_broker():
+    """
+    Возвращает брокер событий, заданный настройкой EVENTS_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def build_event(kind, action, pk, data=None):
+    """
+    Формирует событие вида {'type': 'comment.created', 'pk': 1, 'data': {...}}.
+    """
+    return {'type': f'{kind}.{action}', 'pk': pk, 'data': data}
+
+
+def publish(channels, event):
+    """
+    Публикует событие в каналы. Ошибки брокера не должны ломать сохранение
+    моделей, поэтому события в таком случае теряются, а ошибка записывается в лог.
+    """
+    broker = get_broker()
+    for channel in channels:
+        try:
+            broker.publish(channel, event)
+        except Exception:
+            logger.exception('Не удалось опубликовать событие %s в канал %s', event['type'], channel)
+
+
+def format_sse(event):
+    """
+    Кодирует событие в формат Server-Sent Events.
+    """
+    payload = json.dumps(event, cls=JSONEncoder, ensure_ascii=False)
+    return f'event: {event["type"]}\ndata: {payload}\n\n'
+
+
+async def stream_events(channels):
+    """
+    Асинхронный генератор потока SSE для каналов.
+
+    Первым отправляется комментарий, подтверждающий подписку, затем
+    события по мере поступления и комментарии-пинги каждые EVENTS_HEARTBEAT
+    секунд, чтобы прокси не закрывали простаивающее соединение.
+    """
+    async with get_broker().subscribe(*channels) as subscription:
+        yield ': connected\n\n'
+        while True:
+            event = await subscription.get(settings.EVENTS_HEARTBEAT)
+            if event is None:
+                yield ': ping\n\n'
+            else:
+                yield format_sse(event)
@@ -0,0 +1,134 @@
+import csv
+import json
+
+from notice_board.models import Ad
+
+# Колонки экспорта объявлений. Автор передаётся email-ом, при импорте
+# колонки pk и created_at игнорируются.
+EXPORT_FIELDS = ('pk', 'title', 'price', 'description', 'author_email', 'image', 'created_at')
+
+FORMATS = ('jsonl', 'csv')
+
+TITLE_MAX_LENGTH = Ad._meta.get_field('title').max_length
+
+
+class RowError(ValueError):
+    """
+    Ошибка в строке импортируемого файла.
+    """
+
+
+def detect_format(path, fmt=None):
+    """
+    Определяет формат файла по явному параметру или расширению.
+
+    Параметры:
+        path (str): Путь к файлу.
+        fmt (str): Явно заданный формат или None.
+
+    Возврат:
+        str: 'jsonl' или 'csv'.
+    """
+    if fmt:
+        return fmt
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(stream, fmt):
+    """
+    Потоково читает строки файла, не загружая его в память целиком.
+
+    Параметры:
+        stream: Текстовый файловый объект.
+        fmt (str): Формат файла.
+
+    Возврат:
+        generator: Пары (номер строки, словарь значений или RowError).
+    """
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            yield number, row
+        return
+
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield number, RowError(f'некорректный JSON: {error}')
+            continue
+        if not isinstance(row, dict):
+            yield number, RowError('строка должна быть JSON-объектом')
+            continue
+        yield number, row
+
+
+def parse_row(row):
+    """
+    Проверяет и приводит значения строки к полям объявления.
+
+    Параметры:
+        row (dict): Значения строки файла.
+
+    Возврат:
+        dict: Поля объявления и email автора (ключ author_email).
+
+    Исключения:
+        RowError: Если значения некорректны.
+    """
+    title = (row.get('title') or '').strip()
+    if not title:
+        raise RowError('не указано название')
+    if len(title) > TITLE_MAX_LENGTH:
+        raise RowError(f'название длиннее {TITLE_MAX_LENGTH} символов')
+
+    price = row.get('price')
+    if price in (None, ''):
+        price = None
+    else:
+        try:
+            price = int(price)
+        except (TypeError, ValueError):
+            raise RowError(f'некорректная цена: {price!r}')
+
+    return {
+        'title': title,
+        'price': price,
+        'description': row.get('description') or None,
+        'image': row.get('image') or None,
+        'author_email': (row.get('author_email') or '').strip() or None,
+    }
+
+
+class JsonLinesWriter:
+    """
+    Запись объявлений в формате JSON Lines.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False, default=str))
+        self.stream.write('\n')
+
+
+class CsvWriter:
+    """
+    Запись объявлений в формате CSV с заголовком.
+    """
+
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+}
@@ -0,0 +1,169 @@
+"""
+Быстрая сериализация для эндпоинтов чтения.
+
+Вместо создания экземпляров моделей и обхода полей ModelSerializer
+записи выбираются через values(), а каждая строка превращается в словарь
+заранее подготовленными функциями преобразования полей. Результат
+совпадает с serializer.data того же сериализатора, поэтому ответ
+рендерится в те же байты.
+
+Поддерживаются поля, читающие поля моделей (в том числе через связи
+«к одному»): для остальных (SerializerMethodField, source='*', вложенные
+сериализаторы) значение нельзя получить из values(), и FastSerializer
+выбрасывает TypeError.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+# Поля, у которых to_representation не меняет значение из базы.
+IDENTITY_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.ReadOnlyField)
+
+# Признак поля, которое сериализатор не выводит, если связанного объекта нет.
+SKIP = object()
+
+_paths = {}
+
+
+def _resolve(model, field):
+    """
+    Возвращает путь values() для поля сериализатора, поле модели
+    и пути связей, через которые оно читается.
+    """
+    unsupported = (serializers.BaseSerializer, serializers.SerializerMethodField,
+                   serializers.RelatedField, serializers.ManyRelatedField)
+    if field.source == '*' or isinstance(field, unsupported):
+        raise TypeError(f'Поле {field.field_name} не поддерживается быстрой сериализацией')
+    parts = []
+    model_field = None
+    for attr in field.source_attrs:
+        if model is None:
+            raise TypeError(f'Поле {field.field_name} не поддерживается быстрой сериализацией')
+        if attr == 'pk':
+            model_field = model._meta.pk
+        else:
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                model_field = next((f for f in model._meta.concrete_fields if f.attname == attr), None)
+                if model_field is None:
+                    raise TypeError(f'Поле {field.field_name} не поддерживается быстрой сериализацией')
+                attr = model_field.attname
+        if model_field.many_to_many or model_field.one_to_many:
+            raise TypeError(f'Поле {field.field_name} не поддерживается быстрой сериализацией')
+        parts.append(attr)
+        model = model_field.related_model
+    # Внешние ключи промежуточных связей: NULL в них означает отсутствие объекта.
+    relations = ['__'.join(parts[:index]) for index in range(1, len(parts))]
+    return '__'.join(parts), model_field, relations
+
+
+def _file_converter(field, model_field, context):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+    storage = model_field.storage
+    request = context.get('request')
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _missing(field):
+    """
+    Возвращает поведение поля, если связанного объекта нет: как и
+    Field.get_attribute, значение по умолчанию, None или пропуск поля.
+    """
+    if field.default is not empty:
+        return field.get_default
+    if field.allow_null:
+        return lambda: None
+    return SKIP
+
+
+def _converter(field, model_field, context):
+    """
+    Возвращает функцию преобразования значения или None, если значение
+    из базы выводится как есть.
+    """
+    if isinstance(field, serializers.FileField):
+        return _file_converter(field, model_field, context)
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    return field.to_representation
+
+
+class FastSerializer:
+    """
+    Сериализатор строк values() с результатом, как у serializer_class.
+
+    Пути полей вычисляются один раз на класс сериализатора, функции
+    преобразования - один раз на запрос (им нужен контекст, например
+    request для абсолютных ссылок), после чего каждая строка
+    обрабатывается одним проходом по списку полей.
+
+    Параметры:
+        serializer_class (type): Класс ModelSerializer.
+        context (dict): Контекст сериализатора.
+    """
+
+    def __init__(self, serializer_class, context=None):
+        serializer = serializer_class(context=context or {})
+        if serializer_class not in _paths:
+            model = serializer_class.Meta.model
+            _paths[serializer_class] = {
+                name: _resolve(model, field)
+                for name, field in serializer.fields.items() if not field.write_only
+            }
+        self.fields = []
+        for name, (path, model_field, relations) in _paths[serializer_class].items():
+            field = serializer.fields[name]
+            missing = _missing(field) if relations else None
+            self.fields.append((name, path, _converter(field, model_field, serializer.context), relations, missing))
+
+    @property
+    def paths(self):
+        paths = []
+        for _, path, _, relations, _ in self.fields:
+            paths += relations
+            paths.append(path)
+        return paths
+
+    def values(self, queryset, extra=()):
+        """
+        Возвращает queryset.values() с полями сериализатора и полями extra,
+        например полями сортировки для пагинатора.
+        """
+        return queryset.values(*dict.fromkeys([*self.paths, *extra]))
+
+    def to_representation(self, row):
+        result = {}
+        for name, path, convert, relations, missing in self.fields:
+            value = row[path]
+            if value is None and relations and any(row[relation] is None for relation in relations):
+                if missing is SKIP:
+                    continue
+                value = missing()
+            result[name] = value if convert is None or value is None else convert(value)
+        return result
+
+    def serialize(self, rows):
+        """
+        Возвращает список словарей, как у serializer_class(rows, many=True).data.
+        """
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+def get_ordering_paths(queryset, paginator=None):
+    """
+    Возвращает поля сортировки запроса и пагинатора: они нужны в values(),
+    чтобы пагинатор построил курсор по строке.
+    """
+    ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+    ordering += list(getattr(paginator, 'ordering', None) or ())
+    return [field.lstrip('-') for field in ordering]
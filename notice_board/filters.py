@@ -1,26 +1,126 @@
 import django_filters
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
 
-from notice_board.models import Ad
+from notice_board.models import AD_HAS_IMAGE, Ad
+from notice_board.search import get_search_backend
 
 
 class AdFilter(django_filters.rest_framework.FilterSet):
     """
-    Фильтр для модели Ad, позволяющий фильтровать объявления по названию.
+    Фильтр для модели Ad, позволяющий искать объявления.
 
     Атрибуты:
-        title (django_filters.CharFilter): Фильтр для поля 'title' модели Ad.
-            Позволяет искать объявления, название которых содержит указанный текст.
-            Поиск производится без учета регистра.
+        q (django_filters.CharFilter): Поисковый запрос по названию и описанию.
+            Выполняется поисковым бэкендом (полнотекстовый поиск в PostgreSQL,
+            icontains в остальных СУБД), результаты сортируются по релевантности.
+        title (django_filters.CharFilter): Устаревший синоним параметра q,
+            оставлен для совместимости клиентов. Игнорируется, если передан q.
+        comments_count_min, comments_count_max (django_filters.NumberFilter):
+            Границы числа отзывов к объявлению.
+        last_commented_after, last_commented_before (django_filters.IsoDateTimeFilter):
+            Границы даты последнего отзыва.
+        price_min, price_max (django_filters.NumberFilter): Границы цены,
+            объявления без цены не попадают в результат.
+        author (django_filters.NumberFilter): Идентификатор автора объявления.
+        created_after, created_before (django_filters.IsoDateTimeFilter):
+            Границы даты создания объявления.
+        has_image (django_filters.BooleanFilter): Только объявления с изображением
+            (true) или без него (false).
+        ordering (django_filters.OrderingFilter): Сортировка по дате создания,
+            числу отзывов, дате последнего отзыва или цене. Объявления без отзывов
+            при сортировке по дате последнего отзыва идут в конце.
+
+    Для каждого фильтра есть подходящий индекс модели Ad: ad_priced_idx,
+    ad_author_created_at_idx, ad_created_at_id_idx и ad_with_image_idx.
 
     Метакласс Meta:
         model (Model): Модель, к которой применяется фильтр.
-        fields (tuple): Поля модели, по которым можно фильтровать объявления.
+        fields (tuple): Параметры, по которым можно фильтровать объявления.
     """
-    title = django_filters.CharFilter(
-        field_name='title',
-        lookup_expr='icontains',
+    q = django_filters.CharFilter(method='filter_search', label='Поиск')
+    title = django_filters.CharFilter(method='filter_search')
+    comments_count_min = django_filters.NumberFilter(field_name='comments_count', lookup_expr='gte')
+    comments_count_max = django_filters.NumberFilter(field_name='comments_count', lookup_expr='lte')
+    last_commented_after = django_filters.IsoDateTimeFilter(field_name='last_commented_at', lookup_expr='gte')
+    last_commented_before = django_filters.IsoDateTimeFilter(field_name='last_commented_at', lookup_expr='lte')
+    price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price_max = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    author = django_filters.NumberFilter(field_name='author_id')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lte')
+    has_image = django_filters.BooleanFilter(method='filter_has_image')
+    ordering = django_filters.OrderingFilter(
+        fields=('created_at', 'comments_count', 'last_commented_at', 'price'),
     )
 
     class Meta:
         model = Ad
-        fields = ('title',)
+        fields = ('q', 'title', 'comments_count_min', 'comments_count_max',
+                  'last_commented_after', 'last_commented_before', 'price_min', 'price_max',
+                  'author', 'created_after', 'created_before', 'has_image',)
+
+    def filter_search(self, queryset, name, value):
+        """
+        Передаёт поисковый запрос поисковому бэкенду.
+        """
+        if name == 'title' and self.data.get('q'):
+            return queryset
+        return get_search_backend().search(queryset, value)
+
+    def filter_has_image(self, queryset, name, value):
+        """
+        Оставляет объявления с изображением или без него.
+
+        Условие совпадает с условием частичного индекса ad_with_image_idx.
+        """
+        if value:
+            return queryset.filter(AD_HAS_IMAGE)
+        return queryset.exclude(AD_HAS_IMAGE)
+
+
+# Параметры, которые не учитываются при подсчёте фасетов: распределение по
+# ценам показывает все диапазоны, а не только выбранный.
+FACET_IGNORED_PARAMS = ('price_min', 'price_max', 'ordering', 'cursor', 'page_size')
+
+
+def price_facets(queryset):
+    """
+    Считает фасеты боковой панели фильтров одним агрегирующим запросом.
+
+    Диапазоны цен задаёт настройка AD_PRICE_BUCKETS: каждая граница - начало
+    диапазона, последний диапазон не ограничен сверху.
+
+    Параметры:
+        queryset (QuerySet): Отфильтрованные объявления.
+
+    Возврат:
+        dict: Общее число объявлений (count), число объявлений с изображением
+            (with_image) и без цены (without_price), наименьшая и наибольшая
+            цена (price_min, price_max) и диапазоны цен с числом объявлений
+            (price_buckets).
+    """
+    bounds = settings.AD_PRICE_BUCKETS
+    ranges = list(zip(bounds, [*bounds[1:], None]))
+    aggregates = {
+        'count': Count('pk'),
+        'with_image': Count('pk', filter=AD_HAS_IMAGE),
+        'without_price': Count('pk', filter=Q(price__isnull=True)),
+        'price_min': Min('price'),
+        'price_max': Max('price'),
+    }
+    for number, (low, high) in enumerate(ranges):
+        condition = Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+        aggregates[f'bucket_{number}'] = Count('pk', filter=condition)
+    values = queryset.order_by().aggregate(**aggregates)
+    return {
+        'count': values['count'],
+        'with_image': values['with_image'],
+        'without_price': values['without_price'],
+        'price_min': values['price_min'],
+        'price_max': values['price_max'],
+        'price_buckets': [
+            {'min': low, 'max': high, 'count': values[f'bucket_{number}']}
+            for number, (low, high) in enumerate(ranges)
+        ],
+    }
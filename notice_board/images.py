@@ -0,0 +1,151 @@
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+# Форматы вариантов: расширение файла и имя формата Pillow.
+FORMATS = (('webp', 'WEBP'), ('jpeg', 'JPEG'))
+
+
+def variant_name(source_name, variant, extension):
+    """
+    Возвращает имя файла варианта: ads/photo.jpg -> ads/variants/photo_thumb.webp.
+    """
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}_{variant}.{extension}')
+
+
+def _encode(image, pillow_format):
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    # Метаданные (EXIF) не передаются при сохранении и в файл не попадают.
+    image.save(buffer, format=pillow_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """
+    Создаёт уменьшенные копии изображения в форматах WebP и JPEG.
+
+    Изображение поворачивается согласно EXIF-ориентации, после чего EXIF
+    отбрасывается. Имена файлов вариантов детерминированы, существующие
+    файлы перезаписываются, поэтому повторная генерация не плодит копий.
+
+    Параметры:
+        field_file (FieldFile): Исходное изображение.
+
+    Возврат:
+        dict: {'source': имя исходного файла,
+               'variants': {вариант: {'width', 'height', 'webp', 'jpeg'}}}.
+    """
+    storage = field_file.storage
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {}
+    for variant, size in settings.IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        record = {'width': resized.width, 'height': resized.height}
+        for extension, pillow_format in FORMATS:
+            name = variant_name(field_file.name, variant, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            record[extension] = storage.save(name, ContentFile(_encode(resized, pillow_format)))
+        variants[variant] = record
+    return {'source': field_file.name, 'variants': variants}
+
+
+def detect_content_type(storage, name):
+    """
+    Определяет тип изображения по содержимому файла, а не по имени.
+
+    Параметры:
+        storage (Storage): Хранилище файла.
+        name (str): Имя файла в хранилище.
+
+    Возврат:
+        str: MIME-тип формата Pillow (image/jpeg, image/png, ...) или None,
+            если файл не является целым изображением.
+    """
+    try:
+        with storage.open(name, 'rb') as file, Image.open(file) as image:
+            image.verify()
+            return Image.MIME.get(image.format)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def delete_image_files(storage, name, image_variants):
+    """
+    Удаляет из хранилища исходное изображение и все его варианты.
+
+    Параметры:
+        storage (Storage): Хранилище файлов.
+        name (str): Имя исходного файла или пустая строка.
+        image_variants (dict): Описание вариантов из generate_variants.
+    """
+    names = [name] if name else []
+    for record in ((image_variants or {}).get('variants') or {}).values():
+        names += [record[extension] for extension, _ in FORMATS if record.get(extension)]
+    for name in names:
+        storage.delete(name)
+
+
+def needs_variants(instance):
+    """
+    Проверяет, нужно ли (пере)создать варианты изображения экземпляра.
+    """
+    source = instance.image.name if instance.image else None
+    return (instance.image_variants or {}).get('source') != source
+
+
+def process_image_variants(model_label, pk):
+    """
+    Создаёт варианты изображения для записи и сохраняет их описание.
+
+    Операция идемпотентна: если варианты уже созданы для текущего файла,
+    ничего не делается. Описание сохраняется через UPDATE с условием на имя
+    файла, чтобы не затереть результат для изображения, заменённого
+    во время обработки.
+
+    Параметры:
+        model_label (str): Модель в формате 'app_label.ModelName'.
+        pk (int): Идентификатор записи.
+    """
+    from notice_board.cache import bump_generations, invalidate_ad
+
+    model = apps.get_model(model_label)
+    instance = model._base_manager.filter(pk=pk).only('pk', 'image', 'image_variants').first()
+    if instance is None or not needs_variants(instance):
+        return
+
+    if instance.image:
+        image_variants = generate_variants(instance.image)
+        unchanged = Q(image=instance.image.name)
+    else:
+        image_variants = {}
+        unchanged = Q(image__isnull=True) | Q(image='')
+    values = {'image_variants': image_variants}
+    if model_label == 'notice_board.Ad':
+        # Варианты видны в ответах API, поэтому меняют валидаторы условных запросов.
+        values['updated_at'] = timezone.now()
+    updated = model._base_manager.filter(unchanged, pk=pk).update(**values)
+    if not updated:
+        return
+    if model_label == 'notice_board.Ad':
+        invalidate_ad(pk)
+    else:
+        bump_generations(f'user:{pk}')
+
@@ -0,0 +1,59 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notice_board.exchange import EXPORT_FIELDS, FORMATS, WRITERS, detect_format
+from notice_board.models import Ad
+
+
+class Command(BaseCommand):
+    """
+    Потоковый экспорт объявлений в JSON Lines или CSV.
+
+    Объявления читаются через iterator(chunk_size=...), в PostgreSQL это
+    серверный курсор, поэтому расход памяти не зависит от размера таблицы.
+    """
+    help = 'Экспортирует объявления в файл JSON Lines или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help="Путь к файлу или '-' для стандартного вывода")
+        parser.add_argument('--format', choices=FORMATS, help='Формат файла, по умолчанию - по расширению')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Число строк, читаемых из курсора за раз')
+        parser.add_argument('--progress-every', type=int, default=100000, help='Как часто сообщать о прогрессе')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = detect_format(output, options['format'])
+
+        if output == '-':
+            self.export(sys.stdout, fmt, options)
+            return
+        try:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                self.export(stream, fmt, options)
+        except OSError as error:
+            raise CommandError(f'Не удалось записать файл: {error}')
+
+    def export(self, stream, fmt, options):
+        writer = WRITERS[fmt](stream)
+        rows = Ad.objects.order_by('pk').values_list(
+            'pk', 'title', 'price', 'description', 'author__email', 'image', 'created_at',
+        ).iterator(chunk_size=options['chunk_size'])
+
+        started = time.monotonic()
+        exported = 0
+        for values in rows:
+            row = dict(zip(EXPORT_FIELDS, values))
+            row['created_at'] = row['created_at'].isoformat()
+            writer.write(row)
+            exported += 1
+            if exported % options['progress_every'] == 0:
+                self.report(exported, started)
+        self.report(exported, started)
+
+    def report(self, exported, started):
+        # Прогресс пишется в stderr, чтобы не смешиваться с данными при выводе в stdout.
+        elapsed = time.monotonic() - started
+        rate = exported / max(elapsed, 1e-6)
+        self.stderr.write(f'Экспортировано {exported} объявлений ({rate:.0f} в секунду)')
@@ -0,0 +1,105 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notice_board.cache import bump_generations
+from notice_board.exchange import FORMATS, RowError, detect_format, parse_row, read_rows
+from notice_board.events import FEED_CHANNEL, build_event, publish
+from notice_board.models import Ad
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Потоковый импорт объявлений из JSON Lines или CSV.
+
+    Файл читается построчно, объявления создаются через bulk_create
+    пакетами по --batch-size записей, каждый пакет - в своей транзакции.
+    Авторы ищутся по email одним запросом на пакет, найденные
+    идентификаторы запоминаются в словаре на всё время импорта.
+    Строки с ошибками и неизвестными авторами пропускаются. События по
+    отдельным объявлениям не рассылаются: после каждого пакета подписчики
+    ленты получают одно событие ads.imported с числом созданных объявлений.
+    """
+    help = 'Импортирует объявления из файла JSON Lines или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Путь к файлу или '-' для стандартного ввода")
+        parser.add_argument('--format', choices=FORMATS, help='Формат файла, по умолчанию - по расширению')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Число объявлений в одном INSERT')
+        parser.add_argument('--max-errors', type=int, default=20, help='Сколько ошибок выводить подробно')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        self.batch_size = options['batch_size']
+        self.max_errors = options['max_errors']
+        self.authors = {}
+        self.created = self.skipped = 0
+        self.started = time.monotonic()
+
+        if path == '-':
+            self.import_stream(sys.stdin, fmt)
+        else:
+            try:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    self.import_stream(stream, fmt)
+            except OSError as error:
+                raise CommandError(f'Не удалось открыть файл: {error}')
+
+        bump_generations('ads')
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {self.created}, пропущено {self.skipped} за {self.elapsed():.1f} с'
+        ))
+
+    def import_stream(self, stream, fmt):
+        batch = []
+        for number, row in read_rows(stream, fmt):
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                batch.append((number, parse_row(row)))
+            except RowError as error:
+                self.report_error(number, error)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+
+    def flush(self, batch):
+        """
+        Разрешает авторов пакета и сохраняет объявления одним bulk_create.
+        """
+        unknown = {row['author_email'] for _, row in batch
+                   if row['author_email'] and row['author_email'] not in self.authors}
+        if unknown:
+            self.authors.update(User.objects.filter(email__in=unknown).values_list('email', 'pk'))
+
+        ads = []
+        for number, row in batch:
+            email = row.pop('author_email')
+            if email and email not in self.authors:
+                self.report_error(number, RowError(f'неизвестный автор {email}'))
+                continue
+            ads.append(Ad(author_id=self.authors.get(email), **row))
+
+        with transaction.atomic():
+            Ad.objects.bulk_create(ads, batch_size=self.batch_size)
+            if ads:
+                event = build_event('ads', 'imported', None, {'count': len(ads)})
+                transaction.on_commit(lambda: publish([FEED_CHANNEL], event))
+        self.created += len(ads)
+
+        rate = self.created / max(self.elapsed(), 1e-6)
+        self.stdout.write(f'Импортировано {self.created} объявлений ({rate:.0f} в секунду)')
+
+    def report_error(self, number, error):
+        self.skipped += 1
+        if self.skipped <= self.max_errors:
+            self.stderr.write(f'Строка {number}: {error}')
+
+    def elapsed(self):
+        return time.monotonic() - self.started
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notice_board.purge import purge_batch
+from notice_board.tasks import purge_deleted
+
+
+class Command(BaseCommand):
+    """
+    Окончательно удаляет мягко удалённые отзывы, объявления и пользователей.
+
+    Записи удаляются порциями по --batch-size в коротких транзакциях
+    (см. notice_board.purge), пока удалять есть что. Команду можно
+    запускать по расписанию, если SOFT_DELETE_RETENTION больше нуля
+    или очередь задач была недоступна. С --background очистка ставится
+    в очередь фоновых задач.
+    """
+    help = 'Окончательно удаляет мягко удалённые записи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Число записей в одной порции, по умолчанию PURGE_BATCH_SIZE')
+        parser.add_argument('--background', action='store_true',
+                            help='Поставить очистку в очередь фоновых задач')
+
+    def handle(self, *args, **options):
+        if options['background']:
+            purge_deleted.delay()
+            self.stdout.write(self.style.SUCCESS('Очистка поставлена в очередь задач'))
+            return
+
+        started = time.monotonic()
+        batch_size = options['batch_size'] or settings.PURGE_BATCH_SIZE
+        total = 0
+        while True:
+            deleted = purge_batch(batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+            self.stdout.write(f'Удалено {total} записей')
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено {total} записей за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from notice_board.cache import bump_generations
+from notice_board.counters import rebuild_comment_counters
+from notice_board.models import Ad
+from notice_board.tasks import rebuild_ad_counters
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает comments_count и last_commented_at у всех объявлений.
+
+    Объявления обрабатываются диапазонами первичных ключей, каждый диапазон
+    обновляется одним UPDATE с подзапросами, поэтому команда не загружает
+    объявления в память и не держит долгих блокировок. С --background
+    диапазоны ставятся в очередь фоновых задач и обрабатываются исполнителями.
+    """
+    help = 'Пересчитывает счётчики отзывов объявлений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Число идентификаторов объявлений в одном UPDATE')
+        parser.add_argument('--background', action='store_true',
+                            help='Поставить пересчёт в очередь фоновых задач')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Ad.objects.aggregate(start=Min('pk'), end=Max('pk'))
+        if bounds['start'] is None:
+            self.stdout.write('Объявлений нет')
+            return
+
+        if options['background']:
+            batches = 0
+            for start in range(bounds['start'], bounds['end'] + 1, batch_size):
+                rebuild_ad_counters.delay(start, start + batch_size)
+                batches += 1
+            self.stdout.write(self.style.SUCCESS(f'Поставлено в очередь задач: {batches}'))
+            return
+
+        started = time.monotonic()
+        updated = 0
+        for start in range(bounds['start'], bounds['end'] + 1, batch_size):
+            updated += rebuild_comment_counters(start, start + batch_size)
+            self.stdout.write(f'Обработано до pk={start + batch_size - 1}: {updated} объявлений')
+
+        bump_generations('ads')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано {updated} объявлений за {elapsed:.1f} с'
+        ))
@@ -0,0 +1,97 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, transaction
+
+# Число объявлений, для которых поисковый вектор заполняется в одной транзакции.
+BACKFILL_BATCH_SIZE = 5000
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION notice_board_ad_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notice_board_ad_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON notice_board_ad
+    FOR EACH ROW EXECUTE FUNCTION notice_board_ad_search_vector_update();
+"""
+
+# Заполнение вектора существующих объявлений: UPDATE OF title вызывает триггер.
+BACKFILL_SQL = """
+UPDATE notice_board_ad SET title = title
+WHERE id IN (SELECT id FROM notice_board_ad WHERE id > %s ORDER BY id LIMIT %s)
+RETURNING id
+"""
+
+# CREATE INDEX CONCURRENTLY нельзя выполнять несколькими командами в одном запросе.
+SEARCH_INDEXES_SQL = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS ad_search_vector_gin ON notice_board_ad USING gin (search_vector)',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS ad_title_trgm_gin ON notice_board_ad USING gin (title gin_trgm_ops)',
+)
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS ad_title_trgm_gin;
+DROP INDEX IF EXISTS ad_search_vector_gin;
+DROP TRIGGER IF EXISTS notice_board_ad_search_vector_trigger ON notice_board_ad;
+DROP FUNCTION IF EXISTS notice_board_ad_search_vector_update();
+"""
+
+
+def run_on_postgresql(sql):
+    """
+    Выполняет SQL только в PostgreSQL: в остальных СУБД поиск работает
+    через запасной бэкенд и триггер с индексами не нужны.
+    """
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in ([sql] if isinstance(sql, str) else sql):
+                schema_editor.execute(statement, params=None)
+    return operation
+
+
+def backfill_search_vector(apps, schema_editor):
+    """
+    Заполняет поисковый вектор существующих объявлений порциями по первичному
+    ключу, каждая порция - в своей короткой транзакции, чтобы не блокировать
+    всю таблицу на время заполнения.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    last_pk = 0
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(BACKFILL_SQL, [last_pk, BACKFILL_BATCH_SIZE])
+            pks = [row[0] for row in cursor.fetchall()]
+        if not pks:
+            break
+        last_pk = max(pks)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не может выполняться внутри транзакции,
+    # заполнение вектора идёт порциями в отдельных транзакциях.
+    atomic = False
+
+    dependencies = [
+        ('notice_board', '0003_ad_created_at_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='ad',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Заполняется триггером PostgreSQL по названию и описанию', null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(SEARCH_VECTOR_SQL),
+            run_on_postgresql(DROP_SEARCH_VECTOR_SQL),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        migrations.RunPython(run_on_postgresql(SEARCH_INDEXES_SQL), migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notice_board', '0004_ad_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, help_text='Число отзывов к объявлению', verbose_name='количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, help_text='Дата и время последнего отзыва к объявлению', null=True, verbose_name='дата последнего отзыва'),
+        ),
+    ]
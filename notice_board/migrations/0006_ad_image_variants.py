@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notice_board', '0005_ad_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Уменьшенные копии изображения, создаются в фоне после загрузки', verbose_name='варианты изображения'),
+        ),
+    ]
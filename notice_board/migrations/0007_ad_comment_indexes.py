@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+from notice_board.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не может выполняться внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ('notice_board', '0006_ad_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ad',
+            index=models.Index(fields=['author', '-created_at'], name='ad_author_created_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ad',
+            index=models.Index(condition=models.Q(('price__isnull', False)), fields=['price'], name='ad_priced_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['ad', 'created_at', 'id'], name='comment_ad_created_at_idx'),
+        ),
+    ]
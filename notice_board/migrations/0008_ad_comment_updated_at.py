@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+from notice_board.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не может выполняться внутри транзакции.
+    # Существующие записи получают updated_at, равный времени миграции.
+    atomic = False
+
+    dependencies = [
+        ('notice_board', '0007_ad_comment_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Дата и время последнего изменения объявления, включая счётчики отзывов', verbose_name='дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Дата и время последнего изменения комментария', verbose_name='дата изменения'),
+        ),
+        AddIndexConcurrently(
+            model_name='ad',
+            index=models.Index(fields=['updated_at'], name='ad_updated_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['ad', 'updated_at'], name='comment_ad_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+from notice_board.operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY не могут выполняться внутри транзакции.
+    # Частичный индекс ленты сначала строится под временным именем, и только
+    # потом старый удаляется, а новый переименовывается: лента не остаётся без индекса.
+    atomic = False
+
+    dependencies = [
+        ('notice_board', '0008_ad_comment_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Дата мягкого удаления, запись окончательно удаляется в фоне', null=True, verbose_name='дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Дата мягкого удаления, запись окончательно удаляется в фоне', null=True, verbose_name='дата удаления'),
+        ),
+        AddIndexConcurrently(
+            model_name='ad',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-created_at', '-id'], name='ad_created_at_id_new_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='ad',
+            name='ad_created_at_id_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='ad',
+            new_name='ad_created_at_id_idx',
+            old_name='ad_created_at_id_new_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='ad',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='ad_deleted_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='comment_deleted_at_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 21:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+from notice_board.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не может выполняться внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ('notice_board', '0009_ad_comment_deleted_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ad',
+            index=models.Index(condition=models.Q(('image__gt', ''), ('deleted_at__isnull', True)), fields=['-created_at', '-id'], name='ad_with_image_idx'),
+        ),
+    ]
@@ -0,0 +1,425 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from config.performance import measure_serialization
+from notice_board.cache import build_response_key, get_generations, get_modified_at, get_or_compute, settled_reads
+from notice_board.fast_serializers import FastSerializer, get_ordering_paths
+from notice_board.renderers import FastJSONRenderer
+
+
+class QueryPlan:
+    """
+    План загрузки связанных данных, выведенный из полей сериализатора.
+
+    Атрибуты:
+        select_related (set): Пути связей «к одному», загружаемые JOIN-ом.
+        prefetch_related (set): Пути связей «ко многим», загружаемые отдельным запросом.
+        only (set): Поля, которые нужно загрузить; остальные откладываются.
+        unrestricted (set): Пути моделей, поля которых нельзя ограничить,
+            потому что сериализатор читает у них не только поля модели.
+            Пустая строка означает основную модель.
+    """
+
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = set()
+        self.unrestricted = set()
+
+    def apply(self, queryset, restrict_fields=True):
+        """
+        Применяет план к набору записей.
+
+        Параметры:
+            queryset (QuerySet): Исходный набор записей.
+            restrict_fields (bool): Ограничивать ли загружаемые поля через only().
+
+        Возврат:
+            queryset (QuerySet): Набор записей с select_related/prefetch_related/only.
+        """
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if restrict_fields and '' not in self.unrestricted:
+            only = set(self.only)
+            # Поля сортировки нужны пагинатору для построения курсора.
+            for field in queryset.query.order_by:
+                if isinstance(field, str):
+                    name = field.lstrip('-')
+                    if name not in queryset.query.annotations:
+                        only.add(name)
+            only = {path for path in only if self._parent(path) not in self.unrestricted}
+            queryset = queryset.only(*sorted(only))
+        return queryset
+
+    @staticmethod
+    def _parent(path):
+        return path.rpartition('__')[0]
+
+
+def build_query_plan(serializer_class, model):
+    """
+    Строит план загрузки по объявленным полям сериализатора.
+
+    Для каждого поля разбирается его source: промежуточные атрибуты,
+    являющиеся связями, превращаются в select_related (связи «к одному»)
+    или prefetch_related (связи «ко многим»), конечные атрибуты - в поля
+    для only(). Вложенные сериализаторы обрабатываются рекурсивно.
+    Если поле читает атрибут, которого нет среди полей модели (свойство,
+    метод или source='*'), поля этой модели не ограничиваются.
+
+    Параметры:
+        serializer_class (type): Класс сериализатора.
+        model (Model): Модель, записи которой сериализуются.
+
+    Возврат:
+        QueryPlan: План загрузки.
+    """
+    plan = QueryPlan()
+    _collect(serializer_class(), model, '', plan)
+    return plan
+
+
+def _join(prefix, name):
+    return f'{prefix}__{name}' if prefix else name
+
+
+def _collect(serializer, model, prefix, plan):
+    plan.only.add(_join(prefix, model._meta.pk.name))
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            plan.unrestricted.add(prefix)
+            continue
+        _collect_source(field, field.source_attrs, model, prefix, plan)
+
+
+def _collect_source(field, attrs, model, prefix, plan):
+    for index, attr in enumerate(attrs):
+        is_last = index == len(attrs) - 1
+        if attr == 'pk':
+            attr = model._meta.pk.name
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            model_field = next((f for f in model._meta.concrete_fields if f.attname == attr), None)
+            if model_field is None:
+                plan.unrestricted.add(prefix)
+                return
+            # Атрибут вида author_id: достаточно самого внешнего ключа.
+            plan.only.add(_join(prefix, model_field.name))
+            return
+
+        path = _join(prefix, model_field.name)
+        if not model_field.is_relation:
+            plan.only.add(path)
+            return
+
+        if model_field.many_to_many or model_field.one_to_many:
+            plan.prefetch_related.add(path)
+            nested = getattr(field, 'child', None)
+            if is_last and isinstance(nested, serializers.BaseSerializer):
+                _collect_prefetched(nested, path, plan)
+            return
+
+        if model_field.concrete:
+            plan.only.add(path)
+        if is_last:
+            if isinstance(field, serializers.BaseSerializer):
+                plan.select_related.add(path)
+                _collect(field, model_field.related_model, path, plan)
+            return
+        plan.select_related.add(path)
+        model, prefix = model_field.related_model, path
+
+
+def _collect_prefetched(serializer, path, plan):
+    # Связи вложенного сериализатора догружаются вместе с prefetch_related.
+    nested_plan = QueryPlan()
+    _collect(serializer, serializer.Meta.model, '', nested_plan)
+    for related in nested_plan.select_related:
+        plan.prefetch_related.add(_join(path, related))
+    for related in nested_plan.prefetch_related:
+        plan.prefetch_related.add(_join(path, related))
+
+
+class QueryOptimizerMixin:
+    """
+    Миксин представления, устраняющий N+1 запросы при сериализации.
+
+    По полям сериализатора представления строится план загрузки
+    (select_related, prefetch_related и only), который применяется к набору
+    записей после фильтрации. Поля ограничиваются только для безопасных
+    методов: при сохранении экземпляр должен быть загружен полностью.
+    План кешируется на уровне класса сериализатора.
+    """
+    _query_plans = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = self.get_query_plan(queryset.model)
+        return plan.apply(queryset, restrict_fields=self.request.method in SAFE_METHODS)
+
+    def get_query_plan(self, model):
+        """
+        Возвращает план загрузки для сериализатора представления.
+        """
+        serializer_class = self.get_serializer_class()
+        key = (serializer_class, model)
+        if key not in self._query_plans:
+            self._query_plans[key] = build_query_plan(serializer_class, model)
+        return self._query_plans[key]
+
+
+class CachedResponseMixin:
+    """
+    Миксин представления, кеширующий ответы GET-запросов.
+
+    Ключ ответа строится из пути, параметров запроса и номеров поколений
+    областей кеша, которые возвращает get_cache_scopes(). Сигналы моделей
+    увеличивают номера поколений, поэтому изменённые данные сразу получают
+    новый ключ. Права доступа проверяются до обращения к кешу, кешируются
+    только успешные ответы. В заголовке X-Cache возвращается HIT или MISS.
+    """
+    cache_name = None
+
+    def get_cache_scopes(self):
+        """
+        Возвращает области кеша, от которых зависит ответ.
+        """
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        name = self.cache_name or type(self).__name__
+        scopes = self.get_cache_scopes()
+        key = build_response_key(name, request, scopes)
+        response = None
+
+        def compute():
+            nonlocal response
+            with settled_reads(scopes):
+                response = super(CachedResponseMixin, self).get(request, *args, **kwargs)
+            return (response.data, response.status_code), response.status_code == 200
+
+        (data, status_code), hit = get_or_compute(name, key, compute)
+        if response is None:
+            response = Response(data, status=status_code)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+def conditional_response(request, etag, last_modified):
+    """
+    Возвращает 304 Not Modified, если у клиента актуальная версия, иначе None.
+    """
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified) if last_modified is not None else None,
+    )
+
+
+def set_validator_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalResponseMixin:
+    """
+    Миксин представления, отвечающий 304 Not Modified на условные GET-запросы.
+
+    До загрузки и сериализации записей одним агрегирующим запросом
+    вычисляются Max(updated_at) и Count по набору записей ответа.
+    Last-Modified - наибольшая дата изменения, ETag строится из неё, числа
+    записей (оно меняется при удалении), параметров запроса и поколений
+    кеша get_validator_scopes() - данных других моделей, попадающих в ответ.
+    При совпадении с If-None-Match или If-Modified-Since записи не загружаются.
+    Для пустого набора валидаторы не вычисляются: ответ и так дешёвый,
+    а у карточки несуществующего объекта должен остаться ответ 404.
+
+    Если ответы представления кешируются (get_cache_scopes()), валидаторы
+    кешируются под теми же поколениями, и повторные запросы обходятся без базы.
+
+    Для больших наборов (лента) агрегат по всем записям дороже самой
+    страницы, поэтому при validators_from_generations валидаторы строятся
+    только из поколений и времени изменения областей кеша, без запросов к базе.
+    """
+    last_modified_field = 'updated_at'
+    validator_scopes = ()
+    validators_from_generations = False
+
+    def get_validator_queryset(self):
+        """
+        Возвращает набор записей, от которых зависит ответ.
+
+        По умолчанию - отфильтрованный queryset представления,
+        для карточки объекта - только сам объект.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validator_scopes(self):
+        """
+        Возвращает области кеша данных других моделей, попадающих в ответ.
+        """
+        return self.validator_scopes
+
+    def get_validator_aggregates(self):
+        return {'last_modified': Max(self.last_modified_field), 'count': Count('pk')}
+
+    def get_validators(self, request, stats):
+        """
+        Возвращает валидаторы ответа по результату агрегации.
+
+        Параметры:
+            request (Request): Текущий запрос.
+            stats (dict): Результат агрегации get_validator_aggregates().
+
+        Возврат:
+            tuple: ETag и Last-Modified (timestamp) или None для пустого набора.
+        """
+        last_modified = stats['last_modified']
+        if last_modified is None:
+            return None
+        validator_scopes = self.get_validator_scopes()
+        generations = get_generations(*validator_scopes) if validator_scopes else []
+        raw = f'{stats["count"]}|{last_modified.isoformat()}|{generations}|{sorted(request.GET.lists())}'
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        return etag, last_modified.timestamp()
+
+    def get_validator_cache_scopes(self):
+        """
+        Возвращает области кеша для валидаторов или None, если их не кешировать.
+        """
+        get_cache_scopes = getattr(self, 'get_cache_scopes', None)
+        return get_cache_scopes() if get_cache_scopes is not None else None
+
+    def get_validator_cache_name(self):
+        return f'{getattr(self, "cache_name", None) or type(self).__name__}:validators'
+
+    def get_generation_validators(self, request):
+        """
+        Возвращает валидаторы по поколениям областей кеша ответа и get_validator_scopes().
+
+        Поколение увеличивается при каждом изменении данных области, поэтому
+        ETag меняется вместе с ответом; Last-Modified - время последнего изменения.
+        """
+        scopes = [*(self.get_validator_cache_scopes() or ()), *self.get_validator_scopes()]
+        raw = f'{get_generations(*scopes)}|{sorted(request.GET.lists())}'
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        return etag, get_modified_at(*scopes)
+
+    def compute_validators(self, request):
+        stats = self.get_validator_queryset().aggregate(**self.get_validator_aggregates())
+        return self.get_validators(request, stats)
+
+    def resolve_validators(self, request):
+        """
+        Возвращает валидаторы из кеша или вычисляет их агрегирующим запросом.
+        """
+        if self.validators_from_generations:
+            return self.get_generation_validators(request)
+        scopes = self.get_validator_cache_scopes()
+        if scopes is None:
+            return self.compute_validators(request)
+        name = self.get_validator_cache_name()
+        key = build_response_key(name, request, scopes)
+        def compute():
+            with settled_reads(scopes):
+                # Значение оборачивается в кортеж: None у пустого набора тоже кешируется.
+                return (self.compute_validators(request),), True
+
+        (validators,), _ = get_or_compute(name, key, compute)
+        return validators
+
+    def conditional(self, request, respond):
+        """
+        Возвращает 304, если у клиента актуальная версия, иначе результат respond()
+        с заголовками ETag и Last-Modified.
+        """
+        validators = self.resolve_validators(request)
+        if validators is None:
+            return respond()
+        not_modified = conditional_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        response = respond()
+        if response.status_code == 200:
+            set_validator_headers(response, *validators)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        return self.conditional(request, lambda: super(ConditionalResponseMixin, self).get(request, *args, **kwargs))
+
+
+class FastSerializationMixin:
+    """
+    Миксин представления, отдающий list и retrieve через FastSerializer.
+
+    Записи выбираются через values() без создания экземпляров моделей
+    и сериализуются в те же данные, что и сериализатор представления.
+    Объектные права retrieve проверяются по словарю значений, поэтому
+    миксин подходит представлениям, права которых не читают атрибуты
+    объекта. Отключается настройкой FAST_SERIALIZERS.
+
+    Построение данных ответа (FastSerializer или сериализатором DRF)
+    учитывается во времени сериализации запроса (config.performance).
+    """
+    renderer_classes = [FastJSONRenderer] + [
+        renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+        if not issubclass(renderer, JSONRenderer)
+    ]
+
+    def get_fast_serializer(self):
+        return FastSerializer(self.get_serializer_class(), self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if settings.FAST_SERIALIZERS:
+            serializer = self.get_fast_serializer()
+            queryset = serializer.values(queryset, get_ordering_paths(queryset, self.paginator))
+            serialize = serializer.serialize
+        else:
+            serialize = lambda instances: self.get_serializer(instances, many=True).data
+        # Записи загружаются до сериализации: время запросов к базе
+        # не должно попадать в замер сериализации.
+        page = self.paginate_queryset(queryset)
+        instances = page if page is not None else list(queryset)
+        with measure_serialization():
+            data = serialize(instances)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            instance = self.get_object()
+            with measure_serialization():
+                data = self.get_serializer(instance).data
+            return Response(data)
+        serializer = self.get_fast_serializer()
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        with measure_serialization():
+            data = serializer.to_representation(row)
+        return Response(data)
@@ -1,9 +1,83 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
 
 from users.models import User
 
+# Отправляется после мягкого удаления записи; получатели те же, что у post_delete.
+soft_deleted = Signal()
+# Отправляется после bulk_create и bulk_update, которые не вызывают post_save.
+# Аргументы: instances - сохранённые записи, created - созданы ли они.
+bulk_saved = Signal()
 
-class Ad(models.Model):
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """
+        Помечает записи удалёнными одним UPDATE без сигналов.
+
+        Возврат:
+            int: Число помеченных записей.
+        """
+        return self.update(deleted_at=timezone.now())
+
+
+class SoftDeleteManager(models.Manager):
+    """
+    Менеджер по умолчанию для моделей с мягким удалением: только неудалённые записи.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    Абстрактная модель с мягким удалением.
+
+    Удалённая запись получает дату в deleted_at и исчезает из objects,
+    но остаётся в all_objects (и в связях «к одному», которые идут через
+    базовый менеджер), пока её не удалит фоновая очистка
+    (notice_board.purge). Так запрос на удаление не собирает и не удаляет
+    связанные записи каскадом.
+    """
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='дата удаления',
+        help_text='Дата мягкого удаления, запись окончательно удаляется в фоне'
+    )
+
+    objects = SoftDeleteManager.from_queryset(SoftDeleteQuerySet)()
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self):
+        """
+        Помечает запись удалённой и отправляет сигнал soft_deleted.
+        """
+        self.deleted_at = timezone.now()
+        type(self).all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at)
+        soft_deleted.send(sender=type(self), instance=self)
+
+
+class CommentQuerySet(SoftDeleteQuerySet):
+    def for_ad(self, ad_pk):
+        """
+        Возвращает отзывы объявления ad_pk; у удалённого объявления отзывов нет.
+        """
+        return self.filter(ad=ad_pk, ad__deleted_at__isnull=True)
+
+
+# Объявление с изображением: пустая строка и NULL означают, что изображения нет.
+AD_HAS_IMAGE = models.Q(image__gt='')
+
+
+class Ad(SoftDeleteModel):
     """
     Модель, представляющая объявления.
     """
@@ -38,12 +112,41 @@ class Ad(models.Model):
         verbose_name='дата создания',
         help_text='Дата и время создания объявления'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='дата изменения',
+        help_text='Дата и время последнего изменения объявления, включая счётчики отзывов'
+    )
     image = models.ImageField(
         upload_to='ads/',
         null=True,
         blank=True,
         verbose_name='изображение'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='варианты изображения',
+        help_text='Уменьшенные копии изображения, создаются в фоне после загрузки'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='количество отзывов',
+        help_text='Число отзывов к объявлению'
+    )
+    last_commented_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='дата последнего отзыва',
+        help_text='Дата и время последнего отзыва к объявлению'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='поисковый вектор',
+        help_text='Заполняется триггером PostgreSQL по названию и описанию'
+    )
 
     def __str__(self):
         """
@@ -54,12 +157,33 @@ class Ad(models.Model):
     class Meta:
         verbose_name = 'объявление'
         verbose_name_plural = 'объявления'
+        indexes = [
+            # Ключ курсорной пагинации ленты: ORDER BY created_at DESC, id DESC.
+            # Удалённые объявления в ленту не попадают и в индекс тоже.
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(deleted_at__isnull=True),
+                         name='ad_created_at_id_idx'),
+            # Объявления автора в порядке ленты.
+            models.Index(fields=['author', '-created_at'], name='ad_author_created_at_idx'),
+            # Фильтры и сортировка по цене: объявления без цены в индекс не попадают.
+            models.Index(fields=['price'], condition=models.Q(price__isnull=False), name='ad_priced_idx'),
+            # Лента объявлений с изображением (фильтр has_image).
+            models.Index(fields=['-created_at', '-id'], condition=AD_HAS_IMAGE & models.Q(deleted_at__isnull=True),
+                         name='ad_with_image_idx'),
+            # Max(updated_at) для валидаторов условных запросов.
+            models.Index(fields=['updated_at'], name='ad_updated_at_idx'),
+            # Поиск удалённых объявлений фоновой очисткой.
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False),
+                         name='ad_deleted_at_idx'),
+        ]
 
 
-class Comment(models.Model):
+class Comment(SoftDeleteModel):
     """
     Модель, представляющая комментарии к объявлению.
     """
+    objects = SoftDeleteManager.from_queryset(CommentQuerySet)()
+    all_objects = models.Manager.from_queryset(CommentQuerySet)()
+
     text = models.TextField(verbose_name='текст', help_text='Текст комментария')
     author = models.ForeignKey(
         User,
@@ -75,6 +199,11 @@ class Comment(models.Model):
         verbose_name='дата создания',
         help_text='Дата и время создания комментария'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='дата изменения',
+        help_text='Дата и время последнего изменения комментария'
+    )
     ad = models.ForeignKey(
         Ad,
         on_delete=models.CASCADE,
@@ -94,3 +223,12 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'отзыв'
         verbose_name_plural = 'отзывы'
+        indexes = [
+            # Отзывы объявления в хронологическом порядке.
+            models.Index(fields=['ad', 'created_at', 'id'], name='comment_ad_created_at_idx'),
+            # Max(updated_at) отзывов объявления для валидаторов условных запросов.
+            models.Index(fields=['ad', 'updated_at'], name='comment_ad_updated_at_idx'),
+            # Поиск удалённых отзывов фоновой очисткой.
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False),
+                         name='comment_deleted_at_idx'),
+        ]
@@ -0,0 +1,44 @@
+from django.contrib.postgres import operations
+from django.db.migrations import AddIndex, RemoveIndex
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """
+    Создаёт индекс без блокировки записи в таблицу.
+
+    В PostgreSQL выполняется CREATE INDEX CONCURRENTLY (миграция должна
+    быть объявлена с atomic = False), в остальных СУБД - обычный CREATE INDEX.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrently(operations.RemoveIndexConcurrently):
+    """
+    Удаляет индекс без блокировки записи в таблицу.
+
+    В PostgreSQL выполняется DROP INDEX CONCURRENTLY (миграция должна
+    быть объявлена с atomic = False), в остальных СУБД - обычный DROP INDEX.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -1,5 +1,353 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import date, datetime
+from decimal import Decimal
 
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-class AdPaginator(PageNumberPagination):
-    page_size = 4
\ No newline at end of file
+
+class KeysetPaginator(CursorPagination):
+    """
+    Пагинация по ключу (keyset) без OFFSET и COUNT(*).
+
+    Страница выбирается условием по значениям полей сортировки последней
+    (или первой) записи предыдущей страницы, поэтому время выборки не зависит
+    от глубины. Последним полем сортировки всегда идёт первичный ключ, что
+    делает порядок строгим даже при совпадающих датах.
+
+    Курсор содержит значения полей сортировки и направление, подписан
+    через django.core.signing и не может быть подделан клиентом.
+
+    Поля, допускающие NULL, сортируются с NULL в конце ленты, чтобы строки
+    без значения тоже попадали в выдачу по курсору.
+
+    Если сортировка содержит вычисляемое поле (например, rank результатов
+    поиска), курсор хранит смещение: вещественное значение, пересчитываемое
+    в каждом запросе, не годится для точного сравнения по ключу.
+    """
+    ordering = ('-created_at', '-pk')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор.'
+    cursor_salt = 'notice_board.paginator.KeysetPaginator'
+    use_offset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Возвращает одну страницу записей, начиная с позиции курсора.
+
+        Параметры:
+            queryset (QuerySet): Отфильтрованный набор записей.
+            request (Request): Текущий запрос.
+            view (APIView): Представление, выполняющее пагинацию.
+
+        Возврат:
+            list: Записи текущей страницы.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Асинхронный вариант paginate_queryset, выбирающий страницу через async ORM.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Строит запрос страницы по курсору, не выполняя его.
+
+        Возврат:
+            QuerySet: Записи страницы и одна следующая за ней или None,
+                если пагинация отключена.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.ordering = self.get_ordering(request, queryset, view)
+        # Поле не из модели в сортировке - страницы выбираются по смещению.
+        self.use_offset = not all(self._is_model_field(queryset.model, field) for field in self.ordering)
+        self.position, self.reverse = self.decode_cursor(request)
+        if self.use_offset:
+            # Позиция - смещение начала страницы, направление всегда прямое.
+            self.offset = self.position[0] if self.position is not None else 0
+            return queryset[self.offset:self.offset + self.page_size + 1]
+
+        ordering = self._reverse_ordering(self.ordering) if self.reverse else self.ordering
+        nullable = [self._is_nullable(queryset.model, field) for field in ordering]
+        # В обратном направлении NULL оказываются в начале выборки.
+        nulls_last = not self.reverse
+        queryset = queryset.order_by(*self._order_by(ordering, nullable, nulls_last))
+        if self.position is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, self.position, nullable, nulls_last))
+
+        # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница.
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Формирует страницу из результатов запроса get_page_queryset.
+
+        Возврат:
+            list: Записи текущей страницы.
+        """
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.use_offset:
+            self.has_next = has_more
+            self.has_previous = self.offset > 0
+        elif self.reverse:
+            self.page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Определяет поля сортировки для курсора.
+
+        Используется явная сортировка запроса (например, заданная фильтром
+        или представлением), иначе - атрибут ordering пагинатора. Если
+        первичный ключ отсутствует в сортировке, он добавляется последним.
+
+        Возврат:
+            tuple: Имена полей сортировки с префиксом '-' для убывания.
+        """
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = list(self.ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return tuple(ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.use_offset:
+            return self.encode_cursor([self.offset + self.page_size], reverse=False)
+        return self._build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.use_offset:
+            return self.encode_cursor([max(self.offset - self.page_size, 0)], reverse=False)
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._build_link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        """
+        Проверяет подпись курсора из запроса и извлекает позицию.
+
+        Возврат:
+            tuple: Значения полей сортировки (или None) и признак обратного направления.
+
+        Исключения:
+            NotFound: Если курсор повреждён или выдан для другой сортировки.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        return self.decode_token(encoded)
+
+    def decode_token(self, encoded):
+        """
+        Извлекает позицию и направление из подписанного значения курсора.
+        """
+        try:
+            payload = signing.Signer(salt=self.cursor_salt).unsign_object(encoded)
+            position, reverse = payload['p'], bool(payload['r'])
+        except (signing.BadSignature, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        # Курсор, выданный для другой сортировки, не подходит к текущему запросу.
+        if payload.get('o') != list(self.ordering) or len(position) != (1 if self.use_offset else len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        if self.use_offset and (not isinstance(position[0], int) or position[0] < 0 or reverse):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_token(self, position, reverse):
+        """
+        Подписывает позицию и направление, возвращая значение курсора.
+
+        Подпись без метки времени: одна и та же позиция всегда даёт один
+        и тот же курсор, и ответы с ним совпадают байт в байт (кеш, ETag).
+        """
+        payload = {'o': list(self.ordering), 'p': position, 'r': int(reverse)}
+        return signing.Signer(salt=self.cursor_salt).sign_object(payload, compress=True)
+
+    def encode_cursor(self, position, reverse):
+        encoded = self.encode_token(position, reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, row):
+        return [self._to_cursor_value(self._get_value(row, field)) for field in self.ordering]
+
+    def _build_link(self, row, reverse):
+        return self.encode_cursor(self._get_position(row), reverse)
+
+    @staticmethod
+    def _get_value(row, field):
+        # Строки values() приходят словарями.
+        if isinstance(row, dict):
+            return row[field.lstrip('-')]
+        return getattr(row, field.lstrip('-'))
+
+    @staticmethod
+    def _to_cursor_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+    @staticmethod
+    def _is_model_field(model, field):
+        name = field.lstrip('-')
+        if name == 'pk':
+            return True
+        try:
+            model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    @staticmethod
+    def _is_nullable(model, field):
+        try:
+            return model._meta.get_field(field.lstrip('-')).null
+        except FieldDoesNotExist:
+            return False
+
+    @staticmethod
+    def _order_by(ordering, nullable, nulls_last):
+        # Явный NULLS FIRST/LAST только для nullable-полей: иначе сортировка
+        # по обычному индексу перестаёт с ним совпадать.
+        expressions = []
+        for field, is_nullable in zip(ordering, nullable):
+            if not is_nullable:
+                expressions.append(field)
+                continue
+            expression = F(field.lstrip('-'))
+            nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+            expressions.append(expression.desc(**nulls) if field.startswith('-') else expression.asc(**nulls))
+        return expressions
+
+    @staticmethod
+    def _keyset_filter(ordering, position, nullable, nulls_last):
+        """
+        Строит условие «строго после позиции» для составного ключа сортировки.
+
+        Для ключа (a, b, c) условие имеет вид
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        где направление сравнения определяется знаком поля. Для nullable-полей
+        NULL считается больше любого значения при nulls_last и меньше иначе.
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value, is_nullable in zip(ordering, position, nullable):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            if value is None:
+                after = Q(pk__in=[]) if nulls_last else Q(**{f'{name}__isnull': False})
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{lookup}': value})
+                if is_nullable and nulls_last:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & after
+            equal &= same
+        return condition
+
+
+class AdPaginator(KeysetPaginator):
+    """
+    Курсорная пагинация ленты объявлений по (created_at, pk).
+    """
+    ordering = ('-created_at', '-pk')
+    page_size = 4
+
+
+class CommentPaginator(KeysetPaginator):
+    """
+    Курсорная пагинация отзывов в хронологическом порядке.
+
+    Параметр since задаёт начало выдачи для опроса новых отзывов: значение
+    курсора или дата и время в ISO 8601, будут возвращены только отзывы,
+    созданные строго позже. В ответе поле since содержит значение для
+    следующего опроса.
+    """
+    ordering = ('created_at', 'pk')
+    page_size = 50
+    max_page_size = 200
+    since_query_param = 'since'
+    cursor_salt = 'notice_board.paginator.CommentPaginator'
+
+    def decode_cursor(self, request):
+        since = request.query_params.get(self.since_query_param)
+        if request.query_params.get(self.cursor_query_param) is None and since:
+            return self.decode_since(since), False
+        return super().decode_cursor(request)
+
+    def decode_since(self, since):
+        """
+        Превращает значение since в позицию ленты.
+
+        Для даты позиция указывает на момент времени: первичный ключ
+        не задан, поэтому в выдачу попадают все отзывы позже этой даты.
+        """
+        try:
+            moment = parse_datetime(since)
+        except ValueError:
+            moment = None
+        if moment is None:
+            position, reverse = self.decode_token(since)
+            if reverse:
+                raise NotFound(self.invalid_cursor_message)
+            return position
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return [moment.isoformat()] + [None] * (len(self.ordering) - 1)
+
+    def get_since(self):
+        """
+        Возвращает значение since для следующего опроса: позицию последнего
+        отзыва страницы или, если страница пуста, переданное значение.
+        """
+        if self.page:
+            return self.encode_token(self._get_position(self.page[-1]), reverse=False)
+        return self.request.query_params.get(self.since_query_param)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['since'] = self.get_since()
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['since'] = {'type': 'string', 'nullable': True}
+        return schema
@@ -0,0 +1,142 @@
+"""
+Окончательное удаление мягко удалённых отзывов, объявлений и пользователей.
+
+Удаление в запросе только помечает запись (deleted_at), а строки, связанные
+записи и файлы изображений удаляются здесь небольшими порциями, каждая
+в своей короткой транзакции. Порядок снизу вверх: сначала отзывы (удалённые
+сами или принадлежащие удалённым объявлениям), затем объявления, у которых
+не осталось отзывов, затем пользователи без объявлений и отзывов. Записи
+хранятся SOFT_DELETE_RETENTION секунд после удаления.
+
+Отзывы и объявления удаляются одним DELETE без сигналов: кеш и подписчики
+событий уже оповещены при мягком удалении.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from notice_board import counters
+from notice_board.cache import invalidate_ads
+from notice_board.images import delete_image_files
+from notice_board.models import Ad, Comment
+from users.models import User
+
+
+def schedule_purge():
+    """
+    Ставит очистку в очередь после фиксации транзакции, с задержкой SOFT_DELETE_RETENTION.
+    """
+    from notice_board.tasks import purge_deleted
+
+    transaction.on_commit(lambda: purge_deleted.apply_async(countdown=settings.SOFT_DELETE_RETENTION))
+
+
+def _raw_delete(model, pks):
+    queryset = model.all_objects.filter(pk__in=pks)
+    return queryset._raw_delete(queryset.db)
+
+
+def _delete_files_on_commit(model, rows):
+    storage = model._meta.get_field('image').storage
+    files = [(row['image'], row['image_variants']) for row in rows if row['image'] or row['image_variants']]
+
+    def delete_files():
+        for name, image_variants in files:
+            delete_image_files(storage, name, image_variants)
+
+    if files:
+        transaction.on_commit(delete_files)
+
+
+def purge_comments(limit, before):
+    """
+    Удаляет до limit отзывов, удалённых до before или принадлежащих таким объявлениям.
+
+    Счётчики отзывов оставшихся объявлений пересчитываются: отзывы удалённого
+    пользователя помечаются одним UPDATE, без учёта в счётчиках.
+
+    Возврат:
+        int: Число удалённых отзывов.
+    """
+    rows = list(Comment.all_objects.filter(deleted_at__lte=before).values_list('pk', 'ad_id')[:limit])
+    if len(rows) < limit:
+        rows += Comment.all_objects.filter(ad__deleted_at__lte=before).values_list('pk', 'ad_id')[:limit - len(rows)]
+    if not rows:
+        return 0
+
+    ad_pks = sorted({ad_pk for _, ad_pk in rows if ad_pk is not None})
+    with transaction.atomic():
+        deleted = _raw_delete(Comment, [pk for pk, _ in rows])
+        if ad_pks:
+            counters.refresh_comment_counters(ad_pks)
+            invalidate_ads(ad_pks)
+    return deleted
+
+
+def purge_ads(limit, before):
+    """
+    Удаляет до limit объявлений, удалённых до before и не имеющих отзывов, вместе с изображениями.
+
+    Возврат:
+        int: Число удалённых объявлений.
+    """
+    rows = list(
+        Ad.all_objects.filter(deleted_at__lte=before)
+        .filter(~Exists(Comment.all_objects.filter(ad=OuterRef('pk'))))
+        .values('pk', 'image', 'image_variants')[:limit]
+    )
+    if not rows:
+        return 0
+    with transaction.atomic():
+        deleted = _raw_delete(Ad, [row['pk'] for row in rows])
+        _delete_files_on_commit(Ad, rows)
+    return deleted
+
+
+def purge_users(limit, before):
+    """
+    Удаляет до limit пользователей, удалённых до before, у которых не осталось
+    объявлений и отзывов, вместе с аватарами.
+
+    Пользователи удаляются обычным delete(): оставшиеся связи (группы,
+    привязки соцсетей) невелики, а сигналы сбрасывают кеши пользователя.
+
+    Возврат:
+        int: Число удалённых пользователей.
+    """
+    users = list(
+        User.objects.filter(deleted_at__lte=before)
+        .filter(~Exists(Ad.all_objects.filter(author=OuterRef('pk'))),
+                ~Exists(Comment.all_objects.filter(author=OuterRef('pk'))))[:limit]
+    )
+    for user in users:
+        with transaction.atomic():
+            user.delete()
+            _delete_files_on_commit(User, [{'image': user.image.name, 'image_variants': user.image_variants}])
+    return len(users)
+
+
+def purge_batch(batch_size=None, before=None):
+    """
+    Окончательно удаляет одну порцию мягко удалённых записей.
+
+    Параметры:
+        batch_size (int): Наибольшее число удаляемых записей, по умолчанию PURGE_BATCH_SIZE.
+        before (datetime): Удаляются записи, помеченные до этого момента,
+            по умолчанию - старше SOFT_DELETE_RETENTION секунд.
+
+    Возврат:
+        int: Число удалённых записей; меньше batch_size - удалять больше нечего.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    if before is None:
+        before = timezone.now() - timedelta(seconds=settings.SOFT_DELETE_RETENTION)
+    deleted = 0
+    for purge in (purge_comments, purge_ads, purge_users):
+        if deleted >= batch_size:
+            break
+        deleted += purge(batch_size - deleted, before)
+    return deleted
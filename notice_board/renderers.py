@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер, использующий orjson, если он установлен.
+
+    Для строк, целых чисел, списков и словарей вывод совпадает с JSONRenderer
+    байт в байт: компактные разделители, символы вне ASCII без экранирования,
+    \\u2028 и \\u2029 экранируются. Даты и прочие нестандартные типы
+    преобразует кодировщик DRF. Числа с плавающей точкой orjson записывает
+    иначе (1e16 вместо 1e+16), поэтому рендерер подключается к эндпоинтам,
+    в ответах которых их нет. Отступы, настройки UNICODE_JSON/COMPACT_JSON
+    и значения, которые orjson не поддерживает, обрабатывает JSONRenderer.
+    """
+    options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.module_loading import import_string
+
+# Бэкенды по умолчанию для СУБД, если AD_SEARCH_BACKEND не задан явно.
+DEFAULT_BACKENDS = {
+    'postgresql': 'notice_board.search.PostgresSearchBackend',
+}
+FALLBACK_BACKEND = 'notice_board.search.SimpleSearchBackend'
+
+
+class BaseSearchBackend:
+    """
+    Базовый класс поискового бэкенда объявлений.
+
+    Бэкенд отбирает подходящие объявления, добавляет аннотацию rank
+    и сортирует их по убыванию релевантности. Сортировка заканчивается
+    полями (created_at, pk), поэтому результат поиска пагинируется тем же
+    курсором, что и лента.
+    """
+    ordering = ('-rank', '-created_at', '-pk')
+
+    def search(self, queryset, query):
+        """
+        Выполняет поиск по объявлениям.
+
+        Параметры:
+            queryset (QuerySet): Исходный набор объявлений.
+            query (str): Поисковая строка пользователя.
+
+        Возврат:
+            queryset (QuerySet): Найденные объявления с аннотацией rank.
+        """
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Полнотекстовый поиск PostgreSQL.
+
+    Использует колонку search_vector (заголовок с весом A, описание с весом B),
+    которую поддерживает триггер, и GIN-индекс по ней. Опечатки и частичные
+    совпадения в заголовке находит триграммный GIN-индекс (pg_trgm).
+    """
+    config = 'russian'
+
+    def search(self, queryset, query):
+        search_query = SearchQuery(query, config=self.config, search_type='websearch')
+        return queryset.annotate(
+            rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query),
+        ).filter(
+            Q(search_vector=search_query) | Q(title__trigram_similar=query),
+        ).order_by(*self.ordering)
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Запасной поиск через icontains для СУБД без полнотекстового поиска (SQLite).
+
+    Совпадение в заголовке ранжируется выше совпадения только в описании.
+    """
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query),
+        ).annotate(
+            rank=Case(
+                When(title__icontains=query, then=Value(1.0)),
+                default=Value(0.5),
+                output_field=FloatField(),
+            ),
+        ).order_by(*self.ordering)
+
+
+def get_search_backend():
+    """
+    Возвращает поисковый бэкенд из настройки AD_SEARCH_BACKEND.
+
+    Если настройка не задана, бэкенд выбирается по СУБД текущего подключения.
+
+    Возврат:
+        BaseSearchBackend: Экземпляр поискового бэкенда.
+    """
+    path = getattr(settings, 'AD_SEARCH_BACKEND', None)
+    if path is None:
+        path = DEFAULT_BACKENDS.get(connection.vendor, FALLBACK_BACKEND)
+    return import_string(path)()
@@ -1,15 +1,60 @@
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from notice_board.models import Ad, Comment
+from notice_board.cache import invalidate_ads
+from notice_board.images import detect_content_type
+from notice_board.models import Ad, Comment, bulk_saved, soft_deleted
+from notice_board.purge import schedule_purge
+from users.models import UserRoles
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Поле только для чтения, отдающее варианты изображения в виде srcset.
+
+    Возвращает словарь {вариант: {'width', 'height', 'webp', 'jpeg'}}
+    с абсолютными ссылками на файлы или пустой словарь, пока варианты
+    не созданы.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for variant, record in ((value or {}).get('variants') or {}).items():
+            variants[variant] = {
+                'width': record['width'],
+                'height': record['height'],
+                'webp': self._build_url(record['webp'], request),
+                'jpeg': self._build_url(record['jpeg'], request),
+            }
+        return variants
+
+    def _build_url(self, name, request):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
 
 
 class AdSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели Ad, представляющий краткую информацию о товаре.
     """
+    image_srcset = ImageVariantsField(source='image_variants')
+
     class Meta:
         model = Ad
-        fields = ('pk', 'image', 'title', 'price', 'description',)
+        fields = ('pk', 'image', 'image_srcset', 'title', 'price', 'description',
+                  'comments_count', 'last_commented_at',)
+        read_only_fields = ('comments_count', 'last_commented_at',)
 
 
 class AdDetailSerializer(serializers.ModelSerializer):
@@ -28,10 +73,11 @@ class AdDetailSerializer(serializers.ModelSerializer):
         read_only=True,
         source='author.phone'
     )
+    image_srcset = ImageVariantsField(source='image_variants')
 
     class Meta:
         model = Ad
-        fields = ('pk', 'image', 'title', 'price', 'phone', 'description',
+        fields = ('pk', 'image', 'image_srcset', 'title', 'price', 'phone', 'description',
                   'author_first_name', 'author_last_name', 'author_id',)
 
 
@@ -46,11 +92,251 @@ class CommentSerializer(serializers.ModelSerializer):
     )
     author_image = serializers.ImageField(
         read_only=True,
-        source='author.avatar',
+        source='author.image',
         allow_null=True
     )
+    author_image_srcset = ImageVariantsField(source='author.image_variants')
 
     class Meta:
         model = Comment
         fields = ('pk', 'text', 'author_id', 'created_at', 'author_first_name',
-                  'author_last_name', 'ad_id', 'author_image',)
+                  'author_last_name', 'ad_id', 'author_image', 'author_image_srcset',)
+
+
+class AdBulkListSerializer(serializers.ListSerializer):
+    """
+    Списочный сериализатор, сохраняющий объявления пакетно.
+
+    Создание выполняется одним bulk_create, обновление - одним bulk_update
+    по объединению изменённых полей. Вместо post_save отправляется сигнал
+    bulk_saved, по которому подписчики получают события объявлений.
+    """
+
+    def create(self, validated_data):
+        author = self.context['request'].user
+        ads = Ad.objects.bulk_create([Ad(author=author, **item) for item in validated_data])
+        bulk_saved.send(sender=Ad, instances=ads, created=True)
+        return ads
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for item in validated_data:
+            instance = instances[item.pop('pk')]
+            for field, value in item.items():
+                setattr(instance, field, value)
+                fields.add(field)
+        updated = list(instances.values())
+        if fields:
+            # bulk_update не заполняет auto_now поля.
+            now = timezone.now()
+            for instance in updated:
+                instance.updated_at = now
+            Ad.objects.bulk_update(updated, sorted(fields | {'updated_at'}))
+            bulk_saved.send(sender=Ad, instances=updated, created=False)
+        return updated
+
+
+class AdBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор объявления для пакетного создания.
+    """
+    class Meta:
+        model = Ad
+        fields = ('title', 'price', 'description',)
+        list_serializer_class = AdBulkListSerializer
+
+
+class AdBulkUpdateSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор объявления для пакетного обновления: все поля, кроме pk, необязательны.
+    """
+    pk = serializers.IntegerField()
+
+    class Meta:
+        model = Ad
+        fields = ('pk', 'title', 'price', 'description',)
+        extra_kwargs = {'title': {'required': False}}
+        list_serializer_class = AdBulkListSerializer
+
+
+class AdBulkSerializer(serializers.Serializer):
+    """
+    Сериализатор пакета операций над объявлениями.
+
+    Пакет содержит списки create (новые объявления), update (изменения
+    с обязательным pk) и delete (идентификаторы). Права на изменяемые
+    и удаляемые объявления проверяются одним запросом: автор может менять
+    только свои объявления, администратор - любые. Ошибки возвращаются
+    по каждому элементу в формате ListSerializer.
+    """
+
+    def get_fields(self):
+        # Поля create и update нельзя объявить атрибутами класса:
+        # они совпали бы с одноимёнными методами сериализатора.
+        return {
+            'create': AdBulkCreateSerializer(many=True, required=False),
+            'update': AdBulkUpdateSerializer(many=True, required=False),
+            'delete': serializers.ListField(child=serializers.IntegerField(), required=False),
+        }
+
+    def validate(self, attrs):
+        creates = attrs.get('create', [])
+        updates = attrs.get('update', [])
+        deletes = attrs.get('delete', [])
+
+        total = len(creates) + len(updates) + len(deletes)
+        if not total:
+            raise serializers.ValidationError('Пакет не содержит операций.')
+        if total > settings.AD_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'Пакет содержит больше {settings.AD_BULK_MAX_ITEMS} операций.'
+            )
+
+        update_pks = [item['pk'] for item in updates]
+        pks = update_pks + deletes
+        user = self.context['request'].user
+        self.instances = Ad.objects.in_bulk(pks)
+
+        errors = {}
+        seen = set()
+        for name, items in (('update', update_pks), ('delete', deletes)):
+            item_errors = []
+            for pk in items:
+                item_errors.append(self._check_item(pk, user, seen))
+                seen.add(pk)
+            if any(item_errors):
+                errors[name] = item_errors
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def _check_item(self, pk, user, seen):
+        if pk in seen:
+            return {'pk': ['Объявление встречается в пакете больше одного раза.']}
+        instance = self.instances.get(pk)
+        if instance is None:
+            return {'pk': ['Объявление не найдено.']}
+        if user.role != UserRoles.ADMIN and instance.author_id != user.pk:
+            return {'pk': ['Недостаточно прав для изменения объявления.']}
+        return {}
+
+    def create(self, validated_data):
+        """
+        Выполняет все операции пакета в одной транзакции.
+
+        Возврат:
+            dict: Результаты по каждой операции в порядке запроса.
+        """
+        results = {}
+        with transaction.atomic():
+            if validated_data.get('create'):
+                created = self.fields['create'].create(validated_data['create'])
+                results['create'] = [{'pk': ad.pk, 'status': 'created'} for ad in created]
+            if validated_data.get('update'):
+                update_pks = [item['pk'] for item in validated_data['update']]
+                instances = {pk: self.instances[pk] for pk in update_pks}
+                self.fields['update'].update(instances, validated_data['update'])
+                results['update'] = [{'pk': pk, 'status': 'updated'} for pk in update_pks]
+            if validated_data.get('delete'):
+                Ad.objects.filter(pk__in=validated_data['delete']).soft_delete()
+                for pk in validated_data['delete']:
+                    soft_deleted.send(sender=Ad, instance=self.instances[pk])
+                schedule_purge()
+                results['delete'] = [{'pk': pk, 'status': 'deleted'} for pk in validated_data['delete']]
+
+            changed = [pk for name in ('update', 'delete') for pk in
+                       (item['pk'] for item in results.get(name, []))]
+            invalidate_ads(changed)
+        return results
+
+
+class AdImageUploadSerializer(serializers.Serializer):
+    """
+    Сериализатор запроса ссылки для прямой загрузки изображения объявления.
+
+    Принимает тип и размер файла, а возвращает ссылку загрузки из хранилища
+    (storage.presign_upload), имя файла и подписанный токен, которым
+    загрузка подтверждается в AdImageConfirmSerializer.
+    """
+    token_salt = 'notice_board.ad_image_upload'
+
+    content_type = serializers.CharField()
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_content_type(self, value):
+        if value not in settings.DIRECT_UPLOAD_CONTENT_TYPES:
+            allowed = ', '.join(settings.DIRECT_UPLOAD_CONTENT_TYPES)
+            raise serializers.ValidationError(f'Допустимые типы файлов: {allowed}.')
+        return value
+
+    def validate_size(self, value):
+        if value > settings.DIRECT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Размер файла больше {settings.DIRECT_UPLOAD_MAX_SIZE} байт.')
+        return value
+
+    def create(self, validated_data):
+        """
+        Выдаёт ссылку для загрузки файла с новым уникальным именем.
+
+        Возврат:
+            dict: name, token, expires_in и upload (method, url, fields, headers).
+        """
+        ad = self.context['ad']
+        request = self.context['request']
+        field = Ad._meta.get_field('image')
+        extension = settings.DIRECT_UPLOAD_CONTENT_TYPES[validated_data['content_type']]
+        name = f'{field.upload_to}{uuid.uuid4().hex}.{extension}'
+        expires = settings.DIRECT_UPLOAD_EXPIRES
+
+        upload = field.storage.presign_upload(name, validated_data['content_type'], validated_data['size'], expires)
+        # У файлового хранилища ссылка относительная.
+        upload['url'] = request.build_absolute_uri(upload['url'])
+        token = signing.dumps({'ad': ad.pk, 'user': request.user.pk, 'name': name,
+                               'size': validated_data['size']}, salt=self.token_salt)
+        return {'name': name, 'token': token, 'expires_in': expires, 'upload': upload}
+
+
+class AdImageConfirmSerializer(serializers.Serializer):
+    """
+    Сериализатор подтверждения прямой загрузки изображения объявления.
+
+    Проверяет, что токен выдан для этого объявления и пользователя, а файл
+    есть в хранилище и не больше заявленного размера. Тип определяется
+    по содержимому файла через Pillow: имя выбирает сервер, а тип объекта
+    в S3 - заголовок клиента, поэтому им доверять нельзя. Формат должен быть
+    допустимым и совпадать с расширением имени. Файл, не прошедший
+    проверку, удаляется. При сохранении имя файла
+    записывается в Ad.image, после чего в фоне создаются варианты.
+    """
+    token = serializers.CharField()
+
+    def validate_token(self, value):
+        try:
+            payload = signing.loads(value, salt=AdImageUploadSerializer.token_salt,
+                                    max_age=settings.DIRECT_UPLOAD_EXPIRES)
+        except signing.BadSignature:
+            raise serializers.ValidationError('Токен загрузки недействителен или истёк.')
+        if payload['ad'] != self.context['ad'].pk or payload['user'] != self.context['request'].user.pk:
+            raise serializers.ValidationError('Токен выдан для другой загрузки.')
+        return payload
+
+    def validate(self, attrs):
+        upload = attrs['token']
+        storage = Ad._meta.get_field('image').storage
+        metadata = storage.get_metadata(upload['name'])
+        if metadata is None:
+            raise serializers.ValidationError({'token': ['Файл ещё не загружен.']})
+        content_type = detect_content_type(storage, upload['name']) if metadata['size'] <= upload['size'] else None
+        extension = settings.DIRECT_UPLOAD_CONTENT_TYPES.get(content_type)
+        if extension is None or not upload['name'].endswith(f'.{extension}'):
+            storage.delete(upload['name'])
+            raise serializers.ValidationError({'token': ['Загруженный файл не соответствует заявленному.']})
+        return attrs
+
+    def create(self, validated_data):
+        ad = self.context['ad']
+        name = validated_data['token']['name']
+        if ad.image.name != name:
+            ad.image = name
+            ad.save(update_fields=['image', 'updated_at'])
+        return ad
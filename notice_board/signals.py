@@ -0,0 +1,129 @@
+from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from notice_board.cache import invalidate_ad, invalidate_user, remember_ad_author
+from notice_board.events import FEED_CHANNEL, ad_channel, build_event, publish
+from notice_board.images import needs_variants
+from notice_board.tasks import process_image_variants
+from notice_board.models import Ad, Comment, bulk_saved, soft_deleted
+from notice_board.serializers import AdSerializer, CommentSerializer
+from users.models import User
+
+
+@receiver([post_save, post_delete, soft_deleted], sender=Ad)
+def invalidate_ad_cache(sender, instance, **kwargs):
+    """
+    Инвалидирует закешированные ответы при изменении объявления.
+    """
+    invalidate_ad(instance.pk)
+
+
+@receiver(post_save, sender=Ad)
+def remember_new_ad_author(sender, instance, created, **kwargs):
+    """
+    Запоминает автора нового объявления: карточке не нужен запрос за ним.
+    """
+    if created:
+        remember_ad_author(instance.pk, instance.author_id)
+
+
+@receiver([post_save, post_delete, soft_deleted], sender=Comment)
+def invalidate_comment_ad_cache(sender, instance, **kwargs):
+    """
+    Инвалидирует закешированные ответы объявления при изменении его комментария.
+    """
+    invalidate_ad(instance.ad_id)
+
+
+# Поля пользователя, от которых зависят ответы API: данные в карточках и отзывах,
+# а также признаки удаления, скрывающие его объявления.
+USER_PUBLIC_FIELDS = frozenset({'first_name', 'last_name', 'phone', 'image', 'image_variants',
+                                'is_active', 'deleted_at'})
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cache(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Инвалидирует ответы с данными пользователя.
+
+    У нового пользователя ещё нет объявлений и отзывов, а сохранение
+    с update_fields только из невидимых в ответах полей (last_login,
+    password) ничего не меняет.
+    """
+    if created or (update_fields is not None and not USER_PUBLIC_FIELDS & set(update_fields)):
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_cache(sender, instance, **kwargs):
+    """
+    Инвалидирует ответы с данными удалённого пользователя.
+    """
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_save, sender=User)
+def schedule_image_processing(sender, instance, **kwargs):
+    """
+    Ставит создание вариантов изображения в очередь после фиксации транзакции,
+    если изображение было загружено или заменено.
+    """
+    if needs_variants(instance):
+        model_label = sender._meta.label
+        transaction.on_commit(lambda: process_image_variants.delay(model_label, instance.pk))
+
+
+def _publish_on_commit(channels, kind, instance, created=None, serializer_class=None):
+    if serializer_class is None:
+        event = build_event(kind, 'deleted', instance.pk)
+    else:
+        action = 'created' if created else 'updated'
+        # Данные сериализуются сразу: к моменту фиксации объект может измениться.
+        event = build_event(kind, action, instance.pk, serializer_class(instance).data)
+    transaction.on_commit(lambda: publish(channels, event))
+
+
+@receiver(post_save, sender=Ad)
+def publish_ad_saved(sender, instance, created, **kwargs):
+    """
+    Рассылает подписчикам ленты и объявления событие его создания или изменения.
+    """
+    _publish_on_commit([FEED_CHANNEL, ad_channel(instance.pk)], 'ad', instance,
+                       created, AdSerializer)
+
+
+@receiver(bulk_saved, sender=Ad)
+def publish_ads_bulk_saved(sender, instances, created, **kwargs):
+    """
+    Рассылает события пакетного создания или изменения объявлений.
+    """
+    for instance in instances:
+        publish_ad_saved(sender, instance, created)
+
+
+@receiver([post_delete, soft_deleted], sender=Ad)
+def publish_ad_deleted(sender, instance, **kwargs):
+    """
+    Рассылает подписчикам ленты и объявления событие его удаления.
+    """
+    _publish_on_commit([FEED_CHANNEL, ad_channel(instance.pk)], 'ad', instance)
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_saved(sender, instance, created, **kwargs):
+    """
+    Рассылает подписчикам объявления событие создания или изменения отзыва.
+    """
+    _publish_on_commit([ad_channel(instance.ad_id)], 'comment', instance,
+                       created, CommentSerializer)
+
+
+@receiver([post_delete, soft_deleted], sender=Comment)
+def publish_comment_deleted(sender, instance, **kwargs):
+    """
+    Рассылает подписчикам объявления событие удаления отзыва.
+    """
+    _publish_on_commit([ad_channel(instance.ad_id)], 'comment', instance)
@@ -0,0 +1,42 @@
+from django.conf import settings
+
+from notice_board import images, purge
+from notice_board.cache import bump_generations, invalidate_ads
+from notice_board.counters import rebuild_comment_counters, refresh_comment_counters
+from tasks.base import task
+
+
+@task
+def process_image_variants(model_label, pk):
+    """
+    Создаёт варианты изображения записи, см. images.process_image_variants.
+    """
+    images.process_image_variants(model_label, pk)
+
+
+@task
+def rebuild_ad_counters(start_pk, end_pk):
+    """
+    Пересчитывает счётчики отзывов объявлений с pk в [start_pk, end_pk).
+    """
+    rebuild_comment_counters(start_pk, end_pk)
+    bump_generations('ads')
+
+
+@task
+def refresh_ad_counters(ad_pks):
+    """
+    Пересчитывает счётчики отзывов объявлений ad_pks по оставшимся отзывам.
+    """
+    refresh_comment_counters(ad_pks)
+    invalidate_ads(ad_pks)
+
+
+@task
+def purge_deleted():
+    """
+    Удаляет порцию мягко удалённых записей (см. purge.purge_batch)
+    и ставит в очередь следующую, пока удалена полная порция.
+    """
+    if purge.purge_batch() >= settings.PURGE_BATCH_SIZE:
+        purge_deleted.delay()
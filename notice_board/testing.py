@@ -0,0 +1,194 @@
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve
+
+
+def assert_constant_queries(request, populate, sizes=(1, 4)):
+    """
+    Проверяет, что число SQL-запросов эндпоинта не зависит от объёма данных.
+
+    Для каждого размера из sizes данные дополняются функцией populate,
+    затем выполняется запрос и подсчитываются SQL-запросы. Число запросов
+    должно совпадать для всех размеров, иначе эндпоинт страдает от N+1.
+
+    Параметры:
+        request (callable): Выполняет запрос к эндпоинту и возвращает ответ.
+        populate (callable): Принимает размер n и дополняет данные до n записей.
+        sizes (tuple): Возрастающие размеры данных для сравнения.
+
+    Возврат:
+        int: Число SQL-запросов эндпоинта.
+    """
+    counts = {}
+    captured = {}
+    for size in sizes:
+        populate(size)
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+        assert response.status_code < 400, response.data
+        counts[size] = len(context.captured_queries)
+        captured[size] = [query['sql'] for query in context.captured_queries]
+
+    largest = sizes[-1]
+    assert len(set(counts.values())) == 1, (
+        f'Число запросов растёт с объёмом данных: {counts}\n' + '\n'.join(captured[largest])
+    )
+    return counts[largest]
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w".])-?\d+(?:\.\d+)?\b')
+_PARAM = re.compile(r'%s|\?')
+_PARAM_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SAVEPOINT = re.compile(r'((?:RELEASE |ROLLBACK TO )?SAVEPOINT) \S+')
+_INSERT = re.compile(r'^INSERT INTO (\S+) .*$')
+_UPDATE_SET = re.compile(r'^UPDATE (\S+) SET .*? WHERE ')
+_PATH_ID = re.compile(r'/\d+(?=/|$)')
+_ROUTE_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def _request_label(environ):
+    """
+    Возвращает метод и шаблон адреса запроса: GET /api/ads/<int:pk>/.
+    """
+    path = environ.get('PATH_INFO', '')
+    try:
+        # Маршруты роутера DRF - регулярные выражения: (?P<pk>[^/.]+)/$ -> <pk>/.
+        path = '/' + _ROUTE_GROUP.sub(r'<\1>', resolve(path).route).replace('^', '').replace('$', '')
+    except Resolver404:
+        path = _PATH_ID.sub('/<id>', path)
+    return f'{environ.get("REQUEST_METHOD", "")} {path}'
+
+
+def _top_level_from(sql):
+    """
+    Возвращает позицию FROM внешнего SELECT (без подзапросов в списке колонок) или -1.
+    """
+    depth = 0
+    upper = sql.upper()
+    for position, char in enumerate(sql):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif not depth and upper.startswith(' FROM ', position):
+            return position
+    return -1
+
+
+def normalize_sql(sql):
+    """
+    Приводит SQL-запрос к форме, не зависящей от данных.
+
+    Литералы и параметры заменяются на ?, списки параметров IN - на (...),
+    имена точек сохранения отбрасываются. Списки колонок SELECT, INSERT
+    и SET не входят в форму: добавление поля в сериализатор не меняет
+    её, а новая таблица, соединение или условие - меняет.
+
+    Параметры:
+        sql (str): Текст запроса.
+
+    Возврат:
+        str: Нормализованная форма запроса.
+    """
+    sql = ' '.join(sql.split())
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAM.sub('?', sql)
+    sql = _PARAM_LIST.sub('(...)', sql)
+    sql = _SAVEPOINT.sub(r'\1', sql)
+    if sql.startswith('SELECT '):
+        position = _top_level_from(sql)
+        if position > 0:
+            sql = 'SELECT ...' + sql[position:]
+    sql = _INSERT.sub(r'INSERT INTO \1 ...', sql)
+    return _UPDATE_SET.sub(r'UPDATE \1 SET ... WHERE ', sql)
+
+
+class QueryRecorder:
+    """
+    Записывает SQL-запросы, выполненные во время HTTP-запросов тестового клиента.
+
+    Границы запросов определяются сигналами request_started и request_finished,
+    поэтому запросы фикстур и проверок теста не учитываются. Вызовы
+    представлений напрямую через APIRequestFactory не записываются.
+
+        with QueryRecorder() as recorder:
+            client.get('/api/ads/')
+        recorder.requests  # [{'request': 'GET /api/ads/', 'queries': {...}}]
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._current = None
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._record))
+        request_started.connect(self._started)
+        request_finished.connect(self._finished)
+        return self
+
+    def __exit__(self, *exc_info):
+        request_started.disconnect(self._started)
+        request_finished.disconnect(self._finished)
+        self._stack.close()
+        self._finished()
+
+    def _started(self, sender, environ=None, **kwargs):
+        self._current = []
+        self.requests.append({'request': _request_label(environ or {}), 'queries': self._current})
+
+    def _finished(self, sender=None, **kwargs):
+        if self._current is not None:
+            entry = self.requests[-1]
+            entry['queries'] = dict(sorted(Counter(self._current).items()))
+            self._current = None
+
+    def _record(self, execute, sql, params, many, context):
+        if self._current is not None:
+            self._current.append(normalize_sql(sql))
+        return execute(sql, params, many, context)
+
+
+def compare_queries(baseline, requests):
+    """
+    Сравнивает записанные SQL-запросы теста с базовыми.
+
+    Регрессией считается любой запрос, который выполняется чаще, чем в базовых
+    значениях: новый запрос, лишнее обращение к связанной таблице или повтор
+    одного и того же запроса, число которых растёт с объёмом данных (N+1).
+
+    Параметры:
+        baseline (list): Базовые запросы теста в формате QueryRecorder.requests.
+        requests (list): Записанные запросы теста.
+
+    Возврат:
+        tuple: Описания регрессий (list) и признак того, что запросов стало
+            меньше и базовые значения можно обновить (bool).
+    """
+    labels = [entry['request'] for entry in requests]
+    base_labels = [entry['request'] for entry in baseline]
+    if labels != base_labels:
+        return [f'HTTP-запросы теста изменились: {base_labels} -> {labels}'], False
+
+    problems = []
+    improved = False
+    for base, current in zip(baseline, requests):
+        before, after = Counter(base['queries']), Counter(current['queries'])
+        added = after - before
+        improved = improved or bool(before - after)
+        if not added:
+            continue
+        problems.append(f'{current["request"]}: {before.total()} -> {after.total()} SQL-запросов')
+        for sql, count in sorted(added.items()):
+            repeated = f' (выполняется {after[sql]} раз - похоже на N+1)' if after[sql] > 1 else ''
+            problems.append(f'    +{count} × {sql}{repeated}')
+    return problems, improved
@@ -1,12 +1,37 @@
-from io import BytesIO
+import asyncio
+import json
+from io import BytesIO, StringIO
 from PIL import Image
 import pytest
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import get_user_model
-from notice_board.models import Ad, Comment
+from config import admin as admin_utils
+from config import replicas
+from notice_board import cache as response_cache
+from notice_board import counters, events, signals
+from notice_board.admin import AdAdmin, CommentAdmin
+from notice_board.async_views import (AsyncAdEventsView, AsyncAdFeedEventsView, AsyncAdListView,
+                                      AsyncAdRetrieveView, AsyncCommentListView)
+from notice_board.cache import get_cache_stats
+from notice_board.fast_serializers import FastSerializer
+from notice_board.images import process_image_variants
+from notice_board.models import AD_HAS_IMAGE, Ad, Comment
+from notice_board.paginator import AdPaginator
+from notice_board.purge import purge_batch
+from notice_board.renderers import FastJSONRenderer
+from notice_board.search import PostgresSearchBackend, SimpleSearchBackend, get_search_backend
 from notice_board.serializers import AdDetailSerializer, AdSerializer, CommentSerializer
+from notice_board.testing import QueryRecorder, assert_constant_queries, compare_queries, normalize_sql
+from notice_board.views import AdListAPIView, AdRetrieveAPIView, CommentViewSet
 
 
 @pytest.fixture
@@ -86,8 +111,43 @@ def test_list_ads(authenticated_client, ad):
     url = '/api/ads/'
     response = authenticated_client.get(url)
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
-    assert response.data[0]['title'] == ad.title
+    assert len(response.data['results']) == 1
+    assert response.data['results'][0]['title'] == ad.title
+    assert response.data['next'] is None
+    assert response.data['previous'] is None
+
+
+@pytest.mark.django_db
+def test_list_ads_cursor_pagination(api_client, user):
+    ads = Ad.objects.bulk_create(Ad(title=f'Ad {i}', author=user) for i in range(10))
+    # Одинаковая дата у всех объявлений: порядок должен держаться на pk.
+    Ad.objects.update(created_at=ads[0].created_at)
+
+    seen = []
+    url = '/api/ads/'
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        seen.extend(item['pk'] for item in response.data['results'])
+        url = response.data['next']
+    assert seen == sorted((ad.pk for ad in ads), reverse=True)
+
+    first_page = api_client.get('/api/ads/?page_size=3').data
+    second_page = api_client.get(first_page['next']).data
+    previous_page = api_client.get(second_page['previous']).data
+    assert [item['pk'] for item in previous_page['results']] == \
+        [item['pk'] for item in first_page['results']]
+
+    # Курсор не зависит от времени выдачи: та же позиция - та же ссылка.
+    paginator = AdPaginator()
+    assert paginator.encode_token(['2024-01-01T00:00:00', 1], False) == \
+        paginator.encode_token(['2024-01-01T00:00:00', 1], False)
+
+
+@pytest.mark.django_db
+def test_list_ads_invalid_cursor(api_client, ad):
+    response = api_client.get('/api/ads/?cursor=forged')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 @pytest.mark.django_db
@@ -138,8 +198,8 @@ def test_list_comments(authenticated_client, comment):
     response = authenticated_client.get(url)
     print(response.data)
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
-    assert response.data[0]['text'] == comment.text
+    assert len(response.data['results']) == 1
+    assert response.data['results'][0]['text'] == comment.text
 
 
 @pytest.mark.django_db
@@ -234,4 +294,970 @@ def test_ad_serializer_create(user):
     assert ad.title == data['title']
     assert ad.description == data['description']
     assert ad.price == data['price']
-    assert ad.image.name.startswith('ads/test_image')
\ No newline at end of file
+    assert ad.image.name.startswith('ads/test_image')
+
+
+@pytest.mark.django_db
+def test_search_ads_ranked(api_client, user):
+    Ad.objects.create(title='Red bicycle', description='City bike', author=user)
+    in_description = Ad.objects.create(title='Helmet', description='Fits any bicycle', author=user)
+    Ad.objects.create(title='Laptop', description='Almost new', author=user)
+
+    response = api_client.get('/api/ads/', {'q': 'bicycle'})
+    assert response.status_code == status.HTTP_200_OK
+    titles = [item['title'] for item in response.data['results']]
+    assert titles == ['Red bicycle', 'Helmet']
+
+    # Курсор результатов поиска хранит смещение, а не вещественный rank.
+    page = api_client.get('/api/ads/', {'q': 'bicycle', 'page_size': 1}).data
+    next_page = api_client.get(page['next']).data
+    assert [item['pk'] for item in next_page['results']] == [in_description.pk]
+    assert next_page['next'] is None
+    previous_page = api_client.get(next_page['previous']).data
+    assert previous_page['results'] == page['results']
+
+
+@pytest.mark.django_db
+def test_title_filter_is_search_alias(api_client, ad):
+    response = api_client.get('/api/ads/', {'title': 'test'})
+    assert [item['pk'] for item in response.data['results']] == [ad.pk]
+
+
+@pytest.mark.django_db
+def test_ad_filters(api_client, user, ad):
+    other = _make_author(1)
+    cheap = Ad.objects.create(title='Cheap', price=500, author=user, image='ads/cheap.jpg')
+    expensive = Ad.objects.create(title='Expensive', price=20000, author=other)
+    Ad.objects.filter(pk=ad.pk).update(created_at=cheap.created_at.replace(year=2020))
+
+    def pks(**params):
+        response = api_client.get('/api/ads/', params)
+        assert response.status_code == status.HTTP_200_OK
+        return [item['pk'] for item in response.data['results']]
+
+    assert pks(price_min=100, price_max=1000) == [cheap.pk]
+    assert pks(price_min=1000) == [expensive.pk]
+    assert pks(author=other.pk) == [expensive.pk]
+    assert pks(created_before='2021-01-01T00:00:00Z') == [ad.pk]
+    assert pks(created_after='2021-01-01T00:00:00Z') == [expensive.pk, cheap.pk]
+    assert pks(has_image='true') == [cheap.pk]
+    assert pks(has_image='false') == [expensive.pk, ad.pk]
+    assert pks(ordering='-price', price_min=0) == [expensive.pk, cheap.pk]
+    assert api_client.get('/api/ads/', {'price_min': 'many'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_ad_facets(api_client, user, ad, settings):
+    settings.AD_PRICE_BUCKETS = [0, 1000, 10000]
+    Ad.objects.create(title='Cheap', price=500, author=user, image='ads/cheap.jpg')
+    Ad.objects.create(title='Middle', price=5000, author=user)
+    Ad.objects.create(title='Expensive', price=20000, author=user)
+    Ad.objects.create(title='Deleted', price=700, author=user).soft_delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get('/api/ads/facets/', {'price_min': 1000})
+    assert response.status_code == status.HTTP_200_OK
+    assert response['X-Cache'] == 'MISS'
+    # Границы цены не сужают распределение по диапазонам.
+    assert response.data == {
+        'count': 4,
+        'with_image': 1,
+        'without_price': 1,
+        'price_min': 500,
+        'price_max': 20000,
+        'price_buckets': [
+            {'min': 0, 'max': 1000, 'count': 1},
+            {'min': 1000, 'max': 10000, 'count': 1},
+            {'min': 10000, 'max': None, 'count': 1},
+        ],
+    }
+    assert len([query for query in queries if 'notice_board_ad' in query['sql']]) == 1
+
+    # Ответ кешируется до изменения объявлений, остальные фильтры учитываются.
+    assert api_client.get('/api/ads/facets/', {'price_min': 1000})['X-Cache'] == 'HIT'
+    Ad.objects.create(title='Free', price=0, author=user)
+    assert api_client.get('/api/ads/facets/', {'price_min': 1000}).data['price_buckets'][0]['count'] == 2
+    assert api_client.get('/api/ads/facets/', {'has_image': 'true'}).data['count'] == 1
+    assert api_client.get('/api/ads/facets/', {'author': 'x'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_search_backend_selection(settings):
+    settings.AD_SEARCH_BACKEND = None
+    expected = PostgresSearchBackend if connection.vendor == 'postgresql' else SimpleSearchBackend
+    assert isinstance(get_search_backend(), expected)
+
+    settings.AD_SEARCH_BACKEND = 'notice_board.search.SimpleSearchBackend'
+    assert isinstance(get_search_backend(), SimpleSearchBackend)
+
+
+def _make_author(n):
+    return get_user_model().objects.create_user(
+        email=f'author{n}@example.com', password='password', first_name=f'Name{n}'
+    )
+
+
+@pytest.mark.django_db
+def test_list_comments_constant_queries(authenticated_client, ad):
+    def populate(size):
+        for n in range(Comment.objects.count(), size):
+            Comment.objects.create(text=f'Comment {n}', author=_make_author(n), ad=ad)
+
+    assert_constant_queries(
+        lambda: authenticated_client.get(f'/api/ads/{ad.id}/comments/'),
+        populate,
+    )
+    response = authenticated_client.get(f'/api/ads/{ad.id}/comments/')
+    assert {item['author_first_name'] for item in response.data['results']} == {f'Name{n}' for n in range(4)}
+
+
+@pytest.mark.django_db
+def test_list_ads_constant_queries(api_client):
+    def populate(size):
+        for n in range(Ad.objects.count(), size):
+            Ad.objects.create(title=f'Ad {n}', author=_make_author(n))
+
+    assert_constant_queries(lambda: api_client.get('/api/ads/'), populate)
+
+
+def test_normalize_sql():
+    assert normalize_sql(
+        'SELECT "a"."id", (SELECT COUNT(*) FROM "c") AS "n" FROM "a" WHERE "a"."id" IN (%s, %s) AND "a"."title" = \'x\' LIMIT 21'
+    ) == 'SELECT ... FROM "a" WHERE "a"."id" IN (...) AND "a"."title" = ? LIMIT ?'
+    assert normalize_sql('UPDATE "a" SET "b" = %s, "c" = %s WHERE "a"."id" = %s') == 'UPDATE "a" SET ... WHERE "a"."id" = ?'
+    assert normalize_sql('SAVEPOINT "s140_x1"') == 'SAVEPOINT'
+
+
+@pytest.mark.django_db
+def test_query_recorder_detects_added_queries(authenticated_client, comment):
+    with QueryRecorder() as recorder:
+        authenticated_client.get(f'/api/ads/{comment.ad_id}/comments/')
+    assert [entry['request'] for entry in recorder.requests] == ['GET /api/ads/<int:ad_pk>/comments/']
+    baseline = recorder.requests
+    assert compare_queries(baseline, recorder.requests) == ([], False)
+
+    # Отзывы без select_related: автор каждого отзыва загружается отдельным запросом.
+    author_query = 'SELECT ... FROM "users_user" WHERE "users_user"."id" = ? LIMIT ?'
+    grown = [{**baseline[0], 'queries': {**baseline[0]['queries'], author_query: 3}}]
+    problems, improved = compare_queries(baseline, grown)
+    assert 'N+1' in problems[-1] and not improved
+    assert compare_queries(grown, baseline) == ([], True)
+
+
+@pytest.mark.django_db
+def test_retrieve_ad_single_query(authenticated_client, ad):
+    with CaptureQueriesContext(connection) as context:
+        response = authenticated_client.get(f'/api/ads/{ad.id}/')
+    assert response.data['author_first_name'] == ad.author.first_name
+    # Кроме выборки объявления с автором - только агрегат валидаторов условного запроса.
+    queries = [query['sql'] for query in context.captured_queries if 'MAX(' not in query['sql']]
+    assert len(queries) == 1
+    assert len(context.captured_queries) == 2
+
+
+@pytest.mark.django_db
+def test_list_ads_response_cache(api_client, ad):
+    first = api_client.get('/api/ads/')
+    with CaptureQueriesContext(connection) as context:
+        second = api_client.get('/api/ads/')
+    assert first['X-Cache'] == 'MISS'
+    assert second['X-Cache'] == 'HIT'
+    assert len(context.captured_queries) == 0
+    assert second.data == first.data
+
+    # Другие параметры запроса - другой ключ.
+    assert api_client.get('/api/ads/', {'q': 'test'})['X-Cache'] == 'MISS'
+
+    ad.title = 'Changed'
+    ad.save()
+    response = api_client.get('/api/ads/')
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['results'][0]['title'] == 'Changed'
+
+    stats = get_cache_stats()['AdListAPIView']
+    assert stats['hit'] >= 1 and stats['miss'] >= 3
+
+
+@pytest.mark.django_db
+def test_retrieve_ad_cache_invalidated_by_comment(authenticated_client, ad, user):
+    url = f'/api/ads/{ad.id}/'
+    assert authenticated_client.get(url)['X-Cache'] == 'MISS'
+    assert authenticated_client.get(url)['X-Cache'] == 'HIT'
+
+    Comment.objects.create(text='New', author=user, ad=ad)
+    assert authenticated_client.get(url)['X-Cache'] == 'MISS'
+
+    # Регистрация других пользователей и вход автора карточку не инвалидируют.
+    other = get_user_model().objects.create_user(email='other@example.com', password='password')
+    other.first_name = 'Другой'
+    other.save()
+    user.last_login = ad.created_at
+    user.save(update_fields=['last_login'])
+    assert authenticated_client.get(url)['X-Cache'] == 'HIT'
+
+    user.phone = '+70000000000'
+    user.save()
+    response = authenticated_client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['phone'] == '+70000000000'
+
+
+@pytest.mark.django_db
+def test_retrieve_ad_cache_checks_permissions(api_client, authenticated_client, ad):
+    authenticated_client.get(f'/api/ads/{ad.id}/')
+    response = APIClient().get(f'/api/ads/{ad.id}/')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_response_cache_waits_for_lock_holder(monkeypatch):
+    from django.core.cache import cache
+
+    monkeypatch.setattr(response_cache, 'LOCK_WAIT', 0.2)
+    cache.add('key:lock', 1)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'computed', True
+
+    # Блокировка занята, значение так и не появилось: после ожидания вычисляем сами.
+    assert response_cache.get_or_compute('test', 'key', compute) == ('computed', False)
+    # Значение появилось в кеше: повторного вычисления нет.
+    assert response_cache.get_or_compute('test', 'key', compute) == ('computed', True)
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_ad_soft_delete_and_purge(settings, authenticated_client, django_capture_on_commit_callbacks, user):
+    ad = Ad.objects.create(title='Photo', author=user, image=_make_upload())
+    process_image_variants('notice_board.Ad', ad.pk)
+    ad.refresh_from_db()
+    files = [ad.image.name] + [record['webp'] for record in ad.image_variants['variants'].values()]
+    Comment.objects.bulk_create(Comment(text=f'Отзыв {n}', author=user, ad=ad) for n in range(3))
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = authenticated_client.delete(f'/api/ads/{ad.pk}/delete/')
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    # Запись помечена, отзывы и файлы на месте, но через API объявление и отзывы не видны.
+    assert Ad.all_objects.get(pk=ad.pk).deleted_at is not None
+    assert Comment.all_objects.filter(ad=ad).count() == 3
+    assert authenticated_client.get(f'/api/ads/{ad.pk}/').status_code == status.HTTP_404_NOT_FOUND
+    assert authenticated_client.get(f'/api/ads/{ad.pk}/comments/').data['results'] == []
+    assert authenticated_client.post(f'/api/ads/{ad.pk}/comments/', {'text': 'x'}).status_code == 404
+
+    # Очистка идёт порциями: задача ставит следующую, пока порция полная.
+    settings.PURGE_BATCH_SIZE = 2
+    with django_capture_on_commit_callbacks(execute=True):
+        for callback in callbacks:
+            callback()
+    assert not Comment.all_objects.exists()
+    assert not Ad.all_objects.exists()
+    assert not any(default_storage.exists(name) for name in files)
+    assert purge_batch() == 0
+
+
+@pytest.mark.django_db
+def test_comment_counters(authenticated_client, ad):
+    url = f'/api/ads/{ad.id}/comments/'
+    first = authenticated_client.post(url, {'text': 'First'}, format='json').data
+    second = authenticated_client.post(url, {'text': 'Second'}, format='json').data
+    ad.refresh_from_db()
+    assert ad.comments_count == 2
+    assert ad.last_commented_at == Comment.objects.get(pk=second['pk']).created_at
+
+    authenticated_client.delete(f'{url}{second["pk"]}/')
+    ad.refresh_from_db()
+    assert ad.comments_count == 1
+    assert ad.last_commented_at == Comment.objects.get(pk=first['pk']).created_at
+
+    response = authenticated_client.get('/api/ads/')
+    assert response.data['results'][0]['comments_count'] == 1
+
+
+@pytest.mark.django_db
+def test_rebuild_ad_counters_command(user):
+    ads = Ad.objects.bulk_create(Ad(title=f'Ad {i}', author=user) for i in range(3))
+    Comment.objects.bulk_create(Comment(text='Text', author=user, ad=ads[0]) for _ in range(3))
+    Ad.objects.filter(pk=ads[1].pk).update(comments_count=7)
+
+    call_command('rebuild_ad_counters', batch_size=2, stdout=StringIO())
+
+    counts = dict(Ad.objects.values_list('pk', 'comments_count'))
+    assert counts == {ads[0].pk: 3, ads[1].pk: 0, ads[2].pk: 0}
+    assert Ad.objects.get(pk=ads[0].pk).last_commented_at is not None
+    assert Ad.objects.get(pk=ads[1].pk).last_commented_at is None
+
+
+@pytest.mark.django_db
+def test_list_ads_ordering_by_last_comment(api_client, user):
+    ads = Ad.objects.bulk_create(Ad(title=f'Ad {i}', author=user) for i in range(4))
+    for ad in ads[:2]:
+        Comment.objects.create(text='Text', author=user, ad=ad)
+    call_command('rebuild_ad_counters', stdout=StringIO())
+
+    seen = []
+    url = '/api/ads/?ordering=-last_commented_at&page_size=1'
+    while url:
+        response = api_client.get(url).data
+        seen.extend(item['pk'] for item in response['results'])
+        url = response['next']
+    # Сначала объявления с отзывами, объявления без отзывов - в конце ленты.
+    assert seen[:2] == [ads[1].pk, ads[0].pk]
+    assert sorted(seen[2:]) == [ads[2].pk, ads[3].pk]
+
+    response = api_client.get('/api/ads/', {'comments_count_min': 1})
+    assert len(response.data['results']) == 2
+
+
+@pytest.mark.django_db
+def test_import_ads_jsonl_and_csv(tmp_path, user):
+    jsonl = tmp_path / 'ads.jsonl'
+    jsonl.write_text(
+        '{"title": "Сумка", "price": "2500", "author_email": "test@example.com"}\n'
+        '{"title": "", "price": 1}\n'
+        'not json\n'
+        '{"title": "Чужое", "author_email": "missing@example.com"}\n'
+        '{"title": "Без автора", "description": "Описание"}\n',
+        encoding='utf-8',
+    )
+    stderr = StringIO()
+    call_command('import_ads', str(jsonl), batch_size=2, stdout=StringIO(), stderr=stderr)
+    assert set(Ad.objects.values_list('title', 'price', 'author')) == {
+        ('Сумка', 2500, user.pk), ('Без автора', None, None),
+    }
+    assert stderr.getvalue().count('Строка') == 3
+
+    csv_file = tmp_path / 'ads.csv'
+    csv_file.write_text('title,price,author_email\nПортфель,6000,test@example.com\n', encoding='utf-8')
+    call_command('import_ads', str(csv_file), stdout=StringIO(), stderr=StringIO())
+    assert Ad.objects.get(title='Портфель').author == user
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fmt', ['jsonl', 'csv'])
+def test_export_import_roundtrip(tmp_path, user, fmt):
+    Ad.objects.create(title='Сумка', price=2500, description='Кожа', author=user)
+    Ad.objects.create(title='Без цены', author=None)
+    path = tmp_path / f'ads.{fmt}'
+    call_command('export_ads', output=str(path), chunk_size=1, stderr=StringIO())
+
+    Ad.objects.all().delete()
+    call_command('import_ads', str(path), stdout=StringIO(), stderr=StringIO())
+    assert set(Ad.objects.values_list('title', 'price', 'description', 'author')) == {
+        ('Сумка', 2500, 'Кожа', user.pk), ('Без цены', None, None, None),
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_ads(authenticated_client, user):
+    own = Ad.objects.create(title='Own', author=user)
+    to_delete = Ad.objects.create(title='Old', author=user)
+    payload = {
+        'create': [{'title': 'First', 'price': 10}, {'title': 'Second'}],
+        'update': [{'pk': own.pk, 'price': 500}],
+        'delete': [to_delete.pk],
+    }
+    response = authenticated_client.post('/api/ads/bulk/', payload, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert [item['status'] for item in response.data['create']] == ['created', 'created']
+    assert response.data['update'] == [{'pk': own.pk, 'status': 'updated'}]
+    assert response.data['delete'] == [{'pk': to_delete.pk, 'status': 'deleted'}]
+
+    own.refresh_from_db()
+    assert own.price == 500 and own.title == 'Own'
+    assert not Ad.objects.filter(pk=to_delete.pk).exists()
+    assert set(Ad.objects.filter(title__in=['First', 'Second']).values_list('author', flat=True)) == {user.pk}
+
+
+@pytest.mark.django_db
+def test_bulk_ads_rejected_as_a_whole(authenticated_client, user):
+    other = get_user_model().objects.create_user(email='other@example.com', password='password')
+    foreign = Ad.objects.create(title='Foreign', author=other)
+    payload = {
+        'create': [{'title': 'New'}, {'price': 1}],
+        'update': [{'pk': foreign.pk, 'title': 'Mine now'}],
+        'delete': [999999],
+    }
+    response = authenticated_client.post('/api/ads/bulk/', payload, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['create'][0] == {}
+    assert 'title' in response.data['create'][1]
+
+    del payload['create'][1]
+    response = authenticated_client.post('/api/ads/bulk/', payload, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'pk' in response.data['update'][0]
+    assert 'pk' in response.data['delete'][0]
+    assert not Ad.objects.filter(title='New').exists()
+    foreign.refresh_from_db()
+    assert foreign.title == 'Foreign'
+
+
+@pytest.mark.django_db
+def test_admin_can_update_foreign_ad(api_client, ad):
+    admin = get_user_model().objects.create_superuser(email='admin@example.com', password='password')
+    api_client.force_authenticate(user=admin)
+    response = api_client.patch(f'/api/ads/{ad.id}/update/', {'title': 'Moderated'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+
+    response = api_client.post('/api/ads/bulk/', {'delete': [ad.pk]}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert not Ad.objects.exists()
+
+
+def _make_upload(name='photo.jpg', size=(2000, 1000), orientation=None):
+    image = BytesIO()
+    exif = Image.Exif()
+    exif[0x0110] = 'Camera'
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new('RGB', size, color='red').save(image, format='JPEG', exif=exif)
+    return SimpleUploadedFile(name, image.getvalue(), content_type='image/jpeg')
+
+
+@pytest.mark.django_db
+def test_process_image_variants(api_client, user):
+    # Ориентация 6: снимок повёрнут на 90°, варианты должны стать вертикальными.
+    ad = Ad.objects.create(title='Photo', author=user, image=_make_upload(orientation=6))
+    process_image_variants('notice_board.Ad', ad.pk)
+
+    ad.refresh_from_db()
+    assert ad.image_variants['source'] == ad.image.name
+    variants = ad.image_variants['variants']
+    assert set(variants) == {'thumb', 'card', 'full'}
+    assert (variants['thumb']['width'], variants['thumb']['height']) == (80, 160)
+    assert (variants['full']['width'], variants['full']['height']) == (800, 1600)
+    for record in variants.values():
+        for fmt in ('webp', 'jpeg'):
+            with default_storage.open(record[fmt]) as file:
+                variant = Image.open(file)
+                assert variant.format == fmt.upper()
+                assert variant.size == (record['width'], record['height'])
+                assert not variant.getexif()
+
+    # Повторный запуск ничего не пересоздаёт.
+    with CaptureQueriesContext(connection) as queries:
+        process_image_variants('notice_board.Ad', ad.pk)
+    assert len(queries) == 1
+
+    srcset = api_client.get('/api/ads/').data['results'][0]['image_srcset']
+    assert srcset['card']['width'] == 240
+    assert srcset['card']['webp'].startswith('http://testserver/media/ads/variants/')
+
+
+@pytest.mark.django_db
+def test_image_variants_scheduled_after_commit(monkeypatch, django_capture_on_commit_callbacks, user):
+    scheduled = []
+    monkeypatch.setattr(signals.process_image_variants, 'delay', lambda *args: scheduled.append(args))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ad = Ad.objects.create(title='Photo', author=user, image=_make_upload())
+    assert scheduled == [('notice_board.Ad', ad.pk)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.image = _make_upload('avatar.jpg')
+        user.save()
+    assert scheduled[-1] == ('users.User', user.pk)
+
+    # Без изменения изображения обработка не запускается.
+    process_image_variants('notice_board.Ad', ad.pk)
+    ad.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        ad.title = 'Renamed'
+        ad.save()
+    assert len(scheduled) == 2
+
+
+@pytest.mark.django_db
+def test_direct_image_upload(api_client, authenticated_client, django_capture_on_commit_callbacks, ad):
+    body = _make_upload().read()
+    response = authenticated_client.post(f'/api/ads/{ad.pk}/image/upload/',
+                                         {'content_type': 'image/jpeg', 'size': len(body)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    upload = response.data['upload']
+    assert upload['method'] == 'PUT'
+    assert upload['url'].startswith('http://testserver/api/media/upload/')
+    path = upload['url'].removeprefix('http://testserver')
+
+    # Подтверждение до загрузки и загрузка с чужим типом или больше заявленного отклоняются.
+    confirm_url = f'/api/ads/{ad.pk}/image/confirm/'
+    assert authenticated_client.post(confirm_url, {'token': response.data['token']}).status_code == 400
+    assert api_client.put(path, body, content_type='image/png').status_code == 415
+    assert api_client.put(path, body + b'x', content_type='image/jpeg').status_code == 413
+
+    # Тип проверяется по содержимому: не изображение и PNG под именем .jpg отклоняются и удаляются.
+    name = response.data['name']
+    png = BytesIO()
+    Image.new('RGB', (10, 10)).save(png, format='PNG')
+    for fake in (b'<?php echo 1; ?>', png.getvalue()):
+        assert api_client.put(path, fake, content_type='image/jpeg').status_code == status.HTTP_204_NO_CONTENT
+        assert authenticated_client.post(confirm_url, {'token': response.data['token']}).status_code == 400
+        assert not default_storage.exists(name)
+
+    assert api_client.put(path, body, content_type='image/jpeg').status_code == status.HTTP_204_NO_CONTENT
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post(confirm_url, {'token': response.data['token']})
+    assert response.status_code == status.HTTP_200_OK
+    ad.refresh_from_db()
+    assert ad.image.name.startswith('ads/') and ad.image.name.endswith('.jpg')
+    assert response.data['image'] == f'http://testserver/media/{ad.image.name}'
+    assert set(ad.image_variants['variants']) == {'thumb', 'card', 'full'}
+
+    too_large = authenticated_client.post(f'/api/ads/{ad.pk}/image/upload/',
+                                          {'content_type': 'image/gif', 'size': 10 ** 9}, format='json')
+    assert set(too_large.data) == {'content_type', 'size'}
+
+
+@pytest.mark.django_db
+def test_direct_image_upload_token_bound_to_ad(authenticated_client, user, ad):
+    other = Ad.objects.create(title='Other', author=user)
+    token = authenticated_client.post(f'/api/ads/{ad.pk}/image/upload/',
+                                      {'content_type': 'image/png', 'size': 100}, format='json').data['token']
+    response = authenticated_client.post(f'/api/ads/{other.pk}/image/confirm/', {'token': token})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'token' in response.data
+
+    stranger = APIClient()
+    stranger.force_authenticate(get_user_model().objects.create_user(email='stranger@example.com', password='p'))
+    response = stranger.post(f'/api/ads/{ad.pk}/image/upload/', {'content_type': 'image/png', 'size': 100})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_async_read_views_match_sync_views(user, comment):
+    factory = APIRequestFactory()
+    views = [
+        (AsyncAdListView, AdListAPIView.as_view(), '/api/ads/?title=Test', {}),
+        (AsyncAdRetrieveView, AdRetrieveAPIView.as_view(), f'/api/ads/{comment.ad_id}/', {'pk': comment.ad_id}),
+        (AsyncCommentListView, CommentViewSet.as_view({'get': 'list'}),
+         f'/api/ads/{comment.ad_id}/comments/', {'ad_pk': comment.ad_id}),
+    ]
+    for async_view_class, sync_view, url, kwargs in views:
+        async_view = async_view_class.as_view()
+        assert asyncio.iscoroutinefunction(async_view)
+
+        request = factory.get(url)
+        force_authenticate(request, user=user)
+        async_response = async_to_sync(async_view)(request, **kwargs)
+        cache.clear()
+        request = factory.get(url)
+        force_authenticate(request, user=user)
+        sync_response = sync_view(request, **kwargs)
+        sync_response.render()
+
+        assert async_response.status_code == sync_response.status_code == 200
+        assert async_response.content == sync_response.content
+
+
+@pytest.mark.django_db
+def test_async_read_views_errors(authenticated_client, ad):
+    response = APIClient().get(f'/api/ads/{ad.pk}/')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response['WWW-Authenticate'].startswith('Bearer')
+
+    assert authenticated_client.get('/api/ads/0/').status_code == status.HTTP_404_NOT_FOUND
+    assert authenticated_client.get('/api/ads/?cursor=broken').status_code == status.HTTP_404_NOT_FOUND
+
+    # POST по адресу списка отзывов обрабатывает синхронный CommentViewSet.
+    response = authenticated_client.post(f'/api/ads/{ad.pk}/comments/', {'text': 'Отзыв'}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert authenticated_client.get(f'/api/ads/{ad.pk}/comments/').data['results'][0]['text'] == 'Отзыв'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('build_queryset, index', [
+    (lambda ad: Ad.objects.order_by('-created_at', '-pk')[:20], 'ad_created_at_id_idx'),
+    (lambda ad: Ad.objects.filter(author_id=ad.author_id).order_by('-created_at')[:20], 'ad_author_created_at_idx'),
+    (lambda ad: Comment.objects.filter(ad=ad).order_by('created_at', 'pk'), 'comment_ad_created_at_idx'),
+    (lambda ad: Ad.objects.filter(price__gte=100).order_by('price'), 'ad_priced_idx'),
+    (lambda ad: Ad.objects.filter(AD_HAS_IMAGE).order_by('-created_at', '-pk')[:20], 'ad_with_image_idx'),
+])
+def test_query_plans_use_indexes(user, ad, build_queryset, index):
+    # Без объявлений с изображением частичный индекс пуст и планировщик SQLite его не выбирает.
+    Ad.objects.create(title='С изображением', author=user, image='ads/photo.jpg')
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # На маленькой тестовой таблице планировщик иначе выбрал бы полный просмотр.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        else:
+            cursor.execute('ANALYZE')
+        plan = build_queryset(ad).explain()
+    assert index in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('async_views', [True, False])
+def test_comment_thread_pagination_and_since(authenticated_client, user, ad, async_views):
+    url = f'/api/ads/{ad.pk}/comments/'
+    view = AsyncCommentListView.as_view() if async_views else CommentViewSet.as_view({'get': 'list'})
+    factory = APIRequestFactory()
+
+    def get(params=None, path=url, **headers):
+        request = factory.get(path, params or {}, **headers)
+        force_authenticate(request, user=user)
+        response = (async_to_sync(view) if async_views else view)(request, ad_pk=ad.pk)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    comments = [Comment.objects.create(text=f'Отзыв {n}', author=user, ad=ad) for n in range(5)]
+    # Одинаковое время создания: порядок и since держатся на pk.
+    Comment.objects.filter(pk__in=[c.pk for c in comments[:3]]).update(created_at=comments[0].created_at)
+
+    first = get({'page_size': 3})
+    first_data = json.loads(first.content)
+    assert [item['pk'] for item in first_data['results']] == [c.pk for c in comments[:3]]
+    second = json.loads(get(path=first_data['next']).content)
+    assert [item['pk'] for item in second['results']] == [c.pk for c in comments[3:]]
+    assert second['next'] is None
+
+    # Опрос новых отзывов: по значению since и по дате.
+    assert json.loads(get({'since': second['since']}).content)['results'] == []
+    new = Comment.objects.create(text='Новый', author=user, ad=ad)
+    polled = json.loads(get({'since': second['since']}).content)
+    assert [item['pk'] for item in polled['results']] == [new.pk]
+    by_time = json.loads(get({'since': comments[0].created_at.isoformat()}).content)
+    assert [item['pk'] for item in by_time['results']] == [c.pk for c in comments[3:]] + [new.pk]
+    assert get({'since': 'broken'}).status_code == status.HTTP_404_NOT_FOUND
+
+    # Условные запросы: 304, пока ветка не изменилась, в том числе при редактировании.
+    response = get()
+    etag = response['ETag']
+    assert response['Last-Modified']
+    assert get(HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+    assert get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == status.HTTP_304_NOT_MODIFIED
+    new.text = 'Исправленный'
+    new.save()
+    assert get(HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    # ETag зависит только от авторов отзывов ветки.
+    etag = get()['ETag']
+    other = get_user_model().objects.create_user(email='other@example.com', password='password')
+    other.first_name = 'Другой'
+    other.save()
+    assert get(HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+    user.first_name = 'Новое имя'
+    user.save()
+    assert get(HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event['type'], event['pk']))
+
+
+@pytest.mark.django_db
+def test_model_changes_publish_events(monkeypatch, django_capture_on_commit_callbacks, user, ad):
+    broker = RecordingBroker()
+    monkeypatch.setattr(events, '_broker', broker)
+    channel = f'ad:{ad.pk}'
+
+    with django_capture_on_commit_callbacks(execute=True):
+        comment_pk = Comment.objects.create(text='Отзыв', author=user, ad=ad).pk
+        # До фиксации транзакции события не рассылаются.
+        assert broker.published == []
+    with django_capture_on_commit_callbacks(execute=True):
+        ad.title = 'Новое название'
+        ad.save()
+        Comment.objects.get(pk=comment_pk).delete()
+
+    assert broker.published == [
+        (channel, 'comment.created', comment_pk),
+        ('ads', 'ad.updated', ad.pk),
+        (channel, 'ad.updated', ad.pk),
+        (channel, 'comment.deleted', comment_pk),
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_changes_publish_events(monkeypatch, django_capture_on_commit_callbacks, tmp_path,
+                                     authenticated_client, ad, caplog):
+    broker = RecordingBroker()
+    monkeypatch.setattr(events, '_broker', broker)
+
+    payload = {'create': [{'title': 'Пакетное'}], 'update': [{'pk': ad.pk, 'price': 100}]}
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post('/api/ads/bulk/', payload, format='json')
+    created_pk = response.data['create'][0]['pk']
+    jsonl = tmp_path / 'ads.jsonl'
+    jsonl.write_text('{"title": "Импорт"}\n', encoding='utf-8')
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('import_ads', str(jsonl), stdout=StringIO(), stderr=StringIO())
+
+    # Импорт не рассылает события по каждому объявлению, только одно на пакет.
+    feed = [(event_type, pk) for channel, event_type, pk in broker.published if channel == 'ads']
+    assert feed == [('ad.created', created_pk), ('ad.updated', ad.pk), ('ads.imported', None)]
+
+    # Ошибка брокера не ломает сохранение, но попадает в лог.
+    def fail(channel, event):
+        raise ConnectionError('broker is down')
+    monkeypatch.setattr(broker, 'publish', fail)
+    with caplog.at_level('ERROR', logger='notice_board.events'):
+        events.publish(['ads'], events.build_event('ad', 'updated', ad.pk))
+    assert 'ad.updated' in caplog.text
+
+
+@pytest.mark.django_db
+def test_event_streams(monkeypatch, api_client, user, ad):
+    monkeypatch.setattr(events, '_broker', events.LocalBroker())
+    factory = APIRequestFactory()
+
+    async def receive(view, path, event, **kwargs):
+        request = factory.get(path)
+        force_authenticate(request, user=user)
+        response = await view(request, **kwargs)
+        assert response['Content-Type'] == 'text/event-stream'
+        stream = response.streaming_content
+        assert await anext(stream) == b': connected\n\n'
+        events.publish(['ads', f'ad:{ad.pk}'], event)
+        return await anext(stream)
+
+    event = events.build_event('comment', 'created', 1, {'text': 'Отзыв'})
+    chunk = async_to_sync(receive)(AsyncAdEventsView.as_view(), f'/api/ads/{ad.pk}/events/', event, pk=ad.pk)
+    assert chunk.decode() == events.format_sse(event)
+    assert chunk.startswith(b'event: comment.created\ndata: ')
+    chunk = async_to_sync(receive)(AsyncAdFeedEventsView.as_view(), '/api/ads/events/', event)
+    assert json.loads(chunk.decode().split('data: ')[1]) == event
+
+    # Поток объявления доступен только авторизованным и только для существующих объявлений.
+    request = factory.get(f'/api/ads/{ad.pk}/events/')
+    response = async_to_sync(AsyncAdEventsView.as_view())(request, pk=ad.pk)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    request = factory.get('/api/ads/0/events/')
+    force_authenticate(request, user=user)
+    response = async_to_sync(AsyncAdEventsView.as_view())(request, pk=0)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('async_views', [True, False])
+def test_ads_conditional_get(user, ad, async_views):
+    factory = APIRequestFactory()
+    if async_views:
+        list_view, detail_view = AsyncAdListView.as_view(), AsyncAdRetrieveView.as_view()
+    else:
+        list_view, detail_view = AdListAPIView.as_view(), AdRetrieveAPIView.as_view()
+
+    def get(view, path, **kwargs):
+        headers = {key: value for key, value in kwargs.items() if key.startswith('HTTP_')}
+        request = factory.get(path, **headers)
+        force_authenticate(request, user=user)
+        pk = {'pk': kwargs['pk']} if 'pk' in kwargs else {}
+        response = (async_to_sync(view) if async_views else view)(request, **pk)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    for view, path, pk in ((list_view, '/api/ads/', {}), (detail_view, f'/api/ads/{ad.pk}/', {'pk': ad.pk})):
+        response = get(view, path, **pk)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        # Ответ 304 строится по агрегату или закешированным валидаторам,
+        # объявления не загружаются.
+        with CaptureQueriesContext(connection) as context:
+            not_modified = get(view, path, HTTP_IF_NONE_MATCH=etag, **pk)
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert [query['sql'] for query in context.captured_queries if 'MAX(' not in query['sql']] == []
+        if not pk:
+            # Валидаторы ленты строятся по поколению кеша, агрегата по всей ленте нет.
+            with CaptureQueriesContext(connection) as context:
+                assert get(view, path, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+            assert context.captured_queries == []
+        assert get(view, path, HTTP_IF_MODIFIED_SINCE=last_modified, **pk).status_code == status.HTTP_304_NOT_MODIFIED
+
+        # Новый отзыв меняет счётчики объявления, а значит и валидаторы.
+        comment = Comment.objects.create(text='Отзыв', author=user, ad=ad)
+        counters.comment_added(ad.pk, comment.created_at)
+        response = get(view, path, HTTP_IF_NONE_MATCH=etag, **pk)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    # Данные автора в карточке: изменение пользователя тоже меняет ETag.
+    etag = get(detail_view, f'/api/ads/{ad.pk}/', pk=ad.pk)['ETag']
+    user.first_name = 'Новое имя'
+    user.save()
+    assert get(detail_view, f'/api/ads/{ad.pk}/', pk=ad.pk, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+    assert get(detail_view, '/api/ads/0/', pk=0).status_code == status.HTTP_404_NOT_FOUND
+
+
+def _make_tricky_rows(user):
+    """
+    Объявления и отзывы со значениями, на которых расходятся сериализаторы JSON.
+    """
+    user.first_name = 'Имя "в кавычках" \\ 😀'
+    user.image = 'users/avatar.jpg'
+    user.image_variants = {'source': 'users/avatar.jpg', 'variants': {
+        'thumb': {'width': 80, 'height': 80, 'webp': 'users/avatar_thumb.webp', 'jpeg': 'users/avatar_thumb.jpg'},
+    }}
+    user.save()
+    ads = [
+        Ad.objects.create(title='Строка\u2028с разделителями\u2029', price=None,
+                          description='\x00\x1f\t\n<script>', author=user, image='ads/photo.jpg'),
+        Ad.objects.create(title='Без автора', price=10 ** 12, description=None, author=None),
+    ]
+    Ad.objects.filter(pk=ads[0].pk).update(image_variants={'source': 'ads/photo.jpg', 'variants': {
+        'card': {'width': 400, 'height': 300, 'webp': 'ads/photo_card.webp', 'jpeg': 'ads/photo_card.jpg'},
+    }})
+    for ad in ads:
+        Comment.objects.create(text='Отзыв\u2028 "текст"', author=user, ad=ad)
+        Comment.objects.create(text='Аноним', author=None, ad=ad)
+    return ads
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('with_orjson', [True, False])
+@pytest.mark.parametrize('serializer_class, model', [
+    (AdSerializer, Ad),
+    (AdDetailSerializer, Ad),
+    (CommentSerializer, Comment),
+])
+def test_fast_serializers_match_serializers(monkeypatch, user, serializer_class, model, with_orjson):
+    from notice_board import renderers
+    if not with_orjson:
+        monkeypatch.setattr(renderers, 'orjson', None)
+    _make_tricky_rows(user)
+    request = APIRequestFactory().get('/api/ads/')
+    context = {'request': request}
+    queryset = model.objects.order_by('pk')
+
+    expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+    fast = FastSerializer(serializer_class, context)
+    assert FastJSONRenderer().render(fast.serialize(fast.values(queryset))) == expected
+    # Без request ссылки остаются относительными, как и у обычного сериализатора.
+    expected = JSONRenderer().render(serializer_class(queryset.first()).data)
+    fast = FastSerializer(serializer_class)
+    assert FastJSONRenderer().render(fast.to_representation(fast.values(queryset).first())) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('async_views', [True, False])
+def test_fast_serialization_endpoints(settings, user, async_views):
+    ads = _make_tricky_rows(user)
+    factory = APIRequestFactory()
+    if async_views:
+        views = (AsyncAdListView.as_view(), AsyncAdRetrieveView.as_view(), AsyncCommentListView.as_view())
+    else:
+        views = (AdListAPIView.as_view(), AdRetrieveAPIView.as_view(), CommentViewSet.as_view({'get': 'list'}))
+    requests = [
+        (views[0], '/api/ads/?page_size=1', {}),
+        (views[1], f'/api/ads/{ads[0].pk}/', {'pk': ads[0].pk}),
+        (views[2], f'/api/ads/{ads[0].pk}/comments/', {'ad_pk': ads[0].pk}),
+    ]
+
+    def get(view, url, kwargs):
+        cache.clear()
+        request = factory.get(url)
+        force_authenticate(request, user=user)
+        response = (async_to_sync(view) if async_views else view)(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        assert response.status_code == status.HTTP_200_OK
+        return response.content
+
+    for view, url, kwargs in requests:
+        settings.FAST_SERIALIZERS = False
+        expected = get(view, url, kwargs)
+        settings.FAST_SERIALIZERS = True
+        assert get(view, url, kwargs) == expected
+
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+@pytest.mark.parametrize('async_views', [True, False])
+def test_reads_routed_to_replica(settings, monkeypatch, user, ad, async_views):
+    settings.DATABASE_REPLICAS = ['replica']
+    monkeypatch.setattr(replicas, '_health', {})
+    # На реплике та же запись, но с другим заголовком - по нему видно, откуда прочитан ответ.
+    user.save(using='replica')
+    Ad.objects.using('replica').create(pk=ad.pk, title='С реплики', author_id=user.pk)
+    # Сигналы сохранения отметили карточку изменённой, для начала сбрасываем отметку.
+    cache.clear()
+    view = AsyncAdRetrieveView.as_view() if async_views else AdRetrieveAPIView.as_view()
+    factory = APIRequestFactory()
+
+    def get_title():
+        request = factory.get(f'/api/ads/{ad.pk}/')
+        force_authenticate(request, user=user)
+        response = (async_to_sync(view) if async_views else view)(request, pk=ad.pk)
+        if hasattr(response, 'render'):
+            response.render()
+        return json.loads(response.content)['title']
+
+    assert get_title() == 'С реплики'
+    assert replicas.ReplicaRouter().db_for_write(Ad) == 'default'
+
+    # Только что изменённая карточка читается из основной базы.
+    cache.clear()
+    response_cache.bump_generations(f'ad:{ad.pk}')
+    assert get_title() == 'Test Ad'
+
+    # Пользователь после записи закреплён за основной базой.
+    cache.clear()
+    replicas.pin_user(user)
+    assert get_title() == 'Test Ad'
+
+    # Отстающая реплика выводится из ротации до следующей проверки.
+    cache.clear()
+    monkeypatch.setattr(replicas, 'get_replica_lag', lambda alias: 60.0)
+    monkeypatch.setattr(replicas, '_health', {})
+    assert get_title() == 'Test Ad'
+    assert replicas.get_replica_stats() == {'replica': {'healthy': False, 'lag': 60.0}}
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_writes_pin_user_to_primary(settings, authenticated_client, user, ad):
+    settings.DATABASE_REPLICAS = ['replica']
+    assert authenticated_client.get('/api/ads/').status_code == status.HTTP_200_OK
+    assert not replicas.is_pinned(user)
+
+    response = authenticated_client.patch(f'/api/ads/{ad.pk}/update/', {'title': 'Новое'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert replicas.is_pinned(user)
+
+
+@pytest.mark.django_db
+def test_admin_changelists_use_cursor_and_estimates(monkeypatch, user):
+    User = get_user_model()
+    admin_user = User.objects.create_superuser(email='admin@example.com', password='password')
+    client = APIClient()
+    client.force_login(admin_user)
+    monkeypatch.setattr(AdAdmin, 'list_per_page', 2)
+    ads = [Ad.objects.create(title=f'Объявление {n}', author=user) for n in range(5)]
+    url = '/api/admin/notice_board/ad/'
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert [ad.pk for ad in first.context['cl'].result_list] == [ads[4].pk, ads[3].pk]
+    second = client.get(first.context['cl'].next_page_url.replace('?', url + '?'))
+    assert [ad.pk for ad in second.context['cl'].result_list] == [ads[2].pk, ads[1].pk]
+    last = client.get(f'{url}?cursor={ads[1].pk}')
+    assert [ad.pk for ad in last.context['cl'].result_list] == [ads[0].pk]
+    assert last.context['cl'].next_page_url is None
+
+    # Поиск и другая сортировка работают с обычной пагинацией.
+    assert [ad.pk for ad in client.get(f'{url}?q={ads[2].pk}').context['cl'].result_list] == [ads[2].pk]
+    assert client.get(f'{url}?o=2').context['cl'].cursor_mode is False
+
+    # Большие наборы не считаются точно.
+    monkeypatch.setattr(admin_utils, 'estimate_count', lambda queryset: 2_000_000)
+    response = client.get(url)
+    assert response.context['cl'].result_count == 2_000_000
+    assert 'около 2000000' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_admin_constant_queries(monkeypatch, user, ad):
+    User = get_user_model()
+    client = APIClient()
+    client.force_login(User.objects.create_superuser(email='admin@example.com', password='password'))
+
+    def populate(size):
+        for n in range(Comment.objects.count(), size):
+            other = Ad.objects.create(title=f'Объявление {n}', author=User.objects.create_user(
+                email=f'author{n}@example.com', password='password'))
+            Comment.objects.create(text=f'Отзыв {n}', author=other.author, ad=other)
+
+    assert_constant_queries(lambda: client.get('/api/admin/notice_board/comment/'), populate)
+    assert client.get(f'/api/admin/notice_board/comment/?q={ad.pk}').status_code == 200
+    assert CommentAdmin.autocomplete_fields == ('ad', 'author')
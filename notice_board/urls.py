@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from notice_board.views import (AdCreateAPIView, AdDestroyAPIView,
+from notice_board.async_views import (AsyncAdEventsView, AsyncAdFeedEventsView,
+                                      AsyncAdListView, AsyncAdRetrieveView,
+                                      AsyncCommentListView)
+from notice_board.views import (AdBulkAPIView, AdCreateAPIView,
+                                AdDestroyAPIView, AdFacetsAPIView,
+                                AdImageConfirmAPIView, AdImageUploadAPIView,
                                 AdListAPIView, AdRetrieveAPIView,
                                 AdUpdateAPIView, CommentViewSet)
 from users.apps import UsersConfig
@@ -11,11 +17,28 @@ app_name = UsersConfig.name
 router = DefaultRouter()
 router.register(r'comments', CommentViewSet, basename='comments')
 
-urlpatterns = [
+if settings.ASYNC_READ_VIEWS:
+    read_urlpatterns = [
+        path('', AsyncAdListView.as_view(), name='ads-list'),
+        path('<int:pk>/', AsyncAdRetrieveView.as_view(), name='ad-retrieve'),
+        path('<int:ad_pk>/comments/', AsyncCommentListView.as_view(), name='comments-list'),
+        # Потоки событий держат соединение открытым и доступны только под ASGI.
+        path('events/', AsyncAdFeedEventsView.as_view(), name='ads-events'),
+        path('<int:pk>/events/', AsyncAdEventsView.as_view(), name='ad-events'),
+    ]
+else:
+    read_urlpatterns = [
+        path('', AdListAPIView.as_view(), name='ads-list'),
+        path('<int:pk>/', AdRetrieveAPIView.as_view(), name='ad-retrieve'),
+    ]
+
+urlpatterns = read_urlpatterns + [
     path('create/', AdCreateAPIView.as_view(), name='ad-create'),
-    path('', AdListAPIView.as_view(), name='ads-list'),
-    path('<int:pk>/', AdRetrieveAPIView.as_view(), name='ad-retrieve'),
+    path('bulk/', AdBulkAPIView.as_view(), name='ads-bulk'),
+    path('facets/', AdFacetsAPIView.as_view(), name='ads-facets'),
     path('<int:pk>/update/', AdUpdateAPIView.as_view(), name='ad-update'),
     path('<int:pk>/delete/', AdDestroyAPIView.as_view(), name='ad-delete'),
-    path('<int:pk>/', include(router.urls)),
+    path('<int:pk>/image/upload/', AdImageUploadAPIView.as_view(), name='ad-image-upload'),
+    path('<int:pk>/image/confirm/', AdImageConfirmAPIView.as_view(), name='ad-image-confirm'),
+    path('<int:ad_pk>/', include(router.urls)),
 ]
@@ -1,12 +1,26 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import generics, viewsets
+from django_filters.utils import translate_validation
+from rest_framework import generics, status, viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from notice_board.filters import AdFilter
+from config.replicas import ReplicaReadMixin
+from config.throttling import ActionThrottleMixin
+from notice_board import counters
+from notice_board.cache import get_ad_author_scopes
+from notice_board.filters import FACET_IGNORED_PARAMS, AdFilter, price_facets
+from notice_board.mixins import (CachedResponseMixin, ConditionalResponseMixin, FastSerializationMixin,
+                                 QueryOptimizerMixin)
 from notice_board.models import Ad, Comment
-from notice_board.paginator import AdPaginator
+from notice_board.paginator import AdPaginator, CommentPaginator
+from notice_board.purge import schedule_purge
 from notice_board.permissions import IsAuthor, IsAdmin
-from notice_board.serializers import AdDetailSerializer, AdSerializer, CommentSerializer
+from notice_board.serializers import (AdBulkSerializer, AdDetailSerializer,
+                                      AdImageConfirmSerializer, AdImageUploadSerializer,
+                                      AdSerializer, CommentSerializer)
 
 
 class AdCreateAPIView(generics.CreateAPIView):
@@ -18,6 +32,7 @@ class AdCreateAPIView(generics.CreateAPIView):
     """
     serializer_class = AdDetailSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'ad_create'
 
     def perform_create(self, serializer):
         """
@@ -26,22 +41,30 @@ class AdCreateAPIView(generics.CreateAPIView):
         Параметры:
             serializer (Serializer): Сериализатор, используемый для создания объявления.
         """
-        new_ad = serializer.save()
-        new_ad.author = self.request.user
-        new_ad.save()
+        serializer.save(author=self.request.user)
 
 
-class AdListAPIView(generics.ListAPIView):
+class AdListAPIView(ReplicaReadMixin, ConditionalResponseMixin, CachedResponseMixin, QueryOptimizerMixin,
+                    FastSerializationMixin, generics.ListAPIView):
     """
     Эндпоинт для просмотра списка объявлений.
 
     Этот класс предоставляет метод для получения списка всех объявлений с возможностью фильтрации.
-    Объявления выводятся с пагинацией.
+    Объявления выводятся с курсорной пагинацией по (created_at, pk).
+    Ответы кешируются до изменения любого объявления или комментария,
+    на условные запросы возвращается 304, если объявления не менялись:
+    валидаторы строятся по поколению кеша ленты, без запросов к базе.
+    Объявления читаются из реплик, если они настроены.
     """
     serializer_class = AdSerializer
-    pagination_clas = AdPaginator
+    pagination_class = AdPaginator
     filter_backends = (DjangoFilterBackend,)
     filterset_class = AdFilter
+    throttle_scope = 'ads_list'
+    validators_from_generations = True
+
+    def get_cache_scopes(self):
+        return ['ads']
 
     def get_queryset(self):
         """
@@ -50,27 +73,66 @@ class AdListAPIView(generics.ListAPIView):
         Возврат:
             queryset (QuerySet): Список объявлений, отсортированных по убыванию даты создания.
         """
-        queryset = Ad.objects.all().order_by('-created_at')
+        queryset = Ad.objects.all().order_by('-created_at', '-pk')
         return queryset
 
 
-class AdRetrieveAPIView(generics.RetrieveAPIView):
+class AdFacetsAPIView(ReplicaReadMixin, CachedResponseMixin, generics.ListAPIView):
+    """
+    Эндпоинт фасетов для боковой панели фильтров ленты.
+
+    Принимает те же параметры, что и лента объявлений, кроме границ цены,
+    и возвращает число подходящих объявлений по диапазонам цен, с изображением
+    и без цены. Все значения считаются одним агрегирующим запросом, ответ
+    кешируется до изменения любого объявления.
+    """
+    queryset = Ad.objects.all()
+    throttle_scope = 'ads_list'
+
+    def get_cache_scopes(self):
+        return ['ads']
+
+    def list(self, request, *args, **kwargs):
+        data = request.query_params.copy()
+        for param in FACET_IGNORED_PARAMS:
+            data.pop(param, None)
+        filterset = AdFilter(data, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return Response(price_facets(filterset.qs))
+
+
+class AdRetrieveAPIView(ReplicaReadMixin, ConditionalResponseMixin, CachedResponseMixin, QueryOptimizerMixin,
+                        FastSerializationMixin, generics.RetrieveAPIView):
     """
     Эндпоинт для просмотра конкретного объявления.
 
     Этот класс предоставляет метод для получения подробной информации о конкретном объявлении.
     Только аутентифицированные пользователи могут использовать этот эндпоинт.
+    Ответ кешируется до изменения объявления, его комментариев или автора
+    и поддерживает условные запросы (ETag, Last-Modified).
     """
     serializer_class = AdDetailSerializer
     queryset = Ad.objects.all()
     permission_classes = [IsAuthenticated]
 
+    @cached_property
+    def author_scopes(self):
+        # В карточке выводятся данные автора.
+        return get_ad_author_scopes(self.kwargs['pk'])
+
+    def get_validator_scopes(self):
+        return self.author_scopes
+
+    def get_cache_scopes(self):
+        return [f'ad:{self.kwargs["pk"]}', *self.author_scopes]
+
 
-class AdUpdateAPIView(generics.UpdateAPIView):
+class AdUpdateAPIView(QueryOptimizerMixin, generics.UpdateAPIView):
     """Эндпоинт редактирования объявления"""
     serializer_class = AdDetailSerializer
     queryset = Ad.objects.all()
-    permission_classes = [IsAuthenticated, IsAuthor or IsAdmin]
+    permission_classes = [IsAuthenticated, IsAuthor | IsAdmin]
 
 
 class AdDestroyAPIView(generics.DestroyAPIView):
@@ -79,19 +141,88 @@ class AdDestroyAPIView(generics.DestroyAPIView):
 
     Этот класс предоставляет метод для удаления объявления.
     Только автор объявления или администратор могут использовать этот эндпоинт.
+    Объявление удаляется мягко: отзывы и изображения удаляет фоновая очистка.
     """
     queryset = Ad.objects.all()
-    permission_classes = [IsAuthenticated, IsAuthor or IsAdmin]
+    permission_classes = [IsAuthenticated, IsAuthor | IsAdmin]
 
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+        schedule_purge()
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class AdImageUploadAPIView(generics.GenericAPIView):
+    """
+    Эндпоинт выдачи ссылки для прямой загрузки изображения объявления в хранилище.
+
+    Клиент отправляет тип и размер файла, загружает файл по полученной ссылке
+    напрямую в хранилище и подтверждает загрузку токеном в AdImageConfirmAPIView.
+    Только автор объявления или администратор могут использовать этот эндпоинт.
+    """
+    serializer_class = AdImageUploadSerializer
+    queryset = Ad.objects.all()
+    permission_classes = [IsAuthenticated, IsAuthor | IsAdmin]
+    response_status = status.HTTP_201_CREATED
+
+    def post(self, request, *args, **kwargs):
+        ad = self.get_object()
+        serializer = self.get_serializer_class()(data=request.data,
+                                                 context={**self.get_serializer_context(), 'ad': ad})
+        serializer.is_valid(raise_exception=True)
+        return Response(self.get_response_data(serializer.save()), status=self.response_status)
+
+    def get_response_data(self, result):
+        return result
+
+
+class AdImageConfirmAPIView(AdImageUploadAPIView):
+    """
+    Эндпоинт подтверждения прямой загрузки: записывает загруженный файл в изображение объявления.
+    """
+    serializer_class = AdImageConfirmSerializer
+    response_status = status.HTTP_200_OK
+
+    def get_response_data(self, ad):
+        return AdDetailSerializer(ad, context=self.get_serializer_context()).data
+
+
+class AdBulkAPIView(generics.GenericAPIView):
+    """
+    Эндпоинт пакетного создания, изменения и удаления объявлений.
+
+    Принимает объект со списками create, update и delete и выполняет все
+    операции в одной транзакции через bulk_create, bulk_update и один UPDATE
+    мягкого удаления.
+    Если хотя бы одна операция не прошла проверку или права доступа,
+    пакет не применяется, а ошибки возвращаются по каждому элементу.
+    """
+    serializer_class = AdBulkSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'ad_create'
+
+    def post(self, request, *args, **kwargs):
+        """
+        Применяет пакет операций и возвращает результаты по каждой из них.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class CommentViewSet(ReplicaReadMixin, ActionThrottleMixin, ConditionalResponseMixin, QueryOptimizerMixin,
+                     FastSerializationMixin, viewsets.ModelViewSet):
     """
     Вьюсет для управления комментариями к объявлениям.
 
     Этот класс предоставляет методы для создания, просмотра, обновления и удаления комментариев.
     Права доступа зависят от действия (создание, просмотр, обновление, удаление).
+    Список отзывов выводится с курсорной пагинацией, поддерживает опрос новых
+    отзывов через ?since= и отвечает 304, если ветка не изменилась.
     """
     serializer_class = CommentSerializer
+    pagination_class = CommentPaginator
+    throttle_scopes = {'create': 'comment_create'}
 
     def get_queryset(self, *args, **kwargs):
         """
@@ -104,11 +235,23 @@ class CommentViewSet(viewsets.ModelViewSet):
         Возврат:
             queryset (QuerySet): Список комментариев, связанных с объявлением.
         """
-        ad_pk = self.kwargs.get('pk')
-        print(ad_pk)
-        queryset = Comment.objects.filter(ad=ad_pk)
+        ad_pk = self.kwargs.get('ad_pk')
+        queryset = Comment.objects.for_ad(ad_pk)
         return queryset
 
+    def get_validator_scopes(self):
+        """
+        Возвращает области кеша авторов отзывов: их данные выводятся в ответе.
+        """
+        author_pks = self.get_validator_queryset().order_by().values_list('author_id', flat=True).distinct()
+        return [f'user:{author_pk}' for author_pk in author_pks if author_pk is not None]
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает страницу отзывов или 304, если ветка не изменилась.
+        """
+        return self.conditional(request, lambda: super(CommentViewSet, self).list(request, *args, **kwargs))
+
     def perform_create(self, serializer, *args, **kwargs):
         """
         Создает новый комментарий, связывая его с объявлением и текущим пользователем.
@@ -118,11 +261,23 @@ class CommentViewSet(viewsets.ModelViewSet):
             *args: Дополнительные позиционные аргументы.
             **kwargs: Дополнительные именованные аргументы.
         """
-        new_comment = serializer.save()
-        new_comment.author = self.request.user
-        ad_pk = self.kwargs.get('pk')
-        new_comment.ad = Ad.objects.get(pk=ad_pk)
-        new_comment.save()
+        ad = get_object_or_404(Ad, pk=self.kwargs.get('ad_pk'))
+        with transaction.atomic():
+            new_comment = serializer.save(author=self.request.user, ad=ad)
+            counters.comment_added(ad.pk, new_comment.created_at)
+
+    def perform_destroy(self, instance):
+        """
+        Мягко удаляет комментарий и уменьшает счётчик отзывов объявления.
+
+        Параметры:
+            instance (Comment): Удаляемый комментарий.
+        """
+        with transaction.atomic():
+            instance.soft_delete()
+            if instance.ad_id is not None:
+                counters.comment_removed(instance.ad_id)
+        schedule_purge()
 
     def get_permissions(self):
         """
@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from tasks.base import get_backend
+from tasks.models import DeadLetterTask
+
+
+@admin.register(DeadLetterTask)
+class DeadLetterTaskAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для невыполненных задач.
+
+    Позволяет посмотреть ошибку и поставить задачу в очередь повторно.
+    """
+    list_display = ('pk', 'name', 'attempts', 'created_at',)
+    list_filter = ('name',)
+    readonly_fields = ('task_id', 'name', 'args', 'kwargs', 'attempts', 'error', 'created_at',)
+    actions = ('requeue',)
+
+    @admin.action(description='Поставить в очередь повторно')
+    def requeue(self, request, queryset):
+        backend = get_backend()
+        for dead in queryset:
+            backend.enqueue({
+                'id': dead.task_id,
+                'task': dead.name,
+                'args': dead.args,
+                'kwargs': dead.kwargs,
+                'attempt': 0,
+            })
+        count = queryset.count()
+        queryset.delete()
+        self.message_user(request, f'Поставлено в очередь задач: {count}')
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tasks'
+    verbose_name = 'фоновые задачи'
+
+    def ready(self):
+        # Регистрирует задачи из модулей tasks.py всех приложений,
+        # чтобы исполнитель знал их по имени.
+        autodiscover_modules('tasks')
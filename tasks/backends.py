@@ -0,0 +1,125 @@
+import json
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from tasks.base import execute
+
+
+class BaseBackend:
+    """
+    Базовый бэкенд очереди задач.
+    """
+    # Поддерживает ли бэкенд чтение очереди командой run_tasks.
+    supports_workers = False
+
+    def enqueue(self, message, countdown=0):
+        """
+        Ставит сообщение задачи в очередь.
+
+        Параметры:
+            message (dict): Сообщение задачи.
+            countdown (float): Задержка перед выполнением в секундах.
+        """
+        raise NotImplementedError
+
+    def dequeue(self, timeout):
+        """
+        Забирает следующее сообщение, ожидая его не дольше timeout секунд.
+
+        Возврат:
+            dict: Сообщение задачи или None, если очередь пуста.
+        """
+        raise NotImplementedError
+
+
+class EagerBackend(BaseBackend):
+    """
+    Выполняет задачи сразу в вызывающем потоке, повторы - без задержки.
+
+    Предназначен для тестов и отладки.
+    """
+
+    def enqueue(self, message, countdown=0):
+        execute(message, backend=self)
+
+
+class ThreadBackend(BaseBackend):
+    """
+    Очередь в памяти процесса, обслуживаемая пулом потоков.
+
+    Не требует брокера, но задачи теряются при остановке процесса.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.workers = []
+        self.lock = threading.Lock()
+
+    def enqueue(self, message, countdown=0):
+        self._start_workers()
+        if countdown:
+            timer = threading.Timer(countdown, self.queue.put, args=(message,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.queue.put(message)
+
+    def _start_workers(self):
+        if self.workers:
+            return
+        with self.lock:
+            while len(self.workers) < settings.TASK_THREAD_WORKERS:
+                worker = threading.Thread(target=self._work, name=f'tasks-{len(self.workers)}', daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def _work(self):
+        while True:
+            message = self.queue.get()
+            try:
+                execute(message, backend=self)
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+
+class RedisBackend(BaseBackend):
+    """
+    Очередь в Redis, которую обслуживают процессы manage.py run_tasks.
+
+    Готовые к выполнению сообщения хранятся в списке, отложенные повторы -
+    в сортированном множестве со временем запуска в качестве веса.
+    """
+    supports_workers = True
+
+    def __init__(self):
+        import redis
+
+        self.client = redis.Redis.from_url(settings.TASK_BROKER_URL)
+        self.queue_key = f'{settings.TASK_QUEUE_NAME}:queue'
+        self.scheduled_key = f'{settings.TASK_QUEUE_NAME}:scheduled'
+
+    def enqueue(self, message, countdown=0):
+        payload = json.dumps(message)
+        if countdown:
+            self.client.zadd(self.scheduled_key, {payload: time.time() + countdown})
+        else:
+            self.client.lpush(self.queue_key, payload)
+
+    def dequeue(self, timeout):
+        self._move_due()
+        item = self.client.brpop(self.queue_key, timeout=timeout)
+        if item is None:
+            return None
+        return json.loads(item[1])
+
+    def _move_due(self):
+        # ZREM удаляет сообщение только у одного исполнителя, поэтому
+        # наступивший повтор попадёт в очередь ровно один раз.
+        for payload in self.client.zrangebyscore(self.scheduled_key, 0, time.time(), start=0, num=100):
+            if self.client.zrem(self.scheduled_key, payload):
+                self.client.lpush(self.queue_key, payload)
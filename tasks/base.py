@@ -0,0 +1,166 @@
+import logging
+import traceback
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_backend = None
+
+
+class Task:
+    """
+    Зарегистрированная фоновая задача.
+
+    Вызов задачи выполняет функцию сразу, delay() ставит её в очередь.
+    Аргументы передаются брокеру в JSON, поэтому должны сериализоваться в JSON.
+    """
+
+    def __init__(self, func, name, max_retries, retry_backoff):
+        self.func = func
+        self.name = name
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Ставит задачу в очередь.
+
+        Возврат:
+            str: Идентификатор сообщения задачи.
+        """
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, countdown=0):
+        """
+        Ставит задачу в очередь с задержкой.
+
+        Параметры:
+            args (tuple): Позиционные аргументы задачи.
+            kwargs (dict): Именованные аргументы задачи.
+            countdown (float): Задержка перед выполнением в секундах.
+
+        Возврат:
+            str: Идентификатор сообщения задачи.
+        """
+        message = {
+            'id': uuid.uuid4().hex,
+            'task': self.name,
+            'args': list(args),
+            'kwargs': kwargs or {},
+            'attempt': 0,
+        }
+        get_backend().enqueue(message, countdown=countdown)
+        return message['id']
+
+    def get_retry_delay(self, attempt):
+        """
+        Возвращает задержку перед попыткой attempt: экспоненциально растёт
+        от retry_backoff секунд и ограничена TASK_RETRY_BACKOFF_MAX.
+        """
+        return min(self.retry_backoff * 2 ** (attempt - 1), settings.TASK_RETRY_BACKOFF_MAX)
+
+
+def task(func=None, *, name=None, max_retries=None, retry_backoff=None):
+    """
+    Декоратор, регистрирующий функцию как фоновую задачу.
+
+    Параметры:
+        name (str): Имя задачи, по умолчанию 'модуль.функция'.
+        max_retries (int): Число повторов после ошибки, по умолчанию TASK_MAX_RETRIES.
+        retry_backoff (float): Задержка первого повтора в секундах,
+            по умолчанию TASK_RETRY_BACKOFF.
+
+    Возврат:
+        Task: Зарегистрированная задача.
+    """
+    def decorator(func):
+        registered = Task(
+            func,
+            name=name or f'{func.__module__}.{func.__name__}',
+            max_retries=settings.TASK_MAX_RETRIES if max_retries is None else max_retries,
+            retry_backoff=settings.TASK_RETRY_BACKOFF if retry_backoff is None else retry_backoff,
+        )
+        _registry[registered.name] = registered
+        return registered
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def get_task(name):
+    """
+    Возвращает зарегистрированную задачу по имени или None.
+    """
+    return _registry.get(name)
+
+
+def get_backend():
+    """
+    Возвращает бэкенд очереди, заданный настройкой TASK_BACKEND.
+    """
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.TASK_BACKEND)()
+    return _backend
+
+
+def reset_backend():
+    """
+    Сбрасывает бэкенд, чтобы он был создан заново по текущим настройкам.
+    """
+    global _backend
+    _backend = None
+
+
+def execute(message, backend=None):
+    """
+    Выполняет задачу из сообщения очереди.
+
+    После ошибки задача ставится в очередь повторно с экспоненциальной
+    задержкой. Когда повторы исчерпаны, сообщение сохраняется
+    в DeadLetterTask и больше не выполняется.
+
+    Параметры:
+        message (dict): Сообщение задачи.
+        backend: Бэкенд для повторной постановки, по умолчанию текущий.
+
+    Возврат:
+        bool: True, если задача выполнена успешно.
+    """
+    registered = get_task(message['task'])
+    attempt = message['attempt'] + 1
+    try:
+        if registered is None:
+            raise LookupError(f'Неизвестная задача {message["task"]}')
+        registered(*message['args'], **message['kwargs'])
+        return True
+    except Exception:
+        error = traceback.format_exc()
+
+    if registered is not None and attempt <= registered.max_retries:
+        countdown = registered.get_retry_delay(attempt)
+        logger.warning('Задача %s завершилась ошибкой, повтор %s через %s с',
+                       message['task'], attempt, countdown)
+        (backend or get_backend()).enqueue(dict(message, attempt=attempt), countdown=countdown)
+        return False
+
+    logger.error('Задача %s не выполнена после %s попыток:\n%s', message['task'], attempt, error)
+    from tasks.models import DeadLetterTask
+
+    DeadLetterTask.objects.create(
+        task_id=message['id'],
+        name=message['task'],
+        args=message['args'],
+        kwargs=message['kwargs'],
+        attempts=attempt,
+        error=error,
+    )
+    return False
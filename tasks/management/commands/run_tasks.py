@@ -0,0 +1,48 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tasks.base import execute, get_backend
+
+
+class Command(BaseCommand):
+    """
+    Исполнитель фоновых задач из очереди Redis.
+
+    Берёт сообщения по одному и выполняет их до получения SIGTERM/SIGINT,
+    текущая задача при этом завершается. С --burst выходит, как только
+    очередь опустеет.
+    """
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Завершиться, когда очередь опустеет')
+        parser.add_argument('--poll-timeout', type=int, default=5,
+                            help='Сколько секунд ждать новое сообщение')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if not backend.supports_workers:
+            raise CommandError(f'Бэкенд {type(backend).__name__} выполняет задачи сам, исполнитель не нужен')
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processed = failed = 0
+        while not self.stopping:
+            message = backend.dequeue(options['poll_timeout'])
+            if message is None:
+                if options['burst']:
+                    break
+                continue
+            close_old_connections()
+            if execute(message, backend=backend):
+                processed += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'Выполнено {processed}, с ошибкой {failed}'))
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetterTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(help_text='Идентификатор сообщения задачи', max_length=32, verbose_name='идентификатор')),
+                ('name', models.CharField(help_text='Имя зарегистрированной задачи', max_length=200, verbose_name='задача')),
+                ('args', models.JSONField(default=list, verbose_name='аргументы')),
+                ('kwargs', models.JSONField(default=dict, verbose_name='именованные аргументы')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Число выполненных попыток', verbose_name='попытки')),
+                ('error', models.TextField(help_text='Трассировка последней ошибки', verbose_name='ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Дата и время последней неудачной попытки', verbose_name='дата создания')),
+            ],
+            options={
+                'verbose_name': 'невыполненная задача',
+                'verbose_name_plural': 'невыполненные задачи',
+            },
+        ),
+    ]
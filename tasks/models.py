@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class DeadLetterTask(models.Model):
+    """
+    Задача, которая не выполнилась после всех повторных попыток.
+    """
+    task_id = models.CharField(
+        max_length=32,
+        verbose_name='идентификатор',
+        help_text='Идентификатор сообщения задачи'
+    )
+    name = models.CharField(
+        max_length=200,
+        verbose_name='задача',
+        help_text='Имя зарегистрированной задачи'
+    )
+    args = models.JSONField(default=list, verbose_name='аргументы')
+    kwargs = models.JSONField(default=dict, verbose_name='именованные аргументы')
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='попытки',
+        help_text='Число выполненных попыток'
+    )
+    error = models.TextField(verbose_name='ошибка', help_text='Трассировка последней ошибки')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='дата создания',
+        help_text='Дата и время последней неудачной попытки'
+    )
+
+    def __str__(self):
+        """
+        Возвращает имя задачи как строковое представление объекта.
+        """
+        return self.name
+
+    class Meta:
+        verbose_name = 'невыполненная задача'
+        verbose_name_plural = 'невыполненные задачи'
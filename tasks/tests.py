@@ -0,0 +1,72 @@
+import pytest
+
+from tasks import base
+from tasks.backends import ThreadBackend
+from tasks.base import execute, task
+from tasks.models import DeadLetterTask
+
+calls = []
+
+
+@task(name='tests.flaky', max_retries=2, retry_backoff=1)
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('boom')
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.messages = []
+
+    def enqueue(self, message, countdown=0):
+        self.messages.append((message, countdown))
+
+
+@pytest.mark.django_db
+def test_task_retried_until_success():
+    flaky.delay(1)
+    assert len(calls) == 2
+    assert not DeadLetterTask.objects.exists()
+
+
+@pytest.mark.django_db
+def test_task_dead_lettered_after_retries():
+    flaky.delay(5)
+    assert len(calls) == 3
+    dead = DeadLetterTask.objects.get()
+    assert (dead.name, dead.args, dead.attempts) == ('tests.flaky', [5], 3)
+    assert 'RuntimeError: boom' in dead.error
+
+
+@pytest.mark.django_db
+def test_retry_backoff(monkeypatch):
+    backend = RecordingBackend()
+    message = {'id': 'x', 'task': 'tests.flaky', 'args': [5], 'kwargs': {}, 'attempt': 0}
+    assert execute(message, backend=backend) is False
+    assert execute(backend.messages[-1][0], backend=backend) is False
+    assert [(m['attempt'], countdown) for m, countdown in backend.messages] == [(1, 1), (2, 2)]
+
+
+@pytest.mark.django_db
+def test_unknown_task_dead_lettered():
+    execute({'id': 'x', 'task': 'tests.missing', 'args': [], 'kwargs': {}, 'attempt': 0})
+    assert DeadLetterTask.objects.get().name == 'tests.missing'
+
+
+def test_thread_backend(monkeypatch):
+    backend = ThreadBackend()
+    monkeypatch.setattr(base, '_backend', backend)
+    record.delay('value')
+    backend.queue.join()
+    assert calls == ['value']
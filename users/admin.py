@@ -1,8 +1,11 @@
 from django.contrib import admin
 
+from config.admin import LargeTableAdminMixin
 from users.models import User
 
 
 @admin.register(User)
-class UsersAdmin(admin.ModelAdmin):
+class UsersAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    # Поиск по началу email использует индекс уникальности (varchar_pattern_ops в PostgreSQL).
     list_display = ('pk', 'email', 'last_login', 'is_active', 'role')
+    search_fields = ('email__startswith',)
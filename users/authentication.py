@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.tokens import USER_CLAIMS
+
+CACHE_PREFIX = 'users:auth'
+
+
+def user_cache_key(user_id):
+    return f'{CACHE_PREFIX}:{user_id}'
+
+
+def invalidate_user(user_id):
+    """
+    Удаляет пользователя из кеша аутентификации.
+    """
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, берущая пользователя из кеша вместо базы.
+
+    Пользователь кешируется на AUTH_USER_CACHE_TIMEOUT секунд, при изменении
+    пользователя запись удаляется сигналом post_save. Роль и активность
+    из claims токена сверяются с пользователем: если они разошлись (например,
+    сменилась роль), токен отклоняется и клиент должен получить новый.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        elif not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        for claim in USER_CLAIMS:
+            if claim in validated_token and validated_token[claim] != getattr(user, claim):
+                raise AuthenticationFailed('Данные токена устарели, получите новый токен.', code='token_outdated')
+        return user
@@ -0,0 +1,50 @@
+from django.conf import settings
+from djoser import email
+
+from users.tasks import send_email
+
+
+class QueuedEmailMixin:
+    """
+    Отправляет письма Djoser через очередь задач.
+
+    Шаблон рендерится в потоке запроса (ему нужен request), а соединение
+    с SMTP-сервером выполняет фоновая задача, поэтому запрос не ждёт почтовый сервер.
+    """
+
+    def send(self, to, *args, **kwargs):
+        self.render()
+        send_email.delay(
+            subject=self.subject,
+            body=self.body,
+            from_email=kwargs.get('from_email', settings.DEFAULT_FROM_EMAIL),
+            to=list(to),
+            cc=list(kwargs.get('cc', [])),
+            bcc=list(kwargs.get('bcc', [])),
+            reply_to=list(kwargs.get('reply_to', [])),
+            html=self.html,
+        )
+
+
+class ActivationEmail(QueuedEmailMixin, email.ActivationEmail):
+    pass
+
+
+class ConfirmationEmail(QueuedEmailMixin, email.ConfirmationEmail):
+    pass
+
+
+class PasswordResetEmail(QueuedEmailMixin, email.PasswordResetEmail):
+    pass
+
+
+class PasswordChangedConfirmationEmail(QueuedEmailMixin, email.PasswordChangedConfirmationEmail):
+    pass
+
+
+class UsernameChangedConfirmationEmail(QueuedEmailMixin, email.UsernameChangedConfirmationEmail):
+    pass
+
+
+class UsernameResetEmail(QueuedEmailMixin, email.UsernameResetEmail):
+    pass
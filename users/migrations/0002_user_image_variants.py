@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Уменьшенные копии аватара, создаются в фоне после загрузки', verbose_name='Варианты аватара'),
+        ),
+    ]
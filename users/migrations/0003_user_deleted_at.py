@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Пользователь деактивирован и будет удалён фоновой очисткой вместе с объявлениями и отзывами', null=True, verbose_name='Дата удаления'),
+        ),
+    ]
@@ -31,6 +31,13 @@ class User(AbstractUser):
         verbose_name='Аватар',
         help_text='Аватар пользователя'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты аватара',
+        help_text='Уменьшенные копии аватара, создаются в фоне после загрузки'
+    )
     phone = models.CharField(
         max_length=35,
         verbose_name='Телефон',
@@ -38,6 +45,13 @@ class User(AbstractUser):
         null=True,
         help_text='Номер телефона пользователя'
     )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Дата удаления',
+        help_text='Пользователь деактивирован и будет удалён фоновой очисткой вместе с объявлениями и отзывами'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'phone']
@@ -0,0 +1,17 @@
+from rest_framework_simplejwt import serializers
+
+from users.tokens import UserRefreshToken
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    """
+    Выдаёт пару токенов с ролью и признаком активности пользователя.
+    """
+    token_class = UserRefreshToken
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    """
+    Обновляет access-токен, перечитывая роль и активность пользователя.
+    """
+    token_class = UserRefreshToken
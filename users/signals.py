@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import invalidate_user
+from users.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_authentication_cache(sender, instance, **kwargs):
+    """
+    Удаляет изменённого пользователя из кеша аутентификации.
+    """
+    invalidate_user(instance.pk)
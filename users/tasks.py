@@ -0,0 +1,26 @@
+from django.core.mail import EmailMultiAlternatives
+
+from tasks.base import task
+
+
+@task
+def send_email(subject, body, from_email, to, cc=(), bcc=(), reply_to=(), html=None):
+    """
+    Отправляет письмо, подготовленное в потоке запроса.
+    """
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        to=to,
+        cc=cc,
+        bcc=bcc,
+        reply_to=reply_to,
+    )
+    if html:
+        if body:
+            message.attach_alternative(html, 'text/html')
+        else:
+            message.body = html
+            message.content_subtype = 'html'
+    message.send()
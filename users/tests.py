@@ -1,5 +1,13 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from notice_board.models import Ad, Comment
+from tasks import base as task_base
+from users.models import UserRoles
 
 # Получаем модель пользователя
 User = get_user_model()
@@ -36,3 +44,108 @@ class TestUserManager:
 
         with pytest.raises(ValueError, match='Superuser must have is_superuser=True'):
             User.objects.create_superuser(email='superuser@example.com', password='superpassword123', is_superuser=False)
+
+
+@pytest.mark.django_db
+def test_registration_email_sent_through_task_queue(monkeypatch):
+    queued = []
+    backend = type('Backend', (), {'enqueue': lambda self, message, countdown=0: queued.append(message)})()
+    monkeypatch.setattr(task_base, '_backend', backend)
+
+    response = APIClient().post('/api/users/', {
+        'email': 'new@example.com',
+        'password': 'Str0ng-passw0rd',
+        'first_name': 'Иван',
+        'last_name': 'Иванов',
+        'phone': '+79990000000',
+    }, format='json')
+
+    assert response.status_code == 201
+    assert mail.outbox == []
+    assert [message['task'] for message in queued] == ['users.tasks.send_email']
+
+    task_base.execute(queued[0])
+    assert mail.outbox[0].to == ['new@example.com']
+
+
+@pytest.mark.django_db
+def test_jwt_user_resolved_from_cache():
+    user = User.objects.create_user(email='jwt@example.com', password='password')
+    ad = Ad.objects.create(title='Ad', author=user)
+    client = APIClient()
+    tokens = client.post('/api/token/', {'email': 'jwt@example.com', 'password': 'password'}, format='json').data
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+    url = f'/api/ads/{ad.pk}/comments/'
+
+    with CaptureQueriesContext(connection) as first:
+        assert client.get(url).status_code == 200
+    with CaptureQueriesContext(connection) as second:
+        assert client.get(url).status_code == 200
+    # Второй запрос берёт пользователя из кеша и не обращается к таблице пользователей.
+    assert len(first) == len(second) + 1
+    assert not any('FROM "users_user"' in query['sql'] for query in second.captured_queries)
+
+    # Смена роли сбрасывает кеш, и токен со старой ролью отклоняется.
+    user.role = UserRoles.ADMIN
+    user.save()
+    response = client.get(url)
+    assert response.status_code == 401
+    assert response.data['code'] == 'token_outdated'
+
+    access = client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json').data['access']
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_user_deletion_is_deferred(django_capture_on_commit_callbacks):
+    user = User.objects.create_user(email='leaving@example.com', password='password')
+    other = User.objects.create_user(email='staying@example.com', password='password')
+    own_ad = Ad.objects.create(title='Own', author=user)
+    other_ad = Ad.objects.create(title='Other', author=other)
+    Comment.objects.create(text='На своё', author=other, ad=own_ad)
+    Comment.objects.create(text='На чужое', author=user, ad=other_ad)
+    Comment.objects.create(text='Останется', author=other, ad=other_ad)
+    other_ad.comments_count = 2
+    other_ad.save()
+
+    client = APIClient()
+    client.force_authenticate(user)
+    with django_capture_on_commit_callbacks() as callbacks:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.delete('/api/users/me/', {'current_password': 'password'}, format='json')
+    assert response.status_code == 204
+    # Объявления и отзывы помечаются двумя UPDATE, без каскадной выборки.
+    assert not any(query['sql'].startswith('DELETE') for query in queries.captured_queries)
+    user.refresh_from_db()
+    assert not user.is_active and user.deleted_at is not None
+    assert list(Ad.objects.all()) == [other_ad]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for callback in callbacks:
+            callback()
+    assert not User.objects.filter(pk=user.pk).exists()
+    assert list(Comment.all_objects.values_list('text', flat=True)) == ['Останется']
+    other_ad.refresh_from_db()
+    assert other_ad.comments_count == 1
+
+
+@pytest.mark.django_db
+def test_user_deletion_refreshes_counters_before_purge(settings, django_capture_on_commit_callbacks):
+    # Очистка откладывается: счётчики должны пересчитаться сразу, а не при удалении строк.
+    settings.SOFT_DELETE_RETENTION = 3600
+    user = User.objects.create_user(email='leaving@example.com', password='password')
+    other = User.objects.create_user(email='staying@example.com', password='password')
+    other_ad = Ad.objects.create(title='Other', author=other)
+    Comment.objects.create(text='Останется', author=other, ad=other_ad)
+    Comment.objects.create(text='Удалится', author=user, ad=other_ad)
+    Ad.objects.filter(pk=other_ad.pk).update(comments_count=2)
+
+    client = APIClient()
+    client.force_authenticate(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.delete('/api/users/me/', {'current_password': 'password'}, format='json')
+    assert response.status_code == 204
+    assert Comment.all_objects.count() == 2
+    other_ad.refresh_from_db()
+    assert other_ad.comments_count == 1
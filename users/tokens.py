@@ -0,0 +1,40 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+
+# Данные пользователя, которые передаются в токене и сверяются при аутентификации.
+USER_CLAIMS = ('role', 'is_active')
+
+
+def add_user_claims(token, user):
+    """
+    Записывает в токен роль и признак активности пользователя.
+    """
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh-токен, выпускающий access-токены с актуальными данными пользователя.
+
+    При обновлении access-токена роль и активность перечитываются из базы,
+    иначе после смены роли обновлённые токены несли бы старые значения
+    и отклонялись бы при аутентификации.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]}
+        ).only(*USER_CLAIMS).first()
+        if user is not None:
+            add_user_claims(access, user)
+        return access
@@ -1,10 +1,8 @@
 from django.urls import include, path
-from djoser.views import UserViewSet
 from rest_framework.routers import SimpleRouter
-from rest_framework_simplejwt.views import (TokenObtainPairView,
-                                            TokenRefreshView)
 
 from users.apps import UsersConfig
+from users.views import TokenObtainPairView, TokenRefreshView, UserViewSet
 
 app_name = UsersConfig.name
 
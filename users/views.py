@@ -1,3 +1,67 @@
-from django.shortcuts import render
+from django.db import transaction
+from django.utils import timezone
+from djoser import views as djoser_views
+from rest_framework_simplejwt import views
 
-# Create your views here.
+from config.throttling import ActionThrottleMixin
+from notice_board.cache import invalidate_ads
+from notice_board.models import Ad, Comment
+from notice_board.purge import schedule_purge
+from notice_board.tasks import refresh_ad_counters
+from users.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+
+class UserViewSet(ActionThrottleMixin, djoser_views.UserViewSet):
+    """
+    Вьюсет пользователей djoser с ограничением частоты анонимных действий:
+    регистрации, активации и восстановления пароля или логина.
+    """
+    throttle_scopes = {
+        'create': 'registration',
+        'activation': 'registration',
+        'resend_activation': 'registration',
+        'reset_password': 'password_reset',
+        'reset_password_confirm': 'password_reset',
+        'reset_username': 'password_reset',
+        'reset_username_confirm': 'password_reset',
+    }
+
+    def perform_destroy(self, instance):
+        """
+        Деактивирует пользователя и мягко удаляет его объявления и отзывы.
+
+        Объявления и отзывы помечаются двумя UPDATE без каскадного сбора
+        записей и сигналов; строки, файлы и самого пользователя удаляет
+        фоновая очистка (notice_board.purge). Счётчики отзывов чужих
+        объявлений, на которые писал пользователь, пересчитываются в фоне.
+        """
+        with transaction.atomic():
+            commented_ad_pks = list(
+                Comment.objects.filter(author=instance).exclude(ad__author=instance)
+                .order_by().values_list('ad_id', flat=True).distinct()
+            )
+            Ad.objects.filter(author=instance).soft_delete()
+            Comment.objects.filter(author=instance).soft_delete()
+            instance.is_active = False
+            instance.deleted_at = timezone.now()
+            instance.save(update_fields=['is_active', 'deleted_at'])
+            invalidate_ads()
+            if commented_ad_pks:
+                transaction.on_commit(lambda: refresh_ad_counters.delay(commented_ad_pks))
+        schedule_purge()
+
+
+class TokenObtainPairView(views.TokenObtainPairView):
+    """
+    Эндпоинт получения пары токенов с данными пользователя в claims.
+    Частота попыток входа ограничена до проверки пароля.
+    """
+    serializer_class = TokenObtainPairSerializer
+    throttle_scope = 'login'
+
+
+class TokenRefreshView(views.TokenRefreshView):
+    """
+    Эндпоинт обновления access-токена.
+    """
+    serializer_class = TokenRefreshSerializer